@@ -0,0 +1,14 @@
+#!/usr/bin/env bash
+# Refresh the committed NYC Neighborhood Tabulation Area polygons for the offline neighborhood
+# resolver (services/cafe/neighborhoods.py): data/neighborhoods/nyc_neighborhoods.geojson.
+# Regenerate nta_aliases.json afterwards (see data/neighborhoods/README.md).
+#
+# Usage:
+#   ./scripts/fetch_nyc_neighborhoods.sh
+#   NTA_GEOJSON_URL=<other export URL or file:///path.geojson> ./scripts/fetch_nyc_neighborhoods.sh
+set -euo pipefail
+
+REPO_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+# Downloads, simplifies, checks for named polygons, then replaces the file.
+python3 "$REPO_ROOT/services/cafe/neighborhoods.py" --fetch \
+  --out "$REPO_ROOT/data/neighborhoods/nyc_neighborhoods.geojson"
@@ -10,10 +10,11 @@ export AWS_DEFAULT_REGION="${AWS_DEFAULT_REGION:-us-east-1}"
 
 BUCKET="${BUCKET_NAME:-cafehop-local-photos}"
 TABLE="${TABLE_NAME:-cafehop-cafes}"
+WATCHLIST_TABLE="${WATCHLIST_TABLE_NAME:-cafehop-watchlist}"
 
 AWS=(aws --endpoint-url="$ENDPOINT")
 
-echo "Using endpoint $ENDPOINT bucket=$BUCKET table=$TABLE"
+echo "Using endpoint $ENDPOINT bucket=$BUCKET table=$TABLE watchlist=$WATCHLIST_TABLE"
 
 if ! "${AWS[@]}" s3 ls "s3://$BUCKET" 2>/dev/null; then
   "${AWS[@]}" s3 mb "s3://$BUCKET"
@@ -41,12 +42,29 @@ fi
 if "${AWS[@]}" dynamodb describe-table --table-name "$TABLE" &>/dev/null; then
   echo "DynamoDB table $TABLE already exists"
 else
-  # Minimal table for local dev (hash key only; scans work without production GSI).
+  # Same keys + neighborhood GSI as terraform/dynamodb.tf (GET /cafes?neighborhood= queries it).
   "${AWS[@]}" dynamodb create-table \
     --table-name "$TABLE" \
     --billing-mode PAY_PER_REQUEST \
-    --attribute-definitions AttributeName=key,AttributeType=S \
+    --attribute-definitions \
+      AttributeName=key,AttributeType=S \
+      AttributeName=neighborhood,AttributeType=S \
+      AttributeName=name,AttributeType=S \
     --key-schema AttributeName=key,KeyType=HASH \
+    --global-secondary-indexes \
+      'IndexName=neighborhood-index,KeySchema=[{AttributeName=neighborhood,KeyType=HASH},{AttributeName=name,KeyType=RANGE}],Projection={ProjectionType=ALL}' \
     >/dev/null
   echo "Created DynamoDB table $TABLE"
 fi
+
+if "${AWS[@]}" dynamodb describe-table --table-name "$WATCHLIST_TABLE" &>/dev/null; then
+  echo "DynamoDB table $WATCHLIST_TABLE already exists"
+else
+  "${AWS[@]}" dynamodb create-table \
+    --table-name "$WATCHLIST_TABLE" \
+    --billing-mode PAY_PER_REQUEST \
+    --attribute-definitions AttributeName=key,AttributeType=S \
+    --key-schema AttributeName=key,KeyType=HASH \
+    >/dev/null
+  echo "Created DynamoDB table $WATCHLIST_TABLE"
+fi
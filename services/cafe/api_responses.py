@@ -0,0 +1,157 @@
+"""
+Response layer for the cafe API: fast JSON rendering and Accept-Encoding negotiation.
+
+- FastJSONResponse renders with orjson when it is installed (falls back to the stdlib encoder).
+- CompressionMiddleware compresses complete JSON bodies of at least `minimum_size` bytes with
+  brotli (when the `brotli` package is installed and the client accepts `br`) or gzip.
+  It is plain ASGI, so it behaves the same under uvicorn and under Mangum's lambda_handler
+  (Mangum base64-encodes the compressed body for API Gateway).
+  Accept-Encoding is merged into any Vary the app set, and a strong ETag on a re-encoded body is
+  weakened (W/"...") since the gzip and br bytes are not the identity representation.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import brotli
+
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if HAS_ORJSON:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        out[token] = q
+    return out
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Pick br or gzip from an Accept-Encoding header (br preferred on ties); None = identity."""
+    accepted = _accepted_encodings(accept_encoding or "")
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if HAS_BROTLI else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for enc in candidates:
+        q = accepted.get(enc, wildcard)
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def _merge_vary(values: list[bytes]) -> bytes:
+    """One Vary value from the app's Vary headers plus Accept-Encoding (no duplicates)."""
+    tokens: list[str] = []
+    for value in values:
+        for token in value.decode("latin-1").split(","):
+            token = token.strip()
+            if token and token.lower() not in (t.lower() for t in tokens):
+                tokens.append(token)
+    if "*" not in tokens and "accept-encoding" not in (t.lower() for t in tokens):
+        tokens.append("Accept-Encoding")
+    return ", ".join(tokens).encode("latin-1")
+
+
+def _weak_etag(etag: bytes) -> bytes:
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start: dict | None = None
+        passthrough = False
+
+        async def wrapped_send(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            resp_headers = [(k, v) for k, v in start.get("headers", [])]
+            lowered = {k.lower(): v for k, v in resp_headers}
+            content_type = lowered.get(b"content-type", b"").decode("latin-1")
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and b"content-encoding" not in lowered
+                and content_type.startswith(_COMPRESSIBLE_TYPES)
+            )
+            if not compressible:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            packed = compress(body, encoding)
+            vary = [v for k, v in resp_headers if k.lower() == b"vary"]
+            resp_headers = [
+                (k, _weak_etag(v) if k.lower() == b"etag" else v)
+                for k, v in resp_headers
+                if k.lower() not in (b"content-length", b"vary")
+            ]
+            resp_headers += [
+                (b"content-encoding", encoding.encode("ascii")),
+                (b"content-length", str(len(packed)).encode("ascii")),
+                (b"vary", _merge_vary(vary)),
+            ]
+            await send({**start, "headers": resp_headers})
+            await send({"type": "http.response.body", "body": packed})
+
+        await self.app(scope, receive, wrapped_send)
@@ -0,0 +1,170 @@
+"""
+Re-enrich every cafe's closest subway station and Citi Bike dock from the current station data.
+
+from_upload enriches a cafe once; when the GTFS artifact or the Citi Bike station file changes,
+existing rows keep the old answers. This job scans the catalog once (projected to the fields it
+needs) and recomputes every cafe's nearest subway stop and Citi Bike dock with nearby.k_nearest:
+chunked NumPy distance matrices, all cafes x every station, no per-cafe network calls. The
+station sets are the ones upload enrichment searches (geocoding.get_subway_stops: every GTFS stop,
+labeled with its parent station; citibike_stations.reload: the configured file or feed, fetched
+now), and distances are rounded the same way, so a backfill over current data is a no-op. It
+diffs the results against the stored fields and writes back only the rows that changed, then
+rebuilds the cafes.json snapshot before exiting:
+
+    python backfill_enrichment.py [--dry-run] [--batch-size 100]
+
+The job fails (exit status 1) rather than diffing against nothing when either station set
+cannot be loaded.
+
+Writes are partial UpdateItems conditioned on the version that was scanned (db.update_items), so
+a cafe edited or deleted while the job runs is skipped rather than overwritten; rerun to pick it
+up. Neighborhood and Google Maps fields need network lookups and are left alone, as are share
+cards that were rendered with the old station.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import sys
+import time
+
+import citibike_stations
+from citibike_stations import WALKING_SPEED_M_PER_MIN
+from db import VERSION_ATTR, item_version, scan_all, update_items
+from geocoding import get_subway_stops
+from nearby import PointSet, k_nearest
+from snapshot import write_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Distances that moved less than this are float noise / rounding, not a new answer.
+DISTANCE_TOLERANCE_M = 1.0
+_FIELDS = (
+    "key",
+    "latitude",
+    "longitude",
+    "subwayStation",
+    "subwayDistanceM",
+    "subwayRoutes",
+    "closest_citibike_station_name",
+    "closest_citibike_station_distance_m",
+    "closest_citibike_station_walk_minutes",
+    VERSION_ATTR,
+)
+_PROJECTION = ", ".join(f"#f{i}" for i in range(len(_FIELDS)))
+_PROJECTION_NAMES = {f"#f{i}": name for i, name in enumerate(_FIELDS)}
+
+
+def _located(rows: list[dict]) -> list[dict]:
+    """Rows from_upload would have enriched: non-zero, finite coordinates."""
+    out = []
+    for row in rows:
+        try:
+            lat = float(row.get("latitude") or 0)
+            lon = float(row.get("longitude") or 0)
+        except (TypeError, ValueError):
+            continue
+        if lat and lon and math.isfinite(lat) and math.isfinite(lon):
+            out.append(row)
+    return out
+
+
+def station_sets() -> tuple[PointSet, PointSet]:
+    """(subway stops, Citi Bike docks) loaded now; RuntimeError when either is unavailable."""
+    stops = get_subway_stops()
+    if not stops:
+        raise RuntimeError("no GTFS subway data loaded")
+    # Loads a CITIBIKE_STATIONS_URL feed synchronously; lookups would see nothing until the
+    # background fetch lands.
+    index = citibike_stations.reload()
+    if index is None:
+        raise RuntimeError("no Citi Bike stations loaded (CITIBIKE_STATIONS_URL / CITIBIKE_STATIONS_JSON_PATH)")
+    return PointSet(stops), PointSet(index.stations)
+
+
+def compute(rows: list[dict], subway: PointSet, citibike: PointSet) -> list[dict]:
+    """Fresh enrichment fields per row (same order), in the attribute names from_upload writes."""
+    lats = [float(r["latitude"]) for r in rows]
+    lons = [float(r["longitude"]) for r in rows]
+    out = []
+    for subs, bikes in zip(k_nearest(subway, lats, lons, 1), k_nearest(citibike, lats, lons, 1)):
+        fields: dict = {}
+        if subs:
+            idx, distance_m = subs[0]
+            stop = subway.rows[idx]
+            fields.update(
+                subwayStation=stop["station"],
+                subwayDistanceM=round(distance_m, 1),
+                subwayRoutes=[str(x) for x in stop["lines"]],
+            )
+        if bikes:
+            idx, distance_m = bikes[0]
+            fields.update(
+                closest_citibike_station_name=citibike.rows[idx]["name"],
+                closest_citibike_station_distance_m=float(distance_m),
+                closest_citibike_station_walk_minutes=int(math.ceil(distance_m / WALKING_SPEED_M_PER_MIN)),
+            )
+        out.append(fields)
+    return out
+
+
+def _changed(row: dict, fresh: dict) -> dict:
+    """Subset of fresh that differs from what the row stores."""
+    diff = {}
+    for attr, value in fresh.items():
+        stored = row.get(attr)
+        if isinstance(value, float):
+            try:
+                if stored is not None and abs(float(stored) - value) < DISTANCE_TOLERANCE_M:
+                    continue
+            except (TypeError, ValueError):
+                pass
+        elif isinstance(value, list):
+            if [str(x) for x in (stored or [])] == value:
+                continue
+        elif stored == value:
+            continue
+        diff[attr] = value
+    return diff
+
+
+def backfill(dry_run: bool = False, batch_size: int = 100) -> dict:
+    """Scan, recompute, diff, write changed rows in batches. Returns counters."""
+    started = time.monotonic()
+    subway, citibike = station_sets()
+    rows = _located(scan_all(projection_expression=_PROJECTION, expression_attribute_names=_PROJECTION_NAMES))
+    fresh = compute(rows, subway, citibike)
+    pending = []
+    for row, fields in zip(rows, fresh):
+        diff = _changed(row, fields)
+        if diff:
+            pending.append((row["key"], diff, item_version(row)))
+    computed_s = time.monotonic() - started
+    stats = {"scanned": len(rows), "changed": len(pending), "updated": 0, "missing": 0, "conflict": 0, "error": 0}
+    logger.info("computed %d rows in %.2fs; %d changed", len(rows), computed_s, len(pending))
+    if dry_run:
+        for key, diff, _ in pending:
+            logger.info("would update key=%r %s", key, diff)
+        return stats
+    for start in range(0, len(pending), batch_size):
+        for outcome in update_items(pending[start:start + batch_size]).values():
+            stats[outcome] += 1
+    if stats["updated"]:
+        # Synchronous: a debounced rebuild (timer thread) would die with this process.
+        write_snapshot()
+    logger.info("backfill done in %.2fs: %s", time.monotonic() - started, stats)
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Log the rows that would change; write nothing")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per update_items batch")
+    args = parser.parse_args()
+    try:
+        backfill(dry_run=args.dry_run, batch_size=max(1, args.batch_size))
+    except RuntimeError as e:
+        logger.error("backfill aborted: %s", e)
+        sys.exit(1)
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: one 500-item GET /cafes page decoded by the resource path
+(TypeDeserializer -> db._deserialize -> db.item_to_cafe_dict) vs codec.cafe_from_attrs.
+No AWS access needed:
+
+    python bench_codec.py [--items 500] [--repeat 50]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from boto3.dynamodb.types import TypeDeserializer  # noqa: E402
+
+import codec  # noqa: E402
+from db import _deserialize, item_to_cafe_dict  # noqa: E402
+
+
+def _sample_item(i: int) -> dict:
+    """A cafe row shaped like POST /v1/cafes/from-upload writes it."""
+    return {
+        "key": f"Cafe {i}.jpg",
+        "name": f"Cafe {i}",
+        "imageUrl": f"https://bucket.s3.us-east-1.amazonaws.com/Cafe {i}.jpg",
+        "latitude": 40.7 + random.random() / 10,
+        "longitude": -73.95 - random.random() / 10,
+        "neighborhood": random.choice(["SoHo", "Chelsea", "Williamsburg", "Astoria"]),
+        "subwayStation": "14 St-Union Sq",
+        "subwayDistanceM": round(random.random() * 800, 1),
+        "subwayRoutes": ["4", "5", "6", "l", "n", "q"],
+        "eloRating": 1500 + random.random() * 200,
+        "eloStarRating": 3.5,
+        "notes": "cortado was great " * 3,
+        "google_maps_link": "https://www.google.com/maps/place/?q=place_id:ChIJabc",
+        "google_maps_place_type": "cafe",
+        "closest_citibike_station_name": "E 14 St & Ave B",
+        "closest_citibike_station_distance_m": round(random.random() * 400, 1),
+        "closest_citibike_station_walk_minutes": 3,
+        "shareCardPngUrl": f"https://bucket.s3.us-east-1.amazonaws.com/receipt_cards/Cafe {i}.png",
+        "createdAt": "2025-01-01T00:00:00+00:00",
+    }
+
+
+def _resource_path(raw_items: list[dict]) -> list[dict]:
+    deser = TypeDeserializer()
+    out = []
+    for raw in raw_items:
+        item = {k: deser.deserialize(v) for k, v in raw.items()}
+        out.append(item_to_cafe_dict(_deserialize(item)))
+    return out
+
+
+def _codec_path(raw_items: list[dict]) -> list[dict]:
+    return [codec.cafe_from_attrs(raw) for raw in raw_items]
+
+
+def _best_of(fn, raw_items: list[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(raw_items)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Decode cost of one GET /cafes page")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(0)
+    raw_items = [codec.encode_item(_sample_item(i)) for i in range(args.items)]
+    if _resource_path(raw_items) != _codec_path(raw_items):
+        raise SystemExit("codec.cafe_from_attrs disagrees with item_to_cafe_dict")
+
+    old = _best_of(_resource_path, raw_items, args.repeat)
+    new = _best_of(_codec_path, raw_items, args.repeat)
+    print(f"items={args.items} repeat={args.repeat} (best of)")
+    print(f"resource + _deserialize + item_to_cafe_dict: {old * 1000:8.2f} ms")
+    print(f"codec.cafe_from_attrs:                       {new * 1000:8.2f} ms")
+    print(f"speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
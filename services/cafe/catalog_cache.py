@@ -0,0 +1,88 @@
+"""
+In-process read-through cache of the compact cafe catalog (key, name, neighborhood, Elo).
+Used by ranking.py so warm Lambda containers / uvicorn workers don't rescan DynamoDB on every
+comparison request. Refreshed after CATALOG_CACHE_TTL_SECONDS; db.py invalidates it on writes.
+
+The scan runs outside the lock, so invalidate() and other readers never wait behind a cold load.
+Each invalidate() bumps a generation counter; a load only installs its rows if the generation has
+not moved since it started (rows read before a write must not be cached as current).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = float(os.environ.get("CATALOG_CACHE_TTL_SECONDS", "60"))
+
+_PROJECTION = "#k, #n, neighborhood, #e"
+_PROJECTION_NAMES = {"#k": "key", "#n": "name", "#e": "eloRating"}
+
+_lock = threading.Lock()
+_rows: list[dict] | None = None
+_loaded_at = 0.0
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "refreshes": 0, "invalidations": 0, "stale_loads": 0}
+
+
+def _compact(item: dict) -> dict:
+    elo = item.get("eloRating")
+    if elo is None:
+        elo = item.get("elo_rating")
+    return {
+        "key": item.get("key"),
+        "name": item.get("name"),
+        "neighborhood": item.get("neighborhood"),
+        "eloRating": elo,
+    }
+
+
+def get_rows() -> list[dict]:
+    """Compact cafe rows (watchlist entries excluded). Scans DynamoDB only on miss or expiry."""
+    global _rows, _loaded_at
+    with _lock:
+        if _rows is not None and time.monotonic() - _loaded_at < TTL_SECONDS:
+            _stats["hits"] += 1
+            return list(_rows)
+        _stats["misses"] += 1
+        generation = _generation
+    from db import scan_all
+
+    rows = [
+        _compact(it)
+        for it in scan_all(
+            projection_expression=_PROJECTION,
+            expression_attribute_names=_PROJECTION_NAMES,
+        )
+    ]
+    with _lock:
+        if generation == _generation:
+            _rows = rows
+            _loaded_at = time.monotonic()
+            _stats["refreshes"] += 1
+            logger.info("catalog cache refreshed rows=%d", len(rows))
+        else:
+            _stats["stale_loads"] += 1
+    return list(rows)
+
+
+def invalidate() -> None:
+    """Drop the snapshot; the next get_rows() rescans. Called by db.py on put/update/delete."""
+    global _rows, _generation
+    with _lock:
+        _rows = None
+        _generation += 1
+        _stats["invalidations"] += 1
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_stats,
+            "rows": len(_rows) if _rows is not None else 0,
+            "age_s": round(time.monotonic() - _loaded_at, 1) if _rows is not None else None,
+            "ttl_s": TTL_SECONDS,
+        }
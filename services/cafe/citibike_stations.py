@@ -1,14 +1,44 @@
+"""
+Closest Citi Bike dock for a point, from a GBFS station_information feed.
+
+The source is CITIBIKE_STATIONS_JSON_PATH (default: station_information_rel.json next to this
+module, a flat list of {station_id, name, lat, lon}) or CITIBIKE_STATIONS_URL, a live GBFS
+station_information.json (e.g. https://gbfs.citibikenyc.com/gbfs/en/station_information.json).
+Both the GBFS envelope ({"data": {"stations": [...]}}) and the flat list are accepted, so a
+downloaded feed file works as a local stand-in for the URL.
+
+Each load builds a _StationIndex, the shared grid over dock coordinates (grid_index.GridIndex, cells
+of GRID_CELL_M), so a lookup computes distances for the handful of docks around the point instead
+of all ~2,000. The index is replaced atomically (one reference swap) when the file's mtime changes
+(checked at most every CHECK_INTERVAL_SECONDS) or, for a URL, when the feed's ttl /
+CITIBIKE_REFRESH_SECONDS has passed. Refreshes run in a background thread while lookups keep using
+the current index; a failed refresh keeps the old one.
+
+A URL is never fetched on the request path: the first load also runs in the background (warm()
+starts it at startup) and lookups return None until it lands. A source with no usable stations
+(fetch error, missing or empty file) is retried every CITIBIKE_RETRY_SECONDS rather than given up on.
+"""
 import json
+import logging
 import math
 import os
+import threading
+import time
 from typing import Optional
 
-import numpy as np
+import requests
+
+from grid_index import GridIndex
+
+logger = logging.getLogger(__name__)
 
-EARTH_RADIUS_M = 6371000
 WALKING_SPEED_M_PER_MIN = 80
 
-_stations_cache = None
+GRID_CELL_M = float(os.environ.get("CITIBIKE_GRID_CELL_M", "400"))
+CHECK_INTERVAL_SECONDS = float(os.environ.get("CITIBIKE_CHECK_INTERVAL_SECONDS", "30"))
+REFRESH_SECONDS = float(os.environ.get("CITIBIKE_REFRESH_SECONDS", "3600"))
+FETCH_TIMEOUT_SECONDS = float(os.environ.get("CITIBIKE_FETCH_TIMEOUT_SECONDS", "5"))
+RETRY_SECONDS = float(os.environ.get("CITIBIKE_RETRY_SECONDS", "60"))
 
 
 def _stations_path():
@@ -19,42 +49,194 @@ def _stations_path():
     return os.environ.get("CITIBIKE_STATIONS_JSON_PATH", default)
 
 
-def _load_stations(json_path=None):
-    global _stations_cache
-    if _stations_cache is not None:
-        return _stations_cache
-    path = json_path or _stations_path()
-    if not os.path.isfile(path):
+def _source(json_path=None):
+    if json_path:
+        return json_path
+    return os.environ.get("CITIBIKE_STATIONS_URL", "").strip() or _stations_path()
+
+
+def _is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def _parse(doc) -> tuple[list, Optional[float]]:
+    """(stations, ttl seconds or None) from a GBFS station_information document or a flat list."""
+    ttl = None
+    if isinstance(doc, dict):
+        if isinstance(doc.get("ttl"), (int, float)) and doc["ttl"] > 0:
+            ttl = float(doc["ttl"])
+        doc = (doc.get("data") or {}).get("stations", [])
+    stations = []
+    for s in doc or []:
+        try:
+            lat, lon = float(s["lat"]), float(s["lon"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not (math.isfinite(lat) and math.isfinite(lon)) or (lat == 0 and lon == 0):
+            continue
+        stations.append({"station_id": str(s.get("station_id", "")), "name": s.get("name", ""), "lat": lat, "lon": lon})
+    return stations, ttl
+
+
+class _StationIndex(GridIndex):
+    # Rings walked before falling back to the vectorized scan (docks are dense: usually 1-2 rings).
+    _MAX_RINGS = 4
+
+    def __init__(self, stations: list, source: str, version, ttl: Optional[float] = None):
+        super().__init__(
+            [math.radians(s["lat"]) for s in stations],
+            [math.radians(s["lon"]) for s in stations],
+            GRID_CELL_M,
+            self._MAX_RINGS,
+        )
+        self.stations = stations
+        self.source = source
+        self.version = version  # file mtime last looked at, or fetch time for a URL
+        self.ttl = ttl
+        self.loaded_at = time.monotonic()
+        self.checked_at = self.loaded_at
+
+    def stale(self, now: float) -> bool:
+        if _is_url(self.source):
+            return now - self.loaded_at >= (self.ttl or REFRESH_SECONDS)
+        return now - self.checked_at >= CHECK_INTERVAL_SECONDS
+
+
+class _Unavailable:
+    """Placeholder for a source with no usable stations yet; (re)loaded in the background when stale."""
+
+    def __init__(self, source: str, retry_now: bool = False):
+        self.source = source
+        self.checked_at = float("-inf") if retry_now else time.monotonic()
+
+    def stale(self, now: float) -> bool:
+        return now - self.checked_at >= RETRY_SECONDS
+
+
+def _read(source: str) -> tuple[list, Optional[float], object]:
+    """(stations, ttl, version) from a URL or file; raises on failure."""
+    if _is_url(source):
+        resp = requests.get(source, timeout=FETCH_TIMEOUT_SECONDS)
+        resp.raise_for_status()
+        stations, ttl = _parse(resp.json())
+        # The GBFS ttl is how long the feed is valid (often seconds); do not refetch more often than REFRESH_SECONDS.
+        return stations, max(ttl or 0, REFRESH_SECONDS), time.time()
+    version = os.path.getmtime(source)
+    with open(source, "r", encoding="utf-8") as f:
+        stations, ttl = _parse(json.load(f))
+    return stations, ttl, version
+
+
+_lock = threading.Lock()
+_indexes: dict = {}  # source -> _StationIndex, or _Unavailable until the source has stations
+_refreshing: set = set()
+
+
+def _build(source: str) -> Optional[_StationIndex]:
+    try:
+        stations, ttl, version = _read(source)
+    except FileNotFoundError:
+        logger.info("Citi Bike stations file not found: %s", source)
+        return None
+    except Exception as e:
+        logger.warning("Citi Bike stations load failed from %s: %s", source, e)
+        return None
+    if not stations:
+        logger.warning("Citi Bike station feed %s has no stations", source)
         return None
-    with open(path, "r", encoding="utf-8") as f:
-        _stations_cache = json.load(f)
-    return _stations_cache
+    logger.info("Loaded %d Citi Bike stations from %s", len(stations), source)
+    return _StationIndex(stations, source, version, ttl)
+
+
+def _refresh(source: str, current) -> None:
+    try:
+        if isinstance(current, _Unavailable):
+            fresh = _build(source)
+            if fresh is not None:
+                _indexes[source] = fresh
+            else:
+                current.checked_at = time.monotonic()
+            return
+        if not _is_url(source):
+            try:
+                mtime = os.path.getmtime(source)
+            except OSError:
+                mtime = None
+            if mtime is None or mtime == current.version:
+                current.checked_at = time.monotonic()
+                return
+        fresh = _build(source)
+        if fresh is not None:
+            _indexes[source] = fresh  # atomic swap; in-flight lookups finish on the old index
+        elif _is_url(source):
+            current.loaded_at = time.monotonic()  # keep serving the old feed; retry after the next interval
+        else:
+            # Keep serving the old stations; do not re-read the broken file until it changes again.
+            current.version = mtime
+            current.checked_at = time.monotonic()
+    finally:
+        with _lock:
+            _refreshing.discard(source)
+
+
+def _get_index(json_path=None) -> Optional[_StationIndex]:
+    source = _source(json_path)
+    entry = _indexes.get(source)
+    if entry is None:
+        with _lock:
+            entry = _indexes.get(source)
+            if entry is None:
+                if _is_url(source):
+                    entry = _Unavailable(source, retry_now=True)  # fetched by the refresh thread below
+                else:
+                    entry = _build(source) or _Unavailable(source)
+                _indexes[source] = entry
+    if entry.stale(time.monotonic()):
+        with _lock:
+            start = source not in _refreshing
+            if start:
+                _refreshing.add(source)
+        if start:
+            threading.Thread(target=_refresh, args=(source, entry), name="citibike-refresh", daemon=True).start()
+    return entry if isinstance(entry, _StationIndex) else None
+
+
+def warm(json_path=None) -> None:
+    """Load a file source now, or start fetching a URL source in the background (app startup)."""
+    _get_index(json_path)
+
+
+def reload(json_path=None) -> Optional[_StationIndex]:
+    """Rebuild the index for the source now (synchronously); keeps the old index on failure."""
+    source = _source(json_path)
+    fresh = _build(source)
+    with _lock:
+        if fresh is not None:
+            _indexes[source] = fresh
+        elif source not in _indexes:
+            _indexes[source] = _Unavailable(source)
+        entry = _indexes[source]
+    return entry if isinstance(entry, _StationIndex) else None
+
+
+def get_stations(json_path: Optional[str] = None) -> Optional[list]:
+    """Current station list (dicts with station_id, name, lat, lon), or None if unavailable.
+    A reload returns a new list object, so callers can cache derived data by identity."""
+    index = _get_index(json_path)
+    return index.stations if index is not None else None
 
 
 def get_closest_citibike_station(lat: float, lon: float, json_path: Optional[str] = None) -> Optional[dict]:
     """Closest station; returns dict with name, distance_m, mins_walk. None if data unavailable."""
-    stations = _load_stations(json_path)
-    if not stations:
+    index = _get_index(json_path)
+    if index is None:
         return None
-
-    station_lats = np.array([s["lat"] for s in stations])
-    station_lons = np.array([s["lon"] for s in stations])
-    lat_rad = math.radians(lat)
-    lon_rad = math.radians(lon)
-    station_lats_rad = np.radians(station_lats)
-    station_lons_rad = np.radians(station_lons)
-    dlat = station_lats_rad - lat_rad
-    dlon = station_lons_rad - lon_rad
-    a = (
-        np.sin(dlat / 2) ** 2
-        + np.cos(lat_rad) * np.cos(station_lats_rad) * np.sin(dlon / 2) ** 2
-    )
-    c = 2 * np.arcsin(np.sqrt(a))
-    distances = EARTH_RADIUS_M * c
-    closest_idx = int(np.argmin(distances))
-    closest = stations[closest_idx]
-    distance_m = float(distances[closest_idx])
-    mins_walk = int(np.ceil(distance_m / WALKING_SPEED_M_PER_MIN))
+    found = index.nearest(lat, lon)
+    if found is None:
+        return None
+    closest_idx, distance_m = found
+    closest = index.stations[closest_idx]
+    mins_walk = int(math.ceil(distance_m / WALKING_SPEED_M_PER_MIN))
     return {
         "station_id": closest["station_id"],
         "name": closest["name"],
@@ -63,3 +245,15 @@ def get_closest_citibike_station(lat: float, lon: float, json_path: Optional[str
         "distance_m": distance_m,
         "mins_walk": mins_walk,
     }
+
+
+def stats() -> dict:
+    index = _indexes.get(_source())
+    if not isinstance(index, _StationIndex):
+        return {"loaded": False, "source": _source()}
+    return {
+        "loaded": True,
+        "source": index.source,
+        "stations": len(index.stations),
+        "age_seconds": round(time.monotonic() - index.loaded_at, 1),
+    }
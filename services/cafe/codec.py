@@ -0,0 +1,185 @@
+"""
+Single-pass DynamoDB attribute-value codec for the low-level client.
+
+The resource API deserializes every attribute to Decimal (TypeDeserializer), db._deserialize walks
+the item again to turn Decimals into floats, and item_to_cafe_dict then reads each field through
+chained .get() calls. cafe_from_attrs goes straight from the wire format ({"S": ...}, {"N": ...})
+to the Cafe API shape in one pass; bench_codec.py compares the two paths.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+
+def to_attr(value: Any) -> dict:
+    """Python value -> DynamoDB AttributeValue. Floats/Decimals become N strings directly."""
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float, Decimal)):
+        return {"N": str(value)}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, dict):
+        return {"M": {k: to_attr(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [to_attr(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        return {"L": [to_attr(v) for v in sorted(value)]}
+    if isinstance(value, bytes):
+        return {"B": value}
+    raise TypeError(f"Unsupported DynamoDB value type: {type(value).__name__}")
+
+
+def from_attr(av: dict) -> Any:
+    """DynamoDB AttributeValue -> Python value; numbers come back as float (same as db._deserialize)."""
+    if "S" in av:
+        return av["S"]
+    if "N" in av:
+        return float(av["N"])
+    if "L" in av:
+        return [from_attr(v) for v in av["L"]]
+    if "M" in av:
+        return {k: from_attr(v) for k, v in av["M"].items()}
+    if "BOOL" in av:
+        return av["BOOL"]
+    if "NULL" in av:
+        return None
+    if "SS" in av:
+        return set(av["SS"])
+    if "NS" in av:
+        return {float(n) for n in av["NS"]}
+    if "B" in av:
+        return av["B"]
+    if "BS" in av:
+        return set(av["BS"])
+    raise TypeError(f"Unsupported DynamoDB attribute: {list(av)}")
+
+
+def encode_item(item: dict) -> dict:
+    return {k: to_attr(v) for k, v in item.items()}
+
+
+def decode_item(attrs: dict) -> dict:
+    return {k: from_attr(v) for k, v in attrs.items()}
+
+
+def is_cafe_attrs(attrs: dict) -> bool:
+    """db.is_cafe_item on a raw item, without decoding it."""
+    kind = (attrs.get("kind") or {}).get("S")
+    key = (attrs.get("key") or {}).get("S") or ""
+    if kind in ("watchlist", "wish"):
+        return False
+    return not (key.startswith("watchlist:") or key.startswith("wish:") or key.startswith("meta:"))
+
+
+# Key attributes of the neighborhood GSI (neighborhood, name); shared by db.py and storage.py.
+INDEX_KEY_ATTRS = ("neighborhood", "name")
+
+
+def drop_empty_index_keys(item: dict) -> dict:
+    """GSI key attributes may not be empty strings; leave them off so the row is simply not indexed."""
+    return {k: v for k, v in item.items() if not (k in INDEX_KEY_ATTRS and v == "")}
+
+
+def only_fields(rows: list[dict], fields: list[str] | None) -> list[dict]:
+    """Cafe API-shape rows cut down to the requested fields (all of them when fields is empty)."""
+    if not fields:
+        return rows
+    return [{f: row[f] for f in fields} for row in rows]
+
+
+def _str(attrs: dict, names: tuple[str, ...], default: str) -> str:
+    for n in names:
+        av = attrs.get(n)
+        if av is not None:
+            s = av.get("S")
+            if s:
+                return s
+    return default
+
+
+def _num(attrs: dict, names: tuple[str, ...], default: float) -> float:
+    for n in names:
+        av = attrs.get(n)
+        if av is not None and "N" in av:
+            return float(av["N"])
+    return default
+
+
+def _str_list(attrs: dict, names: tuple[str, ...]) -> list[str]:
+    for n in names:
+        av = attrs.get(n)
+        if av is None:
+            continue
+        if "L" in av and av["L"]:
+            return [v["S"] if "S" in v else str(from_attr(v)) for v in av["L"]]
+        if "SS" in av and av["SS"]:
+            return list(av["SS"])
+    return []
+
+
+# Cafe API field -> DynamoDB attributes it is read from, in precedence order (camelCase first).
+CAFE_FIELD_SOURCES: dict[str, tuple[str, ...]] = {
+    "name": ("name",),
+    "image_url": ("imageUrl", "image_url"),
+    "s3_key": ("key", "s3_key"),
+    "latitude": ("latitude",),
+    "longitude": ("longitude",),
+    "neighborhood": ("neighborhood",),
+    "subway_station": ("subwayStation", "subway_station"),
+    "subway_distance_m": ("subwayDistanceM", "subway_distance_m"),
+    "subway_routes": ("subwayRoutes", "subway_routes"),
+    "elo_rating": ("eloRating", "elo_rating"),
+    "elo_star_rating": ("eloStarRating", "elo_star_rating"),
+    "notes": ("notes",),
+    "google_maps_link": ("google_maps_link",),
+    "google_maps_place_type": ("google_maps_place_type",),
+    "closest_citibike_station_name": ("closest_citibike_station_name",),
+    "closest_citibike_station_distance_m": ("closest_citibike_station_distance_m",),
+    "closest_citibike_station_walk_minutes": ("closest_citibike_station_walk_minutes",),
+    "share_card_png_url": ("shareCardPngUrl", "share_card_png_url"),
+    "created_at": ("createdAt", "created_at"),
+}
+_S = CAFE_FIELD_SOURCES
+
+
+def projection_for_fields(fields: list[str]) -> tuple[str, dict[str, str]]:
+    """
+    ProjectionExpression (+ ExpressionAttributeNames) covering the given Cafe fields.
+    key and kind are always included: cursors and the watchlist/meta filter need them.
+    """
+    attrs = ["key", "kind"]
+    for f in fields:
+        for a in _S[f]:
+            if a not in attrs:
+                attrs.append(a)
+    names = {f"#p{i}": a for i, a in enumerate(attrs)}
+    return ", ".join(names), names
+
+
+def cafe_from_attrs(attrs: dict) -> dict:
+    """Raw DynamoDB item -> Cafe(**kwargs) dict; same field rules as db.item_to_cafe_dict."""
+    return {
+        "name": _str(attrs, _S["name"], ""),
+        "image_url": _str(attrs, _S["image_url"], ""),
+        "s3_key": _str(attrs, _S["s3_key"], ""),
+        "latitude": _num(attrs, _S["latitude"], 0.0),
+        "longitude": _num(attrs, _S["longitude"], 0.0),
+        "neighborhood": _str(attrs, _S["neighborhood"], ""),
+        "subway_station": _str(attrs, _S["subway_station"], ""),
+        "subway_distance_m": _num(attrs, _S["subway_distance_m"], 0.0),
+        "subway_routes": _str_list(attrs, _S["subway_routes"]),
+        "elo_rating": _num(attrs, _S["elo_rating"], 1500.0),
+        "elo_star_rating": _num(attrs, _S["elo_star_rating"], 0.0),
+        "notes": _str(attrs, _S["notes"], ""),
+        "google_maps_link": _str(attrs, _S["google_maps_link"], ""),
+        "google_maps_place_type": _str(attrs, _S["google_maps_place_type"], ""),
+        "closest_citibike_station_name": _str(attrs, _S["closest_citibike_station_name"], ""),
+        "closest_citibike_station_distance_m": _num(attrs, _S["closest_citibike_station_distance_m"], 0.0),
+        "closest_citibike_station_walk_minutes": int(_num(attrs, _S["closest_citibike_station_walk_minutes"], 0)),
+        "share_card_png_url": _str(attrs, _S["share_card_png_url"], ""),
+        "created_at": _str(attrs, _S["created_at"], ""),
+    }
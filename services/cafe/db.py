@@ -1,21 +1,68 @@
 from __future__ import annotations
 
+import base64
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from typing import Any
 
-import boto3
+import aws_clients
+import catalog_cache
+import codec
 
 TABLE_NAME = os.environ.get("TABLE_NAME", "cafehop-cafes")
-REGION = os.environ.get("AWS_REGION", "us-east-1")
-_ENDPOINT = os.environ.get("AWS_ENDPOINT_URL")
+# GSI on (neighborhood, name) — terraform/dynamodb.tf and scripts/localstack_setup_resources.sh.
+NEIGHBORHOOD_INDEX = os.environ.get("NEIGHBORHOOD_INDEX_NAME", "neighborhood-index")
+# Watchlist rows (watchlist:gmaps:*) have their own table; see migrate_watchlist.py.
+WATCHLIST_TABLE_NAME = os.environ.get("WATCHLIST_TABLE_NAME", "cafehop-watchlist")
+REGION = aws_clients.REGION
 
-_ddb_kwargs: dict = {"region_name": REGION}
-if _ENDPOINT:
-    _ddb_kwargs["endpoint_url"] = _ENDPOINT
+# Shared pooled clients (aws_clients.py), built on first DynamoDB use so CAFE_STORE=memory / sqlite
+# needs no AWS configuration. The plain low-level client has no resource transforms and serves the
+# hot paths that use codec.py.
+_tables: dict = {}
 
-_resource = boto3.resource("dynamodb", **_ddb_kwargs)
-table = _resource.Table(TABLE_NAME)
+
+def _ddb():
+    return aws_clients.client("dynamodb")
+
+
+def _table(name: str = TABLE_NAME):
+    """boto3 Table for name (cafes table by default)."""
+    found = _tables.get(name)
+    if found is None:
+        found = _tables.setdefault(name, aws_clients.resource("dynamodb").Table(name))
+    return found
+
+
+# Parallel full-table scans: Segment/TotalSegments fanned out on a bounded pool (1 = sequential).
+SCAN_SEGMENTS = max(1, int(os.environ.get("DDB_SCAN_SEGMENTS", "4")))
+SCAN_MAX_WORKERS = max(1, int(os.environ.get("DDB_SCAN_MAX_WORKERS", str(SCAN_SEGMENTS))))
+# Concurrent conditional UpdateItems for bulk writes (update_items).
+WRITE_MAX_WORKERS = max(1, int(os.environ.get("DDB_WRITE_MAX_WORKERS", "8")))
+
+# Storage backend: dynamodb (default) or a local store from storage.py (memory / sqlite) for
+# load tests and AWS-free runs. The public functions below route to it when one is selected.
+STORE = os.environ.get("CAFE_STORE", "dynamodb").strip().lower() or "dynamodb"
+_local_store = None
+_local_store_lock = threading.Lock()
+
+
+def _local():
+    """The storage.Store selected by CAFE_STORE, or None when backed by DynamoDB."""
+    global _local_store
+    if STORE == "dynamodb":
+        return None
+    if _local_store is None:
+        with _local_store_lock:
+            if _local_store is None:
+                import storage
+
+                _local_store = storage.open_store(STORE)
+    return _local_store
 
 
 def _serialize(obj: Any) -> Any:
@@ -42,38 +89,153 @@ def _deserialize(obj: Any) -> Any:
 
 def get_item(cafe_id: str) -> dict | None:
     """Get one cafe by key. Returns None if not found."""
+    store = _local()
+    if store is not None:
+        return store.get_item(cafe_id)
     try:
-        resp = table.get_item(Key={"key": cafe_id})
+        resp = _ddb().get_item(TableName=TABLE_NAME, Key={"key": {"S": cafe_id}})
         item = resp.get("Item")
-        return _deserialize(item) if item else None
+        return codec.decode_item(item) if item else None
     except Exception as e:
         print(f"db get_item error: {e}")
         return None
 
 
+# Bookkeeping row in the cafes table (filtered out of every cafe read by is_cafe_item).
+CATALOG_META_KEY = "meta:catalog"
+_CATALOG_VERSION_ATTR = "catalogVersion"
+
+
+def get_catalog_version() -> int | None:
+    """
+    Monotonic counter bumped by every cafe write; GET /cafes builds its ETag from it.
+    One GetItem on the meta row; None if it could not be read (caller then skips the ETag).
+    """
+    store = _local()
+    if store is not None:
+        return store.catalog_version()
+    try:
+        resp = _ddb().get_item(
+            TableName=TABLE_NAME,
+            Key={"key": {"S": CATALOG_META_KEY}},
+            ProjectionExpression="#v",
+            ExpressionAttributeNames={"#v": _CATALOG_VERSION_ATTR},
+            ConsistentRead=True,
+        )
+        attr = (resp.get("Item") or {}).get(_CATALOG_VERSION_ATTR)
+        return int(attr["N"]) if attr else 0
+    except Exception as e:
+        print(f"db get_catalog_version error: {e}")
+        return None
+
+
+def _catalog_changed() -> None:
+    """Called after every successful cafe write: drop the local snapshot and bump the shared version."""
+    catalog_cache.invalidate()
+    store = _local()
+    if store is not None:
+        store.bump_catalog_version()
+        return
+    try:
+        _ddb().update_item(
+            TableName=TABLE_NAME,
+            Key={"key": {"S": CATALOG_META_KEY}},
+            UpdateExpression="ADD #v :one",
+            ExpressionAttributeNames={"#v": _CATALOG_VERSION_ATTR},
+            ExpressionAttributeValues={":one": {"N": "1"}},
+        )
+    except Exception as e:
+        print(f"db catalog version bump error: {e}")
+
+
 def put_item(item: dict) -> None:
     """Insert or overwrite one cafe. Item must include 'key'."""
-    table.put_item(Item=_serialize(item))
+    store = _local()
+    if store is not None:
+        store.put_item(item)
+        _catalog_changed()
+        return
+    _ddb().put_item(TableName=TABLE_NAME, Item=codec.encode_item(codec.drop_empty_index_keys(item)))
+    _catalog_changed()
+
+
+def _scan_segment(table_name: str, kwargs: dict, segment: int, total_segments: int) -> list[dict]:
+    """
+    Walk LastEvaluatedKey pages of one scan segment. Uses the resource's low-level client, which is
+    thread-safe (Table objects are not) and still applies the resource's attribute-value transforms.
+    """
+    client = _table().meta.client
+    seg_kwargs = dict(kwargs, TableName=table_name)
+    if total_segments > 1:
+        seg_kwargs.update(Segment=segment, TotalSegments=total_segments)
+    items = []
+    while True:
+        resp = client.scan(**seg_kwargs)
+        items.extend(resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return items
+        seg_kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def _parallel_scan(table_name: str, segments: int | None = None, **kwargs) -> list[dict]:
+    """Full scan of table_name split into `segments` parallel segments; results merged in segment order."""
+    total = max(1, segments or SCAN_SEGMENTS)
+    if total == 1:
+        return _scan_segment(table_name, kwargs, 0, 1)
+    with ThreadPoolExecutor(max_workers=min(total, SCAN_MAX_WORKERS)) as pool:
+        parts = pool.map(lambda seg: _scan_segment(table_name, kwargs, seg, total), range(total))
+        return [it for part in parts for it in part]
 
 
 def scan_all(
     projection_expression: str | None = None,
     expression_attribute_names: dict | None = None,
+    segments: int | None = None,
 ) -> list[dict]:
-    """Scan full table with optional projection; returns deserialized items."""
+    """Scan full table (parallel segments) with optional projection; returns deserialized items."""
+    store = _local()
+    if store is not None:
+        return store.scan_all(projection_expression, expression_attribute_names)
     kwargs = {}
     if projection_expression:
         kwargs["ProjectionExpression"] = projection_expression
     if expression_attribute_names:
         kwargs["ExpressionAttributeNames"] = expression_attribute_names
+    items = _parallel_scan(TABLE_NAME, segments, **kwargs)
+    items = [_deserialize(it) for it in items]
+    return [it for it in items if is_cafe_item(it)]
+
+
+def query_neighborhood(neighborhood: str, limit: int = 100, offset: int = 0) -> list[dict]:
+    """
+    Cafes in one neighborhood via the neighborhood GSI (sorted by name); apply limit/offset.
+    Reads only that neighborhood's rows. Falls back to a filtered scan if the index is missing.
+    """
+    store = _local()
+    if store is not None:
+        return store.query_neighborhood(neighborhood, limit=limit, offset=offset)
+    from boto3.dynamodb.conditions import Key
+    from botocore.exceptions import ClientError
+
+    kwargs = {
+        "IndexName": NEIGHBORHOOD_INDEX,
+        "KeyConditionExpression": Key("neighborhood").eq(neighborhood),
+    }
     items = []
-    resp = table.scan(**kwargs)
-    items.extend(resp.get("Items", []))
-    while resp.get("LastEvaluatedKey"):
-        resp = table.scan(ExclusiveStartKey=resp["LastEvaluatedKey"], **kwargs)
+    try:
+        resp = _table().query(**kwargs)
         items.extend(resp.get("Items", []))
+        while resp.get("LastEvaluatedKey") and len(items) < offset + limit:
+            resp = _table().query(ExclusiveStartKey=resp["LastEvaluatedKey"], **kwargs)
+            items.extend(resp.get("Items", []))
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("ValidationException", "ResourceNotFoundException"):
+            raise
+        print(f"db query_neighborhood: index {NEIGHBORHOOD_INDEX!r} unavailable ({e}); falling back to scan")
+        return scan(neighborhood=neighborhood, limit=limit, offset=offset)
     items = [_deserialize(it) for it in items]
-    return [it for it in items if not is_watchlist_item(it)]
+    items = [it for it in items if is_cafe_item(it)]
+    return items[offset : offset + limit]
 
 
 def scan(
@@ -82,48 +244,288 @@ def scan(
     offset: int = 0,
 ) -> list[dict]:
     """Scan table with optional neighborhood filter; apply limit/offset."""
+    store = _local()
+    if store is not None:
+        return store.scan(neighborhood=neighborhood, limit=limit, offset=offset)
     kwargs = {}
     if neighborhood is not None and neighborhood.strip():
         from boto3.dynamodb.conditions import Attr
 
         kwargs["FilterExpression"] = Attr("neighborhood").eq(neighborhood)
     items = []
-    resp = table.scan(**kwargs)
+    resp = _table().scan(**kwargs)
     items.extend(resp.get("Items", []))
     while resp.get("LastEvaluatedKey") and len(items) < offset + limit:
-        resp = table.scan(ExclusiveStartKey=resp["LastEvaluatedKey"], **kwargs)
+        resp = _table().scan(ExclusiveStartKey=resp["LastEvaluatedKey"], **kwargs)
         items.extend(resp.get("Items", []))
     items = [_deserialize(it) for it in items]
-    items = [it for it in items if not is_watchlist_item(it)]
+    items = [it for it in items if is_cafe_item(it)]
     return items[offset : offset + limit]
 
 
-def update_item(cafe_id: str, updates: dict) -> dict | None:
+def encode_cursor(last_evaluated_key: dict | None) -> str | None:
+    """Opaque page token from a low-level LastEvaluatedKey (None when there are no more pages)."""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(codec.decode_item(last_evaluated_key), separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Inverse of encode_cursor (returns an ExclusiveStartKey). Raises ValueError for foreign tokens."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(key, dict) or not isinstance(key.get("key"), str):
+        raise ValueError("Invalid cursor")
+    return codec.encode_item(key)
+
+
+def _read_page(operation: str, kwargs: dict, limit: int, start_key: dict | None) -> tuple[list[dict], str | None]:
+    """
+    Collect up to `limit` cafes (Cafe API shape) from a low-level Scan/Query, reading only as many
+    items as needed. Limit is set to the remaining count so LastEvaluatedKey always points at the
+    last item returned.
+    """
+    read = getattr(_ddb(), operation)
+    items: list[dict] = []
+    last_key = start_key
+    while True:
+        page_kwargs = dict(kwargs, TableName=TABLE_NAME, Limit=limit - len(items))
+        if last_key:
+            page_kwargs["ExclusiveStartKey"] = last_key
+        resp = read(**page_kwargs)
+        for it in resp.get("Items", []):
+            if codec.is_cafe_attrs(it):
+                items.append(codec.cafe_from_attrs(it))
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key or len(items) >= limit:
+            break
+    return items, encode_cursor(last_key)
+
+
+def scan_page(
+    neighborhood: str | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+    fields: list[str] | None = None,
+) -> tuple[list[dict], str | None]:
     """
-    Update attributes for one cafe. updates is a flat dict of attr -> value.
+    One page of cafes (already in Cafe API shape) plus the cursor for the next page (None on the
+    last page). With a neighborhood, pages through the neighborhood GSI; otherwise the base table.
+    Each call costs one page of reads regardless of how deep the client has paged.
+    fields (Cafe field names) is pushed down as a ProjectionExpression; rows then carry only those.
+    """
+    store = _local()
+    if store is not None:
+        return store.scan_page(neighborhood=neighborhood, limit=limit, cursor=cursor, fields=fields)
+    start_key = decode_cursor(cursor) if cursor else None
+    base: dict = {}
+    if fields:
+        projection, projected_names = codec.projection_for_fields(fields)
+        base = {"ProjectionExpression": projection, "ExpressionAttributeNames": dict(projected_names)}
+    if neighborhood is None or not neighborhood.strip():
+        rows, next_cursor = _read_page("scan", base, limit, start_key)
+        return codec.only_fields(rows, fields), next_cursor
+
+    match = {
+        "ExpressionAttributeNames": {**base.get("ExpressionAttributeNames", {}), "#nb": "neighborhood"},
+        "ExpressionAttributeValues": {":nb": {"S": neighborhood}},
+    }
+    if fields:
+        match["ProjectionExpression"] = base["ProjectionExpression"]
+    rows, next_cursor = _query_neighborhood_page(match, limit, start_key)
+    return codec.only_fields(rows, fields), next_cursor
+
+
+def _query_neighborhood_page(match: dict, limit: int, start_key: dict | None) -> tuple[list[dict], str | None]:
+    """Neighborhood GSI query page; falls back to a filtered scan if the index is missing."""
+    from botocore.exceptions import ClientError
+
+    try:
+        return _read_page(
+            "query",
+            dict(match, IndexName=NEIGHBORHOOD_INDEX, KeyConditionExpression="#nb = :nb"),
+            limit,
+            start_key,
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("ValidationException", "ResourceNotFoundException"):
+            raise
+        print(f"db scan_page: index {NEIGHBORHOOD_INDEX!r} unavailable ({e}); falling back to scan")
+        start_key = {"key": start_key["key"]} if start_key else None
+        return _read_page("scan", dict(match, FilterExpression="#nb = :nb"), limit, start_key)
+
+
+BATCH_GET_CHUNK = 100  # BatchGetItem hard limit per request
+BATCH_GET_MAX_ATTEMPTS = 6
+
+
+def batch_get_cafes(keys: list[str]) -> list[dict]:
+    """
+    Fetch many cafes by key with BatchGetItem (chunks of 100), in the order requested.
+    UnprocessedKeys are retried with exponential backoff; keys that don't exist are skipped.
+    Returns Cafe API-shape dicts (codec.cafe_from_attrs).
+    """
+    store = _local()
+    if store is not None:
+        return store.batch_get_cafes(keys)
+    wanted = list(dict.fromkeys(k for k in keys if k))
+    found: dict[str, dict] = {}
+    for start in range(0, len(wanted), BATCH_GET_CHUNK):
+        pending = {TABLE_NAME: {"Keys": [{"key": {"S": k}} for k in wanted[start : start + BATCH_GET_CHUNK]]}}
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            resp = _ddb().batch_get_item(RequestItems=pending)
+            for it in resp.get("Responses", {}).get(TABLE_NAME, []):
+                found[it["key"]["S"]] = it
+            pending = resp.get("UnprocessedKeys") or {}
+            if not pending:
+                break
+            time.sleep(min(0.05 * 2**attempt, 1.0))
+        else:
+            left = len(pending.get(TABLE_NAME, {}).get("Keys", []))
+            raise RuntimeError(f"BatchGetItem left {left} keys unprocessed after retries")
+    return [codec.cafe_from_attrs(found[k]) for k in wanted if k in found and codec.is_cafe_attrs(found[k])]
+
+
+VERSION_ATTR = "version"
+
+
+class CafeNotFound(Exception):
+    """Conditional write targeted a key that does not exist."""
+
+
+class VersionConflict(Exception):
+    """Conditional write carried an expected version that no longer matches the stored item."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Version conflict (current version {current_version})")
+        self.current_version = current_version
+
+
+def item_version(item: dict | None) -> int:
+    """Optimistic-concurrency version of a stored item; rows written before versioning count as 0."""
+    try:
+        return int((item or {}).get(VERSION_ATTR) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def update_item(
+    cafe_id: str,
+    updates: dict,
+    *,
+    must_exist: bool = False,
+    expected_version: int | None = None,
+) -> dict | None:
+    """
+    Update attributes for one cafe in a single UpdateItem. updates is a flat dict of attr -> value.
     Returns the updated item (ALL_NEW) or None on error.
+
+    must_exist adds attribute_exists(key) so a missing cafe raises CafeNotFound instead of being
+    created. Every conditional update bumps the version attribute; expected_version makes the write
+    fail with VersionConflict unless the stored version still matches.
     """
-    if not updates:
+    if not updates and not must_exist:
         return get_item(cafe_id)
+    updated = _update_one(cafe_id, updates, must_exist=must_exist, expected_version=expected_version)
+    if updated is not None:
+        _catalog_changed()
+    return updated
+
+
+def update_items(updates: list[tuple[str, dict, int | None]], max_workers: int | None = None) -> dict[str, str]:
+    """
+    Bulk partial updates: (cafe_id, attrs, expected_version) each applied as its own conditional
+    UpdateItem (must exist, plus the version check when expected_version is not None) on a bounded
+    pool, with one catalog-version bump for the whole batch instead of one per row.
+    Returns {cafe_id: "updated" | "missing" | "conflict" | "error"}.
+    """
+
+    def apply(entry: tuple[str, dict, int | None]) -> str:
+        cafe_id, attrs, expected = entry
+        try:
+            updated = _update_one(cafe_id, attrs, must_exist=True, expected_version=expected)
+        except CafeNotFound:
+            return "missing"
+        except VersionConflict:
+            return "conflict"
+        return "updated" if updated is not None else "error"
+
+    if not updates:
+        return {}
+    workers = min(len(updates), max_workers or WRITE_MAX_WORKERS)
+    if workers == 1 or _local() is not None:
+        outcomes = [apply(entry) for entry in updates]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(apply, updates))
+    results = {entry[0]: outcome for entry, outcome in zip(updates, outcomes)}
+    if "updated" in outcomes:
+        _catalog_changed()
+    return results
+
+
+def _update_one(cafe_id: str, updates: dict, *, must_exist: bool, expected_version: int | None) -> dict | None:
+    """update_item without the catalog-version bump (callers bump once per logical write)."""
+    store = _local()
+    if store is not None:
+        return store.update_item(cafe_id, updates, must_exist=must_exist, expected_version=expected_version)
     expr_parts = []
     names = {}
     values = {}
+    remove_parts = []
     for i, (k, v) in enumerate(updates.items()):
         alias = f"#a{i}"
-        val_alias = f":v{i}"
         names[alias] = k
+        if k in codec.INDEX_KEY_ATTRS and v == "":
+            # Empty GSI key is rejected by DynamoDB; remove it instead (item drops out of the index).
+            remove_parts.append(alias)
+            continue
+        val_alias = f":v{i}"
         values[val_alias] = _serialize(v) if isinstance(v, (int, float)) else v
-        expr_parts.append(f"set {alias} = {val_alias}")
+        expr_parts.append(f"{alias} = {val_alias}")
+    conditions = []
+    if must_exist or expected_version is not None:
+        names["#k"] = "key"
+        names["#ver"] = VERSION_ATTR
+        values[":zero"] = 0
+        values[":one"] = 1
+        expr_parts.append("#ver = if_not_exists(#ver, :zero) + :one")
+        conditions.append("attribute_exists(#k)")
+        if expected_version is not None:
+            values[":expected"] = int(expected_version)
+            if expected_version == 0:
+                conditions.append("(attribute_not_exists(#ver) OR #ver = :expected)")
+            else:
+                conditions.append("#ver = :expected")
+    expression = ""
+    if expr_parts:
+        expression = "SET " + ", ".join(expr_parts)
+    if remove_parts:
+        expression = (expression + " REMOVE " + ", ".join(remove_parts)).strip()
+    kwargs: dict = {
+        "Key": {"key": cafe_id},
+        "UpdateExpression": expression,
+        "ExpressionAttributeNames": names,
+        "ReturnValues": "ALL_NEW",
+    }
+    if values:
+        kwargs["ExpressionAttributeValues"] = values
+    if conditions:
+        kwargs["ConditionExpression"] = " AND ".join(conditions)
+        kwargs["ReturnValuesOnConditionCheckFailure"] = "ALL_OLD"
     try:
-        resp = table.update_item(
-            Key={"key": cafe_id},
-            UpdateExpression=" ".join(expr_parts),
-            ExpressionAttributeNames=names,
-            ExpressionAttributeValues=values,
-            ReturnValues="ALL_NEW",
-        )
+        resp = _table().meta.client.update_item(TableName=TABLE_NAME, **kwargs)
         attrs = resp.get("Attributes")
         return _deserialize(attrs) if attrs else None
+    except _table().meta.client.exceptions.ConditionalCheckFailedException as e:
+        old = e.response.get("Item")  # raw AttributeValues: error bodies skip resource transforms
+        if not old:
+            raise CafeNotFound(cafe_id) from e
+        raise VersionConflict(item_version(codec.decode_item(old))) from e
     except Exception as e:
         print(f"db update_item error: {e}")
         return None
@@ -131,9 +533,17 @@ def update_item(cafe_id: str, updates: dict) -> dict | None:
 
 def delete_item(cafe_id: str) -> dict | None:
     """Delete one cafe. Returns the deleted item (ALL_OLD) or None."""
+    store = _local()
+    if store is not None:
+        item = store.delete_item(cafe_id)
+        if item:
+            _catalog_changed()
+        return item
     try:
-        resp = table.delete_item(Key={"key": cafe_id}, ReturnValues="ALL_OLD")
+        resp = _table().delete_item(Key={"key": cafe_id}, ReturnValues="ALL_OLD")
         item = resp.get("Attributes")
+        if item:
+            _catalog_changed()
         return _deserialize(item) if item else None
     except Exception as e:
         print(f"db delete_item error: {e}")
@@ -148,6 +558,13 @@ def is_watchlist_item(item: dict | None) -> bool:
     return kind in ("watchlist", "wish") or key.startswith("watchlist:") or key.startswith("wish:")
 
 
+def is_cafe_item(item: dict | None) -> bool:
+    """True for real cafe rows: not watchlist entries and not bookkeeping rows (meta:*)."""
+    if not item or is_watchlist_item(item):
+        return False
+    return not str(item.get("key") or "").startswith("meta:")
+
+
 def watchlist_to_api(item: dict) -> dict:
     lat = item.get("latitude")
     lng = item.get("longitude")
@@ -165,25 +582,65 @@ def watchlist_to_api(item: dict) -> dict:
     }
 
 
-def scan_watchlist_records() -> list[dict]:
-    items = []
-    resp = table.scan()
-    items.extend(resp.get("Items", []))
-    while resp.get("LastEvaluatedKey"):
-        resp = table.scan(ExclusiveStartKey=resp["LastEvaluatedKey"])
-        items.extend(resp.get("Items", []))
-    out = [_deserialize(it) for it in items]
+def scan_watchlist_records(segments: int | None = None) -> list[dict]:
+    """All watchlist entries; reads only the watchlist table, never cafe rows."""
+    store = _local()
+    if store is not None:
+        return store.scan_watchlist_records()
+    out = [_deserialize(it) for it in _parallel_scan(WATCHLIST_TABLE_NAME, segments)]
     return [it for it in out if is_watchlist_item(it)]
 
 
 def put_watchlist_item(item: dict) -> dict:
-    table.put_item(Item=_serialize(item))
+    store = _local()
+    if store is not None:
+        return watchlist_to_api(store.put_watchlist_item(item))
+    _table(WATCHLIST_TABLE_NAME).put_item(Item=_serialize(item))
     return watchlist_to_api(_deserialize(item))
 
 
+def update_watchlist_item(item_id: str, attrs: dict) -> dict | None:
+    """
+    SET attrs on an existing watchlist entry (resolved photo / coordinates). Conditioned on the
+    entry still existing, so a background refresh never resurrects a deleted item. Returns the
+    updated entry, or None if it is gone or the write failed.
+    """
+    if not attrs:
+        return None
+    store = _local()
+    if store is not None:
+        return store.update_watchlist_item(item_id, attrs)
+    names = {"#k": "key"}
+    values = {}
+    sets = []
+    for i, (k, v) in enumerate(attrs.items()):
+        names[f"#a{i}"] = k
+        values[f":v{i}"] = _serialize(v)
+        sets.append(f"#a{i} = :v{i}")
+    try:
+        resp = _table(WATCHLIST_TABLE_NAME).update_item(
+            Key={"key": item_id},
+            UpdateExpression="SET " + ", ".join(sets),
+            ConditionExpression="attribute_exists(#k)",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues="ALL_NEW",
+        )
+        return _deserialize(resp.get("Attributes") or {}) or None
+    except _table(WATCHLIST_TABLE_NAME).meta.client.exceptions.ConditionalCheckFailedException:
+        return None
+    except Exception as e:
+        print(f"db update_watchlist_item error: {e}")
+        return None
+
+
 def delete_watchlist_item(item_id: str) -> dict | None:
+    store = _local()
+    if store is not None:
+        old = store.delete_watchlist_item(item_id)
+        return watchlist_to_api(old) if is_watchlist_item(old) else None
     try:
-        resp = table.delete_item(Key={"key": item_id}, ReturnValues="ALL_OLD")
+        resp = _table(WATCHLIST_TABLE_NAME).delete_item(Key={"key": item_id}, ReturnValues="ALL_OLD")
         item = resp.get("Attributes")
         if not item:
             return None
@@ -222,6 +679,34 @@ def item_to_cafe_dict(item: dict) -> dict:
     }
 
 
+# Cafe API field (snake_case) -> DynamoDB attribute (cafes.json shape); see cafe_to_item.
+_CAFE_FIELD_TO_ATTR = {
+    "name": "name",
+    "image_url": "imageUrl",
+    "latitude": "latitude",
+    "longitude": "longitude",
+    "neighborhood": "neighborhood",
+    "subway_station": "subwayStation",
+    "subway_distance_m": "subwayDistanceM",
+    "subway_routes": "subwayRoutes",
+    "elo_rating": "eloRating",
+    "elo_star_rating": "eloStarRating",
+    "notes": "notes",
+    "google_maps_link": "google_maps_link",
+    "google_maps_place_type": "google_maps_place_type",
+    "closest_citibike_station_name": "closest_citibike_station_name",
+    "closest_citibike_station_distance_m": "closest_citibike_station_distance_m",
+    "closest_citibike_station_walk_minutes": "closest_citibike_station_walk_minutes",
+    "share_card_png_url": "shareCardPngUrl",
+    "created_at": "createdAt",
+}
+
+
+def cafe_patch_to_updates(fields: dict) -> dict:
+    """Partial Cafe fields (only those the client sent) -> update_item attrs. Key is never updated."""
+    return {_CAFE_FIELD_TO_ATTR[k]: v for k, v in fields.items() if k in _CAFE_FIELD_TO_ATTR}
+
+
 def cafe_to_item(cafe_dict: dict) -> dict:
     """Convert Cafe.model_dump() (snake_case) to DynamoDB item (cafes.json shape)."""
     key = cafe_dict.get("s3_key") or cafe_dict.get("key", "")
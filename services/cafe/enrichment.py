@@ -1,6 +1,24 @@
+"""
+Location enrichment for POST /v1/cafes/from-upload: neighborhood, closest subway, Google Maps
+link and closest Citi Bike station for one point.
+
+The four sources are independent, so they run concurrently and from_upload waits for the slowest
+one rather than the sum. Each source has its own timeout (ENRICH_TIMEOUT_<SOURCE>_S) and the whole
+call is capped by ENRICH_DEADLINE_S; a source that misses its deadline leaves its fields at the
+defaults and is listed in LocationEnrichment.timed_out (its thread finishes in the background and
+the result is dropped).
+
+Each call gets its own short-lived executor with one thread per source rather than a shared pool:
+an abandoned Nominatim / Places call keeps its thread until the client library's own timeout, and
+on a shared pool a few of those would leave later uploads queued (and timing out) behind them.
+Starting four threads costs well under a millisecond next to the network calls they make.
+"""
 from __future__ import annotations
 
 import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 
 from citibike_stations import get_closest_citibike_station
@@ -8,6 +26,14 @@ from geocoding import build_google_maps_link_nearby, get_closest_subway_station,
 
 logger = logging.getLogger(__name__)
 
+SOURCES = ("neighborhood", "subway", "google_maps", "citibike")
+_DEFAULT_TIMEOUTS_S = {"neighborhood": 4.0, "subway": 1.0, "google_maps": 3.0, "citibike": 1.0}
+TIMEOUTS_S = {
+    name: float(os.environ.get(f"ENRICH_TIMEOUT_{name.upper()}_S", str(default)))
+    for name, default in _DEFAULT_TIMEOUTS_S.items()
+}
+DEADLINE_S = float(os.environ.get("ENRICH_DEADLINE_S", "5"))
+
 
 @dataclass(frozen=True)
 class LocationEnrichment:
@@ -20,57 +46,113 @@ class LocationEnrichment:
     citibike_name: str = ""
     citibike_distance_m: float = 0.0
     citibike_walk_mins: int = 0
+    # Sources that missed their deadline / raised; their fields above are left at the defaults.
+    timed_out: tuple[str, ...] = ()
+    failed: tuple[str, ...] = ()
 
 
-def location_enrichment(lat: float, lon: float, safe_cafe_name: str) -> LocationEnrichment:
-    neighborhood = ""
-    subway_station = ""
-    subway_distance_m = 0.0
-    subway_routes: list[str] = []
-    google_maps_link = ""
-    google_maps_place_type = ""
-    citibike_name = ""
-    citibike_distance_m = 0.0
-    citibike_walk_mins = 0
+def _neighborhood(lat: float, lon: float, safe_cafe_name: str) -> dict:
+    n = get_neighborhood(lat, lon)
+    return {"neighborhood": n} if n else {}
+
+
+def _subway(lat: float, lon: float, safe_cafe_name: str) -> dict:
+    sub = get_closest_subway_station(lat, lon)
+    if not sub:
+        return {}
+    out: dict = {"subway_station": sub.get("station", "")}
+    lines = sub.get("lines", [])
+    if lines:
+        out["subway_routes"] = tuple(str(x) for x in lines)
+    dm = sub.get("distance_m")
+    if dm is not None:
+        out["subway_distance_m"] = float(dm)
+    return out
+
+
+def _google_maps(lat: float, lon: float, safe_cafe_name: str) -> dict:
+    link, ptype = build_google_maps_link_nearby(safe_cafe_name, lat, lon)
+    out = {}
+    if link:
+        out["google_maps_link"] = link
+    if ptype:
+        out["google_maps_place_type"] = ptype
+    return out
 
-    try:
-        n = get_neighborhood(lat, lon)
-        if n:
-            neighborhood = n
-        sub = get_closest_subway_station(lat, lon)
-        if sub:
-            subway_station = sub.get("station", "")
-            lines = sub.get("lines", [])
-            if lines:
-                subway_routes = [str(x) for x in lines]
-            dm = sub.get("distance_m")
-            if dm is not None:
-                subway_distance_m = float(dm)
-        link, ptype = build_google_maps_link_nearby(safe_cafe_name, lat, lon)
-        if link:
-            google_maps_link = link
-        if ptype:
-            google_maps_place_type = ptype
-    except Exception as e:
-        logger.warning("Geocoding enrichment failed: %s", e)
 
+def _citibike(lat: float, lon: float, safe_cafe_name: str) -> dict:
+    station = get_closest_citibike_station(lat, lon)
+    if not station:
+        return {}
+    return {
+        "citibike_name": station.get("name", ""),
+        "citibike_distance_m": float(station.get("distance_m", 0)),
+        "citibike_walk_mins": int(station.get("mins_walk", 0)),
+    }
+
+
+_FETCHERS = {
+    "neighborhood": _neighborhood,
+    "subway": _subway,
+    "google_maps": _google_maps,
+    "citibike": _citibike,
+}
+
+
+def location_enrichment(
+    lat: float,
+    lon: float,
+    safe_cafe_name: str,
+    deadline_s: float | None = None,
+) -> LocationEnrichment:
+    start = time.monotonic()
+    budget = DEADLINE_S if deadline_s is None else deadline_s
+    deadlines = {name: start + min(TIMEOUTS_S[name], budget) for name in SOURCES}
+    pool = ThreadPoolExecutor(max_workers=len(SOURCES), thread_name_prefix="enrich")
     try:
-        station = get_closest_citibike_station(lat, lon)
-        if station:
-            citibike_name = station.get("name", "")
-            citibike_distance_m = float(station.get("distance_m", 0))
-            citibike_walk_mins = int(station.get("mins_walk", 0))
-    except Exception as e:
-        logger.warning("Citibike enrichment failed: %s", e)
-
-    return LocationEnrichment(
-        neighborhood=neighborhood,
-        subway_station=subway_station,
-        subway_distance_m=subway_distance_m,
-        subway_routes=tuple(subway_routes),
-        google_maps_link=google_maps_link,
-        google_maps_place_type=google_maps_place_type,
-        citibike_name=citibike_name,
-        citibike_distance_m=citibike_distance_m,
-        citibike_walk_mins=citibike_walk_mins,
-    )
+        fields, timed_out, failed = _collect(
+            {pool.submit(_FETCHERS[name], lat, lon, safe_cafe_name): name for name in SOURCES},
+            deadlines,
+        )
+    finally:
+        # Don't wait for abandoned sources; their threads exit when their calls return.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if timed_out:
+        logger.warning(
+            "location enrichment timed out sources=%s after %.2fs (%s, %s)",
+            ",".join(timed_out),
+            time.monotonic() - start,
+            lat,
+            lon,
+        )
+    return LocationEnrichment(**fields, timed_out=tuple(timed_out), failed=tuple(failed))
+
+
+def _collect(futures: dict, deadlines: dict) -> tuple[dict, list[str], list[str]]:
+    """Merge source results as they finish; (fields, timed_out, failed)."""
+    fields: dict = {}
+    timed_out: list[str] = []
+    failed: list[str] = []
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        for fut in [f for f in pending if deadlines[futures[f]] <= now and not f.done()]:
+            pending.discard(fut)
+            fut.cancel()
+            timed_out.append(futures[fut])
+        if not pending:
+            break
+        done, pending = wait(
+            pending,
+            timeout=max(0.0, min(deadlines[futures[f]] for f in pending) - now),
+            return_when=FIRST_COMPLETED,
+        )
+        for fut in done:
+            name = futures[fut]
+            try:
+                fields.update(fut.result())
+            except Exception as e:
+                logger.warning("%s enrichment failed: %s", name, e)
+                failed.append(name)
+    return fields, timed_out, failed
@@ -0,0 +1,200 @@
+"""
+Reverse-geocode cache for geocoding.get_neighborhood, keyed by geohash cell.
+
+Cafes cluster tightly, so most uploads land in a cell that was already resolved. Precision 7
+(GEOCODE_CACHE_PRECISION) is a ~150 m x 150 m cell, well below neighborhood size. Lookups go
+in-process dict -> persistent store -> Nominatim; results are written back to both layers.
+
+Persistent store:
+- GEOCODE_CACHE_TABLE_NAME set: DynamoDB table (hash key "geohash", TTL attribute "expiresAt";
+  terraform/dynamodb.tf), shared by every Lambda container.
+- otherwise: SQLite file at GEOCODE_CACHE_PATH (default: geocode_cache.sqlite3 in the temp dir) for
+  local dev and docker compose.
+- GEOCODE_CACHE=off disables caching.
+
+Positive answers live GEOCODE_CACHE_TTL_SECONDS (30 days); "no neighborhood here" answers are
+negative-cached for GEOCODE_CACHE_NEGATIVE_TTL_SECONDS (1 day). Timeouts and service errors are
+never cached, so a flaky Nominatim does not poison a cell.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import aws_clients
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("GEOCODE_CACHE", "on").strip().lower() not in ("0", "off", "false", "no")
+PRECISION = int(os.environ.get("GEOCODE_CACHE_PRECISION", "7"))
+TTL_SECONDS = int(os.environ.get("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+NEGATIVE_TTL_SECONDS = int(os.environ.get("GEOCODE_CACHE_NEGATIVE_TTL_SECONDS", str(24 * 3600)))
+TABLE_NAME = os.environ.get("GEOCODE_CACHE_TABLE_NAME", "").strip()
+SQLITE_PATH = os.environ.get("GEOCODE_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "geocode_cache.sqlite3")
+_MEMORY_MAX_ENTRIES = 4096
+
+# Returned by lookup() when nothing usable is cached (a cached "" means "known: no neighborhood").
+MISS = object()
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lon: float, precision: int = PRECISION) -> str:
+    """Standard base32 geohash of (lat, lon)."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    out = []
+    bits = 0
+    ch = 0
+    even = True
+    while len(out) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                ch = (ch << 1) | 1
+                lon_lo = mid
+            else:
+                ch <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits = 0
+            ch = 0
+    return "".join(out)
+
+
+class _SqliteBackend:
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_cache"
+            " (geohash TEXT PRIMARY KEY, neighborhood TEXT NOT NULL, expires_at INTEGER NOT NULL)"
+        )
+
+    def get(self, cell: str) -> tuple[str, int] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT neighborhood, expires_at FROM geocode_cache WHERE geohash = ?", (cell,)
+            ).fetchone()
+        return (row[0], int(row[1])) if row else None
+
+    def put(self, cell: str, neighborhood: str, expires_at: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode_cache (geohash, neighborhood, expires_at) VALUES (?, ?, ?)",
+                (cell, neighborhood, expires_at),
+            )
+
+
+class _DynamoBackend:
+    """expiresAt is the table's TTL attribute; expired rows may linger until DynamoDB sweeps them."""
+
+    def __init__(self, table_name: str) -> None:
+        self.table_name = table_name
+        self._client = aws_clients.client("dynamodb")
+
+    def get(self, cell: str) -> tuple[str, int] | None:
+        resp = self._client.get_item(TableName=self.table_name, Key={"geohash": {"S": cell}})
+        item = resp.get("Item")
+        if not item:
+            return None
+        return item.get("neighborhood", {}).get("S", ""), int(item["expiresAt"]["N"])
+
+    def put(self, cell: str, neighborhood: str, expires_at: int) -> None:
+        self._client.put_item(
+            TableName=self.table_name,
+            Item={
+                "geohash": {"S": cell},
+                "neighborhood": {"S": neighborhood},
+                "expiresAt": {"N": str(expires_at)},
+            },
+        )
+
+
+_lock = threading.Lock()
+_memory: dict[str, tuple[str, int]] = {}
+_backend = None
+_stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+
+def _count(name: str) -> None:
+    # lookup/store run concurrently on the enrichment pool; += on a shared dict is not atomic.
+    with _lock:
+        _stats[name] += 1
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = _DynamoBackend(TABLE_NAME) if TABLE_NAME else _SqliteBackend(SQLITE_PATH)
+    return _backend
+
+
+def _remember(cell: str, neighborhood: str, expires_at: int) -> None:
+    with _lock:
+        if len(_memory) >= _MEMORY_MAX_ENTRIES:
+            _memory.pop(next(iter(_memory)))
+        _memory[cell] = (neighborhood, expires_at)
+
+
+def lookup(lat: float, lon: float):
+    """Cached neighborhood for the cell containing (lat, lon): a str ("" = known none) or MISS."""
+    if not ENABLED:
+        return MISS
+    cell = geohash(lat, lon)
+    now = int(time.time())
+    entry = _memory.get(cell)
+    if entry is None or entry[1] <= now:
+        try:
+            entry = _get_backend().get(cell)
+        except Exception as e:
+            _count("errors")
+            logger.warning("geocode cache read failed for %s: %s", cell, e)
+            entry = None
+        if entry is not None:
+            _remember(cell, *entry)
+    if entry is None or entry[1] <= now:
+        _count("misses")
+        return MISS
+    _count("hits")
+    return entry[0]
+
+
+def store(lat: float, lon: float, neighborhood: str | None) -> None:
+    """Record a definitive reverse-geocode answer (None/"" is cached as a negative result)."""
+    if not ENABLED:
+        return
+    cell = geohash(lat, lon)
+    value = neighborhood or ""
+    expires_at = int(time.time()) + (TTL_SECONDS if value else NEGATIVE_TTL_SECONDS)
+    _remember(cell, value, expires_at)
+    try:
+        _get_backend().put(cell, value, expires_at)
+        _count("stores")
+    except Exception as e:
+        _count("errors")
+        logger.warning("geocode cache write failed for %s: %s", cell, e)
+
+
+def stats() -> dict:
+    with _lock:
+        counters = dict(_stats)
+        entries = len(_memory)
+    return {**counters, "memory_entries": entries, "precision": PRECISION, "enabled": ENABLED}
@@ -1,22 +1,22 @@
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import json
-import googlemaps
 import logging
 import os
 import math
 
+import geocode_cache
+import neighborhoods
+import places_cache
+from grid_index import EARTH_RADIUS_M, GridIndex
+
 logger = logging.getLogger(__name__)
 
 
-gmaps_api_key = os.environ.get('GOOGLE_PLACES_API_KEY')
 # Geopy rejects the library default user_agent; NOMINATIM_API_KEY is optional.
 _nominatim_user_agent = (os.environ.get("NOMINATIM_API_KEY") or "").strip() or "cafehop"
 geolocator = Nominatim(user_agent=_nominatim_user_agent)
 
-# Earth radius in meters
-EARTH_RADIUS_M = 6371000
-
 # Cache for GTFS data: dict = loaded, _GTFS_MISSING = file absent (do not re-log / re-stat every request)
 _GTFS_MISSING = object()
 _gtfs_cache: dict | None | object = None
@@ -28,27 +28,48 @@ except ImportError:
     HAS_NUMPY = False
 
 def get_neighborhood(lat, lon):
-    """Get neighborhood name from coordinates"""
+    """
+    Get neighborhood name from coordinates: offline polygon lookup (neighborhoods.py) first, then
+    the geohash-cell cache in front of Nominatim for points outside the bundled polygons.
+    """
     if not lat or not lon:
         return None
+    offline = neighborhoods.lookup(lat, lon)
+    if offline:
+        return offline
+    cached = geocode_cache.lookup(lat, lon)
+    if cached is not geocode_cache.MISS:
+        return cached or None
+    neighborhood, definitive = _reverse_geocode_neighborhood(lat, lon)
+    if definitive:
+        geocode_cache.store(lat, lon, neighborhood)
+    return neighborhood
+
+
+def _reverse_geocode_neighborhood(lat, lon):
+    """
+    Nominatim reverse lookup. Returns (neighborhood or None, definitive); definitive is False on
+    timeouts/errors so the caller does not cache them.
+    """
     try:
         location = geolocator.reverse(f"{lat}, {lon}", exactly_one=True)
-        if location:
-            address = location.raw.get('address', {})
-            # Try to get neighborhood, or fall back to other location names
-            neighborhood = (address.get('neighbourhood') or 
-                          address.get('suburb') or 
-                          address.get('city_district') or
-                          address.get('quarter'))
-            if neighborhood and isinstance(neighborhood, str) and neighborhood.startswith("Manhattan Community Board"):
-                neighborhood = translate_manhattan_community_board(neighborhood)
-            return neighborhood
+        if not location:
+            return None, True
+        address = location.raw.get('address', {})
+        # Try to get neighborhood, or fall back to other location names
+        neighborhood = (address.get('neighbourhood') or 
+                      address.get('suburb') or 
+                      address.get('city_district') or
+                      address.get('quarter'))
+        if neighborhood and isinstance(neighborhood, str) and neighborhood.startswith("Manhattan Community Board"):
+            neighborhood = translate_manhattan_community_board(neighborhood)
+        return neighborhood, True
     except (GeocoderTimedOut, GeocoderServiceError) as e:
         print(f"Geocoding error for {lat}, {lon}: {e}")
-        return None
+        return None, False
     except Exception as e:
         print(f"Unexpected error for {lat}, {lon}: {e}")
-        return None
+        return None, False
 
 def translate_manhattan_community_board(board_str):
     """
@@ -60,25 +81,29 @@ def translate_manhattan_community_board(board_str):
     Returns:
         str or None: Human-readable neighborhood name, or None if not a CB or unknown.
     """
-    cb_to_neighborhood = {
-        'Manhattan Community Board 1': 'Financial District, Tribeca, Battery Park City',
-        'Manhattan Community Board 2': 'Greenwich Village, SoHo, NoHo',
-        'Manhattan Community Board 3': 'Lower East Side, Chinatown, East Village',
-        'Manhattan Community Board 4': 'Chelsea, Hell\'s Kitchen (Clinton)',
-        'Manhattan Community Board 5': 'Midtown, Flatiron, Times Square',
-        'Manhattan Community Board 6': 'Murray Hill, Kips Bay, Gramercy',
-        'Manhattan Community Board 7': 'Upper West Side',
-        'Manhattan Community Board 8': 'Upper East Side, Yorkville',
-        'Manhattan Community Board 9': 'Morningside Heights, Manhattanville',
-        'Manhattan Community Board 10': 'Harlem',
-        'Manhattan Community Board 11': 'East Harlem',
-        'Manhattan Community Board 12': 'Washington Heights, Inwood'
-    }
-    if isinstance(board_str, str) and board_str in cb_to_neighborhood:
-        match = cb_to_neighborhood[board_str].split(",")[0]
-        return match
+    if isinstance(board_str, str):
+        return _MANHATTAN_CB_NEIGHBORHOOD.get(board_str)
     return None
 
+
+# Nominatim only answers with a community board when it has no finer place; the offline polygons
+# (neighborhoods.py) resolve those points first, so this is the fallback path's translation.
+_MANHATTAN_CB_TO_NEIGHBORHOODS = {
+    'Manhattan Community Board 1': 'Financial District, Tribeca, Battery Park City',
+    'Manhattan Community Board 2': 'Greenwich Village, SoHo, NoHo',
+    'Manhattan Community Board 3': 'Lower East Side, Chinatown, East Village',
+    'Manhattan Community Board 4': 'Chelsea, Hell\'s Kitchen (Clinton)',
+    'Manhattan Community Board 5': 'Midtown, Flatiron, Times Square',
+    'Manhattan Community Board 6': 'Murray Hill, Kips Bay, Gramercy',
+    'Manhattan Community Board 7': 'Upper West Side',
+    'Manhattan Community Board 8': 'Upper East Side, Yorkville',
+    'Manhattan Community Board 9': 'Morningside Heights, Manhattanville',
+    'Manhattan Community Board 10': 'Harlem',
+    'Manhattan Community Board 11': 'East Harlem',
+    'Manhattan Community Board 12': 'Washington Heights, Inwood'
+}
+_MANHATTAN_CB_NEIGHBORHOOD = {cb: names.split(",")[0] for cb, names in _MANHATTAN_CB_TO_NEIGHBORHOODS.items()}
+
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calculate the great circle distance between two points on Earth using Haversine formula.
@@ -105,13 +130,39 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return EARTH_RADIUS_M * c
 
 
+def _load_gtfs_artifact(path=None):
+    """
+    Memory-map the binary GTFS artifact (gtfs_artifact.py builds it from data/gtfs_subway).
+    Returns None when numpy or the file is unavailable so the caller can fall back to JSON.
+    """
+    if not HAS_NUMPY:
+        return None
+    if path is None:
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        candidates = [os.path.join(current_dir, 'gtfs_precomputed.npz'),
+                      os.path.join(os.path.dirname(current_dir), 'gtfs_precomputed.npz')]
+        path = next((p for p in candidates if os.path.exists(p)), None)
+        if path is None:
+            return None
+    try:
+        import gtfs_artifact
+        data = gtfs_artifact.to_gtfs_data(gtfs_artifact.load(path))
+    except Exception:
+        logger.exception("Error loading GTFS artifact %s — trying JSON", path)
+        return None
+    logger.info("Loaded GTFS artifact from %s (source %s)", path, data['source_sha256'][:12])
+    return data
+
+
 def _load_gtfs_data(json_path=None):
     """
-    Load GTFS data from precomputed JSON file. Uses cached data if available.
-    
+    Load GTFS data: the memory-mapped gtfs_precomputed.npz artifact when present, otherwise the
+    precomputed JSON file. Uses cached data if available.
+
     Parameters:
-        json_path: Path to gtfs_precomputed.json file. If None, tries to find it relative to this file.
-    
+        json_path: Path to gtfs_precomputed.npz or gtfs_precomputed.json. If None, looks for the
+            artifact and then the JSON relative to this file.
+
     Returns:
         dict: Dictionary containing precomputed GTFS data
     """
@@ -122,6 +173,15 @@ def _load_gtfs_data(json_path=None):
     if isinstance(_gtfs_cache, dict):
         return _gtfs_cache
 
+    if json_path is None or json_path.endswith('.npz'):
+        data = _load_gtfs_artifact(json_path)
+        if data is not None:
+            _gtfs_cache = data
+            return _gtfs_cache
+        if json_path is not None:
+            _gtfs_cache = _GTFS_MISSING
+            return None
+
     # Try to find JSON file
     if json_path is None:
         # Default: gtfs_precomputed.json next to this module (services/cafe/)
@@ -192,6 +252,74 @@ def _load_gtfs_data(json_path=None):
 
 
 
+# Nearest-stop grid cell size (meters, equirectangular projection around the stops' mean latitude).
+SUBWAY_GRID_CELL_M = float(os.environ.get("SUBWAY_GRID_CELL_M", "500"))
+_subway_index = None
+
+
+class _SubwayIndex(GridIndex):
+    """
+    Built once from the GTFS data: every stop's (station name, lines) resolved through its parent
+    station up front, plus the shared grid over stop coordinates (grid_index.GridIndex), so a
+    lookup touches a few dozen stops instead of all of them.
+    """
+
+    # Rings walked before falling back to the vectorized scan (4 x 500 m covers the dense areas).
+    _MAX_RINGS = 4
+
+    def __init__(self, gtfs_data, cell_m=SUBWAY_GRID_CELL_M):
+        coords = _as_list(gtfs_data['station_coords'])
+        stop_names = _as_list(gtfs_data['stop_names'])
+        stop_ids = _as_list(gtfs_data['stop_ids'])
+        parent_stations = _as_list(gtfs_data['parent_stations'])
+        stop_to_routes = gtfs_data['stop_to_routes']
+        route_id_to_name = gtfs_data['route_id_to_name']
+
+        super().__init__([float(c[0]) for c in coords], [float(c[1]) for c in coords], cell_m, self._MAX_RINGS)
+        self.station = self._aggregate(stop_names, stop_ids, parent_stations, stop_to_routes, route_id_to_name)
+        # Stop indexes of the stations themselves (GTFS parents / stops without a parent).
+        self.top_level = [idx for idx, pid in enumerate(parent_stations) if not pid]
+
+    @staticmethod
+    def _aggregate(stop_names, stop_ids, parent_stations, stop_to_routes, route_id_to_name):
+        """Per stop index: (station name, lowercase lines) of its parent station."""
+        first_index = {}
+        for idx, sid in enumerate(stop_ids):
+            first_index.setdefault(sid, idx)
+        members = {}
+        for idx, sid in enumerate(stop_ids):
+            pid = parent_stations[idx] or sid
+            members.setdefault(pid, []).append(sid)
+        by_parent = {}
+        for pid, sids in members.items():
+            route_ids = set()
+            for sid in set(sids) | {pid}:
+                route_ids.update(stop_to_routes.get(sid, ()))
+            lines = sorted(route_id_to_name.get(rid, rid) for rid in route_ids if rid in route_id_to_name)
+            by_parent[pid] = [line.lower() for line in lines if "X" not in line]
+        out = []
+        for idx, sid in enumerate(stop_ids):
+            pid = parent_stations[idx] or sid
+            name = stop_names[first_index[pid]] if pid in first_index else stop_names[idx]
+            out.append((name, by_parent[pid]))
+        return out
+
+
+def _as_list(values):
+    return values.tolist() if HAS_NUMPY and isinstance(values, np.ndarray) else list(values)
+
+
+def _get_subway_index(json_path=None):
+    global _subway_index
+    if _subway_index is None:
+        gtfs_data = _load_gtfs_data(json_path)
+        if gtfs_data is None:
+            return None
+        _subway_index = _SubwayIndex(gtfs_data)
+        logger.info("Built subway stop index: %d stops, %d grid cells", len(_subway_index.lat_rad), len(_subway_index.cells))
+    return _subway_index
+
+
 def get_closest_subway_station(lat, lon, json_path=None):
     """
     Find the closest NYC subway station to given coordinates using precomputed GTFS data.
@@ -210,123 +338,65 @@ def get_closest_subway_station(lat, lon, json_path=None):
     """
     if not lat or not lon:
         return None
-    
-    gtfs_data = _load_gtfs_data(json_path)
-    if gtfs_data is None:
+
+    index = _get_subway_index(json_path)
+    if index is None:
         return None
-    
-    # Extract data from pickle
-    station_coords = gtfs_data['station_coords']  # numpy array in radians
-    stop_names = gtfs_data['stop_names']  # numpy array or list
-    stop_ids = gtfs_data['stop_ids']  # numpy array or list
-    stop_to_routes = gtfs_data['stop_to_routes']  # dict
-    route_id_to_name = gtfs_data['route_id_to_name']  # dict
-    parent_stations = gtfs_data['parent_stations']  # numpy array or list
-    
-    # Convert to lists if numpy arrays (for compatibility)
-    if HAS_NUMPY and isinstance(stop_names, np.ndarray):
-        stop_names = stop_names.tolist()
-    if HAS_NUMPY and isinstance(stop_ids, np.ndarray):
-        stop_ids = stop_ids.tolist()
-    if HAS_NUMPY and isinstance(parent_stations, np.ndarray):
-        parent_stations = parent_stations.tolist()
-    
-    # Use numpy for efficient distance calculation if available
-    if HAS_NUMPY and isinstance(station_coords, np.ndarray):
-        # Convert input to radians
-        lat_rad = math.radians(lat)
-        lon_rad = math.radians(lon)
-        
-        # Calculate distances using numpy (vectorized)
-        dlat = station_coords[:, 0] - lat_rad
-        dlon = station_coords[:, 1] - lon_rad
-        a = np.sin(dlat / 2)**2 + np.cos(lat_rad) * np.cos(station_coords[:, 0]) * np.sin(dlon / 2)**2
-        distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
-        
-        # Find closest stop
-        closest_idx = np.argmin(distances)
-        distance_m = float(distances[closest_idx])
-    else:
-        # Fallback to Python loop if numpy not available
-        min_distance = float('inf')
-        closest_idx = None
-        
-        # Convert station_coords from radians to degrees for haversine_distance
-        # (station_coords are stored in radians, but haversine_distance expects degrees)
-        lat_rad = math.radians(lat)
-        lon_rad = math.radians(lon)
-        
-        for idx, coord in enumerate(station_coords):
-            stop_lat_rad = coord[0]  # already in radians
-            stop_lon_rad = coord[1]  # already in radians
-            
-            # Calculate haversine distance directly in radians
-            dlat = stop_lat_rad - lat_rad
-            dlon = stop_lon_rad - lon_rad
-            a = math.sin(dlat / 2)**2 + math.cos(lat_rad) * math.cos(stop_lat_rad) * math.sin(dlon / 2)**2
-            distance = 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
-            
-            if distance < min_distance:
-                min_distance = distance
-                closest_idx = idx
-        
-        if closest_idx is None:
-            return None
-        
-        distance_m = min_distance
-    
-    # Get stop info
-    closest_stop_id = stop_ids[closest_idx]
-    parent_id = parent_stations[closest_idx] if parent_stations[closest_idx] else closest_stop_id
-    
-    # Get all stops for this parent station
-    station_stop_ids = []
-    for idx, sid in enumerate(stop_ids):
-        pid = parent_stations[idx] if parent_stations[idx] else sid
-        if pid == parent_id:
-            station_stop_ids.append(sid)
-    
-    if parent_id not in station_stop_ids:
-        station_stop_ids.append(parent_id)
-    
-    # Aggregate all routes for this station
-    all_route_ids = set()
-    for sid in station_stop_ids:
-        if sid in stop_to_routes:
-            routes = stop_to_routes[sid]
-            if isinstance(routes, set):
-                all_route_ids.update(routes)
-            else:
-                all_route_ids.update(routes)
-    
-    # Convert route_ids to route names
-    lines = sorted([route_id_to_name.get(rid, rid) for rid in all_route_ids if rid in route_id_to_name])
-    
-    # Get station name (use parent station name if available)
-    if parent_id in stop_ids:
-        parent_idx = stop_ids.index(parent_id)
-        station_name = stop_names[parent_idx]
-    else:
-        station_name = stop_names[closest_idx]
-    
-    line_list = [line.lower() for line in lines if "X" not in line]
+    found = index.nearest(lat, lon)
+    if found is None:
+        return None
+    closest_idx, distance_m = found
+    station_name, line_list = index.station[closest_idx]
     return {
         "station": station_name,
         "distance_m": round(distance_m, 1),
-        "lines": line_list,
+        "lines": list(line_list),
     }
 
 
+def get_subway_stations(json_path=None):
+    """
+    All subway stations (one row per GTFS parent station) with their aggregated lines:
+    [{'station': str, 'lines': list, 'lat': float, 'lon': float}], or [] if GTFS data is unavailable.
+    """
+    index = _get_subway_index(json_path)
+    if index is None:
+        return []
+    return [
+        {
+            "station": index.station[idx][0],
+            "lines": list(index.station[idx][1]),
+            "lat": math.degrees(index.lat_rad[idx]),
+            "lon": math.degrees(index.lon_rad[idx]),
+        }
+        for idx in index.top_level
+    ]
+
+
+def get_subway_stops(json_path=None):
+    """
+    Every GTFS stop get_closest_subway_station searches (platforms included), each labeled with its
+    parent station's name and lines, in the same row shape as get_subway_stations.
+    """
+    index = _get_subway_index(json_path)
+    if index is None:
+        return []
+    return [
+        {
+            "station": name,
+            "lines": list(lines),
+            "lat": math.degrees(lat),
+            "lon": math.degrees(lon),
+        }
+        for (name, lines), lat, lon in zip(index.station, index.lat_rad, index.lon_rad)
+    ]
+
+
 def build_google_maps_link_nearby(cafe_name, lat, lon, radius=350):
-    if not gmaps_api_key:
+    if not places_cache.api_key():
         return "", ""
     try:
-        gmaps = googlemaps.Client(key=gmaps_api_key)
-        geocode_result = gmaps.places_nearby(
-            keyword=cafe_name,
-            location=(lat, lon),
-            radius=radius,
-        )
+        geocode_result = places_cache.places_nearby(lat, lon, radius, keyword=cafe_name)
         results = geocode_result.get("results") or []
         relevant_types = ["cafe", "bakery", "food"]
         relevant_results = [
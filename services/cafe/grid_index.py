@@ -0,0 +1,110 @@
+"""
+Uniform-grid nearest-point search shared by geocoding (subway stops) and citibike_stations (docks).
+
+Points are projected onto a plane around their mean latitude and bucketed into square cells of
+cell_m meters. nearest() scans rings of cells outward from the query's cell and stops once no
+unvisited cell can hold a closer point, so a lookup computes distances for a few dozen points
+instead of all of them. The ring walk is pure Python, so it is capped at max_rings rings: when that
+has not settled the answer (a sparse area, or a query outside the covered area) nearest() scans
+every point instead, vectorized with NumPy when it is installed. Distances are haversine meters.
+"""
+from __future__ import annotations
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # scalar fallback scan only
+    np = None
+
+EARTH_RADIUS_M = 6371000
+
+
+class GridIndex:
+    def __init__(self, lat_rad: list[float], lon_rad: list[float], cell_m: float, max_rings: int):
+        # Plain float lists: a lookup touches a handful of points, where numpy call overhead dominates.
+        self.lat_rad = list(lat_rad)
+        self.lon_rad = list(lon_rad)
+        self.cos_lat = [math.cos(x) for x in self.lat_rad]
+        self.cell_m = cell_m
+        self.max_rings = max_rings
+        # NumPy copies for _scan, built here so no request pays for them.
+        self._arrays = (
+            (np.array(self.lat_rad), np.array(self.lon_rad), np.array(self.cos_lat)) if np is not None else None
+        )
+        self.cos0 = math.cos(sum(self.lat_rad) / len(self.lat_rad)) if self.lat_rad else 1.0
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        for idx, (lat, lon) in enumerate(zip(self.lat_rad, self.lon_rad)):
+            self.cells.setdefault(self._cell(lat, lon), []).append(idx)
+        if self.cells:
+            xs = [c[0] for c in self.cells]
+            ys = [c[1] for c in self.cells]
+            self.cell_bounds = (min(xs), max(xs), min(ys), max(ys))
+
+    def __len__(self) -> int:
+        return len(self.lat_rad)
+
+    def _cell(self, lat_rad: float, lon_rad: float) -> tuple[int, int]:
+        x = EARTH_RADIUS_M * lon_rad * self.cos0
+        y = EARTH_RADIUS_M * lat_rad
+        return (math.floor(x / self.cell_m), math.floor(y / self.cell_m))
+
+    def _distance(self, idx: int, lat_rad: float, lon_rad: float, cos_q: float) -> float:
+        a = (
+            math.sin((self.lat_rad[idx] - lat_rad) / 2) ** 2
+            + cos_q * self.cos_lat[idx] * math.sin((self.lon_rad[idx] - lon_rad) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+    @staticmethod
+    def _ring_cells(cx: int, cy: int, ring: int):
+        """Cells on the perimeter of the square `ring` cells out from (cx, cy)."""
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield (x, cy - ring)
+            yield (x, cy + ring)
+        for y in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, y)
+            yield (cx + ring, y)
+
+    def _scan(self, lat_rad: float, lon_rad: float, cos_q: float) -> tuple[int, float]:
+        if self._arrays is not None:
+            lats, lons, coss = self._arrays
+            a = np.sin((lats - lat_rad) / 2) ** 2 + cos_q * coss * np.sin((lons - lon_rad) / 2) ** 2
+            d = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            best = int(np.argmin(d))
+            return best, float(d[best])
+        best_idx, best_d = 0, float("inf")
+        for idx in range(len(self.lat_rad)):
+            d = self._distance(idx, lat_rad, lon_rad, cos_q)
+            if d < best_d:
+                best_idx, best_d = idx, d
+        return best_idx, best_d
+
+    def nearest(self, lat: float, lon: float) -> tuple[int, float] | None:
+        """(point index, haversine meters) of the closest point to (lat, lon) degrees, or None if empty."""
+        if not self.cells:
+            return None
+        lat_rad = math.radians(lat)
+        lon_rad = math.radians(lon)
+        cos_q = math.cos(lat_rad)
+        cx, cy = self._cell(lat_rad, lon_rad)
+        min_x, max_x, min_y, max_y = self.cell_bounds
+        max_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+        limit = min(max_ring, self.max_rings)
+        best_idx, best_d = None, float("inf")
+        for ring in range(limit + 1):
+            # Every point in this ring or beyond is at least (ring - 1) cells away in projected
+            # space; 0.9 absorbs the projection's distortion away from the reference latitude.
+            if best_idx is not None and (ring - 1) * self.cell_m * 0.9 > best_d:
+                return best_idx, best_d
+            for cell in self._ring_cells(cx, cy, ring):
+                for idx in self.cells.get(cell, ()):
+                    d = self._distance(idx, lat_rad, lon_rad, cos_q)
+                    if d < best_d:
+                        best_idx, best_d = idx, d
+        if best_idx is not None and (limit == max_ring or limit * self.cell_m * 0.9 > best_d):
+            return best_idx, best_d
+        return self._scan(lat_rad, lon_rad, cos_q)
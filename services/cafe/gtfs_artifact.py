@@ -0,0 +1,291 @@
+"""
+Build, validate and load the subway GTFS artifact used by geocoding.get_closest_subway_station.
+
+    python gtfs_artifact.py                 # data/gtfs_subway -> gtfs_precomputed.npz (this directory)
+    python gtfs_artifact.py --check         # rebuild in memory and fail if the committed artifact differs
+
+The artifact is an uncompressed .npz written with fixed zip timestamps, so the same GTFS input always
+produces the same bytes (source_sha256 records the inputs). load() memory-maps the file and returns
+numpy views straight into it, so a cold start does no JSON parsing and no list -> ndarray copies.
+
+Arrays (N stops, R routes, format_version FORMAT_VERSION):
+- station_coords   float64 (N, 2)  stop lat/lon in radians
+- stop_ids, stop_names, parent_stations   string tables (N values)   parent "" for top-level stations
+- route_ids, route_names   string tables (R values)   route_names = routes.txt route_short_name
+- stop_route_offsets int32 (N + 1), stop_route_index int16   routes of stop i are
+  route_ids[stop_route_index[stop_route_offsets[i]:stop_route_offsets[i + 1]]]
+
+A string table is a uint8 array of UTF-8 text with every value terminated by _SEP, so reading a
+column is one decode and one split rather than a decode per value.
+
+Stop -> route membership comes from stop_times.txt joined to trips.txt. The repo's GTFS excerpt does
+not ship stop_times.txt (it is ~100 MB), so when it is absent the membership is carried over from
+--stop-routes-json (default: the gtfs_precomputed.json next to this file); stops, names, coordinates
+and routes always come from the .txt files.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import zipfile
+
+import numpy as np
+
+FORMAT_VERSION = 1
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_GTFS_DIR = os.path.join(_HERE, "..", "..", "data", "gtfs_subway")
+DEFAULT_OUTPUT = os.path.join(_HERE, "gtfs_precomputed.npz")
+DEFAULT_STOP_ROUTES_JSON = os.path.join(_HERE, "gtfs_precomputed.json")
+
+# Rough NYC subway + SIR envelope (degrees); catches swapped lat/lon or a wrong feed.
+_LAT_RANGE = (40.4, 41.0)
+_LON_RANGE = (-74.3, -73.6)
+_ARRAYS = (
+    "format_version",
+    "source_sha256",
+    "station_coords",
+    "stop_ids",
+    "stop_names",
+    "parent_stations",
+    "route_ids",
+    "route_names",
+    "stop_route_offsets",
+    "stop_route_index",
+)
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+_SEP = "\x1f"  # ASCII unit separator; never appears in GTFS text fields
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+def _read_csv(path: str) -> list[dict]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def _stop_routes_from_stop_times(gtfs_dir: str) -> dict[str, set[str]]:
+    trip_route = {row["trip_id"]: row["route_id"] for row in _read_csv(os.path.join(gtfs_dir, "trips.txt"))}
+    out: dict[str, set[str]] = {}
+    with open(os.path.join(gtfs_dir, "stop_times.txt"), newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            route_id = trip_route.get(row["trip_id"])
+            if route_id is not None:
+                out.setdefault(row["stop_id"], set()).add(route_id)
+    return out
+
+
+def _stop_routes_from_json(path: str) -> dict[str, set[str]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {sid: set(routes) for sid, routes in data["stop_to_routes"].items()}
+
+
+def _source_digest(paths: list[str]) -> str:
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def _utf8(values: list[str]) -> np.ndarray:
+    if any(_SEP in v for v in values):
+        raise ArtifactError("string value contains the table separator")
+    return np.frombuffer("".join(v + _SEP for v in values).encode("utf-8"), dtype=np.uint8)
+
+
+def _strings(arr: np.ndarray) -> list[str]:
+    return arr.tobytes().decode("utf-8").split(_SEP)[:-1]
+
+
+def build(gtfs_dir: str = DEFAULT_GTFS_DIR, stop_routes_json: str = DEFAULT_STOP_ROUTES_JSON) -> dict[str, np.ndarray]:
+    """Arrays for the artifact from a GTFS directory (stops.txt, routes.txt, trips.txt[, stop_times.txt])."""
+    stops = _read_csv(os.path.join(gtfs_dir, "stops.txt"))
+    routes = _read_csv(os.path.join(gtfs_dir, "routes.txt"))
+    sources = [os.path.join(gtfs_dir, name) for name in ("stops.txt", "routes.txt", "trips.txt")]
+    if os.path.exists(os.path.join(gtfs_dir, "stop_times.txt")):
+        stop_routes = _stop_routes_from_stop_times(gtfs_dir)
+        sources.append(os.path.join(gtfs_dir, "stop_times.txt"))
+    else:
+        stop_routes = _stop_routes_from_json(stop_routes_json)
+        sources.append(stop_routes_json)
+
+    route_ids = [row["route_id"] for row in routes]
+    route_pos = {rid: i for i, rid in enumerate(route_ids)}
+    offsets = [0]
+    index: list[int] = []
+    for row in stops:
+        # Sorted so the artifact does not depend on set iteration order.
+        index.extend(sorted(route_pos[rid] for rid in stop_routes.get(row["stop_id"], ()) if rid in route_pos))
+        offsets.append(len(index))
+
+    return {
+        "format_version": np.array(FORMAT_VERSION, dtype=np.int32),
+        "source_sha256": _utf8([_source_digest(sources)]),
+        "station_coords": np.array(
+            [[math.radians(float(row["stop_lat"])), math.radians(float(row["stop_lon"]))] for row in stops],
+            dtype=np.float64,
+        ).reshape(-1, 2),
+        "stop_ids": _utf8([row["stop_id"] for row in stops]),
+        "stop_names": _utf8([row["stop_name"] for row in stops]),
+        "parent_stations": _utf8([row.get("parent_station") or "" for row in stops]),
+        "route_ids": _utf8(route_ids),
+        "route_names": _utf8([row.get("route_short_name") or row["route_id"] for row in routes]),
+        "stop_route_offsets": np.array(offsets, dtype=np.int32),
+        "stop_route_index": np.array(index, dtype=np.int16),
+    }
+
+
+def validate(arrays: dict) -> None:
+    """Raise ArtifactError if the arrays are not a consistent artifact of FORMAT_VERSION."""
+    missing = [name for name in _ARRAYS if name not in arrays]
+    if missing:
+        raise ArtifactError(f"missing arrays: {', '.join(missing)}")
+    version = int(arrays["format_version"])
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"format_version {version} != {FORMAT_VERSION}")
+    coords = arrays["station_coords"]
+    stop_ids = _strings(arrays["stop_ids"])
+    parents = _strings(arrays["parent_stations"])
+    n = len(stop_ids)
+    if n == 0:
+        raise ArtifactError("no stops")
+    if coords.shape != (n, 2) or len(_strings(arrays["stop_names"])) != n or len(parents) != n:
+        raise ArtifactError("per-stop arrays have different lengths")
+    lat = np.degrees(coords[:, 0])
+    lon = np.degrees(coords[:, 1])
+    if not (np.all((lat >= _LAT_RANGE[0]) & (lat <= _LAT_RANGE[1])) and np.all((lon >= _LON_RANGE[0]) & (lon <= _LON_RANGE[1]))):
+        raise ArtifactError("stop coordinates outside the NYC envelope (swapped lat/lon or wrong feed?)")
+    if len(set(stop_ids)) != n:
+        raise ArtifactError("duplicate stop_id")
+    known = set(stop_ids)
+    orphans = {p for p in parents if p and p not in known}
+    if orphans:
+        raise ArtifactError(f"parent_station not in stops: {sorted(orphans)[:5]}")
+    r = len(_strings(arrays["route_ids"]))
+    if len(_strings(arrays["route_names"])) != r:
+        raise ArtifactError("route_ids / route_names lengths differ")
+    offsets = arrays["stop_route_offsets"]
+    route_index = arrays["stop_route_index"]
+    if len(offsets) != n + 1 or offsets[0] != 0 or offsets[-1] != len(route_index) or np.any(np.diff(offsets) < 0):
+        raise ArtifactError("stop_route_offsets is not a valid CSR offset array")
+    if len(route_index) and (route_index.min() < 0 or route_index.max() >= r):
+        raise ArtifactError("stop_route_index out of range")
+    if len(route_index) == 0:
+        raise ArtifactError("no stop serves any route")
+
+
+def write(arrays: dict, path: str) -> None:
+    """Uncompressed .npz with fixed member order and timestamps (byte-for-byte reproducible)."""
+    tmp = f"{path}.tmp"
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_STORED) as zf:
+        for name in _ARRAYS:
+            buf = io.BytesIO()
+            np.lib.format.write_array(buf, np.asarray(arrays[name]), allow_pickle=False)
+            info = zipfile.ZipInfo(f"{name}.npy", date_time=_ZIP_EPOCH)
+            info.compress_type = zipfile.ZIP_STORED
+            info.external_attr = 0o644 << 16
+            zf.writestr(info, buf.getvalue())
+    os.replace(tmp, path)
+
+
+def load(path: str) -> dict[str, np.ndarray]:
+    """
+    Memory-map an artifact written by write(): each array is a read-only view into the mapping
+    (no copy). The mapping stays alive as long as any returned array does.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    arrays = {}
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ArtifactError(f"{info.filename} is compressed; rebuild with gtfs_artifact.py")
+            # Local file header: 30 fixed bytes, then file name and extra field.
+            name_len, extra_len = struct.unpack_from("<HH", mm, info.header_offset + 26)
+            start = info.header_offset + 30 + name_len + extra_len
+            header = io.BytesIO(mm[start:start + 1024])
+            version = np.lib.format.read_magic(header)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran, dtype = read_header(header)
+            if dtype.hasobject:
+                raise ArtifactError(f"{info.filename} holds Python objects")
+            count = int(np.prod(shape)) if shape else 1
+            arr = np.frombuffer(mm, dtype=dtype, count=count, offset=start + header.tell())
+            arrays[info.filename[: -len(".npy")]] = np.reshape(arr, shape, order="F" if fortran else "C")
+    validate(arrays)
+    return arrays
+
+
+def to_gtfs_data(arrays: dict) -> dict:
+    """
+    The dict shape geocoding._load_gtfs_data has always returned. station_coords stays a view into
+    the mapping; the small string arrays are decoded to lists and stop_to_routes is keyed by stop id.
+    """
+    route_ids = _strings(arrays["route_ids"])
+    stop_ids = _strings(arrays["stop_ids"])
+    offsets = arrays["stop_route_offsets"].tolist()
+    route_index = arrays["stop_route_index"].tolist()
+    stop_to_routes = {
+        sid: set(map(route_ids.__getitem__, route_index[lo:hi]))
+        for sid, lo, hi in zip(stop_ids, offsets, offsets[1:])
+        if hi > lo
+    }
+    return {
+        "station_coords": arrays["station_coords"],
+        "stop_names": _strings(arrays["stop_names"]),
+        "stop_ids": stop_ids,
+        "parent_stations": _strings(arrays["parent_stations"]),
+        "stop_to_routes": stop_to_routes,
+        "route_id_to_name": dict(zip(route_ids, _strings(arrays["route_names"]))),
+        "source_sha256": _strings(arrays["source_sha256"])[0],
+    }
+
+
+def _same(a: dict, b: dict) -> bool:
+    return all(np.array_equal(np.asarray(a[name]), np.asarray(b[name])) for name in _ARRAYS)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--gtfs-dir", default=DEFAULT_GTFS_DIR)
+    parser.add_argument("--stop-routes-json", default=DEFAULT_STOP_ROUTES_JSON,
+                        help="stop_to_routes source when the GTFS dir has no stop_times.txt")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--check", action="store_true", help="verify --output matches a fresh build")
+    args = parser.parse_args(argv)
+
+    arrays = build(args.gtfs_dir, args.stop_routes_json)
+    validate(arrays)
+    n_stops = len(arrays["station_coords"])
+    n_routes = len(_strings(arrays["route_ids"]))
+    if args.check:
+        try:
+            current = load(args.output)
+        except (OSError, ArtifactError, ValueError) as e:
+            print(f"{args.output}: {e}", file=sys.stderr)
+            return 1
+        if not _same(arrays, current):
+            print(f"{args.output} is stale; rebuild with: python gtfs_artifact.py", file=sys.stderr)
+            return 1
+        print(f"{args.output} up to date ({n_stops} stops, {n_routes} routes)")
+        return 0
+    write(arrays, args.output)
+    print(f"wrote {args.output} ({n_stops} stops, {n_routes} routes, {os.path.getsize(args.output)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
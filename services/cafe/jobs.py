@@ -0,0 +1,84 @@
+"""
+Out-of-band work triggered by a request (snapshot rebuilds, watchlist photo refreshes).
+
+FastAPI BackgroundTasks do not help on Lambda: Mangum awaits them before returning the response,
+so the request still pays for the work. dispatch(name, payload) hands the job off instead:
+
+- Lambda: an asynchronous Invoke (InvocationType=Event) of JOBS_FUNCTION_NAME (default: this
+  function). The call returns as soon as Lambda has queued the event; lambda_handler in main.py
+  passes job events to run() instead of Mangum. The role needs lambda:InvokeFunction on itself.
+- uvicorn / scripts: a daemon thread in this process, after `delay_s` seconds.
+
+Handlers are registered by the modules that own the work (register(name, fn)); fn(payload) runs
+after `delay_s` on either path (in the invoked function on Lambda).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+import aws_clients
+
+logger = logging.getLogger(__name__)
+
+# True on Lambda: the container freezes after the response, so nothing may be left running in-process.
+DETACHED = bool(os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+_EVENT_KEY = "cafe_job"
+
+_handlers: dict[str, Callable[[dict], None]] = {}
+
+
+def register(name: str, fn: Callable[[dict], None]) -> None:
+    _handlers[name] = fn
+
+
+def _function_name() -> str:
+    return os.environ.get("JOBS_FUNCTION_NAME", "").strip() or os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "")
+
+
+def _run(name: str, payload: dict, delay_s: float) -> None:
+    if delay_s > 0:
+        time.sleep(delay_s)
+    try:
+        _handlers[name](payload)
+    except Exception:
+        logger.exception("job %s failed", name)
+
+
+def dispatch(name: str, payload: dict | None = None, delay_s: float = 0) -> bool:
+    """Start job `name` outside the current request. Returns False if it could not be handed off."""
+    if name not in _handlers:
+        raise KeyError(f"unknown job {name!r}")
+    payload = payload or {}
+    if not DETACHED:
+        threading.Thread(target=_run, args=(name, payload, delay_s), name=f"job-{name}", daemon=True).start()
+        return True
+    event = {_EVENT_KEY: name, "payload": payload, "delay_s": delay_s}
+    try:
+        aws_clients.client("lambda").invoke(
+            FunctionName=_function_name(),
+            InvocationType="Event",
+            Payload=json.dumps(event, separators=(",", ":")).encode("utf-8"),
+        )
+        return True
+    except Exception as e:
+        logger.warning("job %s dispatch failed: %s", name, e)
+        return False
+
+
+def is_job_event(event) -> bool:
+    return isinstance(event, dict) and _EVENT_KEY in event
+
+
+def run(event: dict) -> dict:
+    """Lambda entry for an event sent by dispatch()."""
+    name = event[_EVENT_KEY]
+    if name not in _handlers:
+        logger.warning("unknown job %r", name)
+        return {"job": name, "ok": False}
+    _run(name, event.get("payload") or {}, float(event.get("delay_s") or 0))
+    return {"job": name, "ok": True}
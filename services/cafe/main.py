@@ -1,35 +1,63 @@
+import hashlib
 import logging
 import os
 import sys
 from datetime import datetime, timezone
+from urllib.parse import urlencode
 
-from fastapi import FastAPI, Query
+from fastapi import BackgroundTasks, FastAPI, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response
 
+import aws_clients
+import catalog_cache
+import citibike_stations
+import geocode_cache
+import jobs
+import places_cache
 from db import (
+    STORE,
+    CafeNotFound,
+    VersionConflict,
+    batch_get_cafes,
+    cafe_patch_to_updates,
     cafe_to_item,
+    decode_cursor,
     delete_item,
     delete_watchlist_item,
+    get_catalog_version,
     get_item,
+    is_cafe_item,
     item_to_cafe_dict,
+    item_version,
     put_item,
     put_watchlist_item,
+    query_neighborhood,
     scan,
+    scan_page,
     scan_watchlist_records,
     update_item,
     watchlist_to_api,
 )
 from elo import elo_to_cups
 from enrichment import location_enrichment
-from maps_link import attach_watchlist_photo, preview_maps_link, watchlist_item_from_preview
+from maps_link import preview_maps_link, watchlist_item_from_preview
+from nearby import nearby, nearby_many
 from models import (
+    BatchGetCafesRequest,
+    BatchGetCafesResponse,
     Cafe,
+    CafeFields,
+    CafeFieldsListResponse,
     CafeListResponse,
+    CafePatch,
     FromUploadRequest,
     FromUploadResponse,
     InitialEloRequest,
     InitialEloResponse,
+    NearbyBatchRequest,
+    NearbyBatchResponse,
+    NearbyResponse,
     RandomCafeListResponse,
     RandomCafeOut,
     WatchlistCreateRequest,
@@ -37,7 +65,10 @@ from models import (
     WatchlistResponse,
 )
 from ranking import compute_initial_elo, get_random_cafes_for_comparison, normalize_comparisons
+from api_responses import CompressionMiddleware, FastJSONResponse
 from sharecard_service import generate_and_store_share_card
+from snapshot import request_rebuild as request_snapshot_rebuild
+from watchlist_photos import with_photos
 
 logger = logging.getLogger(__name__)
 
@@ -56,8 +87,15 @@ def _configure_logging_for_lambda() -> None:
 
 
 _configure_logging_for_lambda()
-
-app = FastAPI(title="Cafe service", version="1.0.0")
+# Build the shared DynamoDB/S3 clients during Lambda init / worker startup, not on the first request.
+if STORE == "dynamodb":
+    aws_clients.warm_up("dynamodb", "s3")
+if jobs.DETACHED:
+    aws_clients.warm_up("lambda")
+# Citi Bike docks: a file loads now; a GBFS URL starts fetching in the background (never on a request).
+citibike_stations.warm()
+
+app = FastAPI(title="Cafe service", version="1.0.0", default_response_class=FastJSONResponse)
 # In Lambda, CORS is configured on API Gateway HTTP API; adding CORSMiddleware here too
 # duplicates Access-Control-Allow-Origin and breaks browser fetch from local dev pages.
 if not os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
@@ -65,9 +103,15 @@ if not os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
         CORSMiddleware,
         allow_origins=["*"],
         allow_credentials=False,
-        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        allow_headers=["Content-Type", "Authorization"],
+        allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+        allow_headers=["Content-Type", "Authorization", "If-Match", "If-None-Match"],
+        expose_headers=["ETag"],
     )
+# gzip/brotli for large JSON bodies (e.g. GET /cafes?limit=500); works under uvicorn and Mangum.
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get("RESPONSE_COMPRESS_MIN_BYTES", "1024")),
+)
 
 
 @app.get("/", include_in_schema=False)
@@ -85,19 +129,95 @@ def favicon():
     return Response(status_code=204)
 
 
-@app.get("/cafes", response_model=CafeListResponse)
+def _list_etag(version: int, request: Request) -> str:
+    """Weak ETag for one GET /cafes view: catalog version + normalized query string."""
+    params = urlencode(sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(params.encode("utf-8")).hexdigest()[:12]
+    return f'W/"c{version}-{digest}"'
+
+
+def _parse_fields(fields: str | None) -> list[str] | None:
+    """?fields=s3_key,name,latitude -> validated Cafe field names (None = full model)."""
+    if fields is None or not fields.strip():
+        return None
+    wanted = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in wanted if f not in Cafe.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return wanted
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses weak comparison (RFC 9110 §13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+@app.get("/cafes", response_model=CafeListResponse | CafeFieldsListResponse)
 def get_cafes(
+    request: Request,
+    response: Response,
     neighborhood: str | None = Query(default=None, description="Filter by neighborhood"),
     limit: int = Query(default=100, ge=1, le=500, description="Limit"),
-    offset: int = Query(default=0, ge=0, description="Offset"),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
+    offset: int = Query(default=0, ge=0, description="Offset (deprecated: re-reads skipped rows; use cursor)"),
+    fields: str | None = Query(
+        default=None,
+        description="Comma-separated Cafe fields to return (e.g. s3_key,name,latitude,longitude); "
+        "pushed down as a DynamoDB ProjectionExpression",
+    ),
 ):
-    """Return cafes from DynamoDB with optional neighborhood filter and pagination."""
+    """
+    Return cafes from DynamoDB with optional neighborhood filter and cursor pagination.
+    The ETag follows the catalog version, so a matching If-None-Match gets 304 without a scan.
+    With fields=, each cafe carries only the requested fields (CafeFieldsListResponse).
+    offset cannot be combined with cursor or fields (400).
+    Parameters are validated before the ETag check, so a malformed request never gets a 304.
+    """
+    try:
+        wanted = _parse_fields(fields)
+        if offset and (cursor or wanted):
+            raise ValueError("offset cannot be combined with cursor or fields; use cursor")
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    version = get_catalog_version()
+    etag = _list_etag(version, request) if version is not None else None
+    cache_headers = {"ETag": etag, "Cache-Control": "no-cache"} if etag else {}
+    if etag and _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
     try:
-        items = scan(neighborhood=neighborhood, limit=limit, offset=offset)
-        cafes = [Cafe(**item_to_cafe_dict(it)) for it in items]
-        return CafeListResponse(cafes=cafes)
+        if wanted:
+            rows, next_cursor = scan_page(
+                neighborhood=neighborhood,
+                limit=limit,
+                cursor=cursor,
+                fields=wanted,
+            )
+            slim = CafeFieldsListResponse(cafes=[CafeFields(**row) for row in rows], next_cursor=next_cursor)
+            return FastJSONResponse(content=slim.model_dump(exclude_unset=True), headers=cache_headers)
+        if offset:
+            if neighborhood is not None and neighborhood.strip():
+                items = query_neighborhood(neighborhood, limit=limit, offset=offset)
+            else:
+                items = scan(limit=limit, offset=offset)
+            result = CafeListResponse(cafes=[Cafe(**item_to_cafe_dict(it)) for it in items])
+        else:
+            # scan_page decodes raw DynamoDB items straight into Cafe fields (codec.py).
+            rows, next_cursor = scan_page(neighborhood=neighborhood, limit=limit, cursor=cursor)
+            result = CafeListResponse(cafes=[Cafe(**row) for row in rows], next_cursor=next_cursor)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+    # Browsers revalidate every time (no-cache) and get a tiny 304 while the catalog is unchanged.
+    response.headers.update(cache_headers)
+    return result
 
 
 # Register upload (under /v1 so it never matches GET /cafes/{cafe_id}).
@@ -113,7 +233,7 @@ def from_upload_preflight():
 
 
 @app.post("/v1/cafes/from-upload", response_model=FromUploadResponse)
-def from_upload(req: FromUploadRequest):
+def from_upload(req: FromUploadRequest, background_tasks: BackgroundTasks):
     """
     Register a newly uploaded cafe in DynamoDB.
     Fills neighborhood, subway, citibike, Google Maps, and initial Elo from lat/lon and comparisons.
@@ -144,10 +264,12 @@ def from_upload(req: FromUploadRequest):
     citibike_name = ""
     citibike_distance_m = 0.0
     citibike_walk_mins = 0
+    enrichment_timed_out: list[str] = []
 
     if lat is not None and lon is not None:
         safe_name = name.replace("/", "_").replace("\\", "_")
         e = location_enrichment(float(lat), float(lon), safe_name)
+        enrichment_timed_out = list(e.timed_out)
         neighborhood = e.neighborhood
         subway_station = e.subway_station
         subway_distance_m = e.subway_distance_m
@@ -188,8 +310,13 @@ def from_upload(req: FromUploadRequest):
         except Exception:
             logger.exception("share card generation failed key=%r; cafe will still be saved", key)
         put_item(item)
+        background_tasks.add_task(request_snapshot_rebuild)
         logger.info("v1/cafes/from-upload ok key=%r name=%r", key, name)
-        return FromUploadResponse(key=key, message="Cafe registered in DynamoDB")
+        return FromUploadResponse(
+            key=key,
+            message="Cafe registered in DynamoDB",
+            enrichment_timed_out=enrichment_timed_out,
+        )
     except Exception as e:
         logger.exception("v1/cafes/from-upload failed key=%r", key)
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -204,10 +331,7 @@ def watchlist_preflight(item_id: str = ""):
 @app.get("/v1/watchlist", response_model=WatchlistResponse)
 def list_watchlist():
     try:
-        items = []
-        for item in scan_watchlist_records():
-            attach_watchlist_photo(item)
-            items.append(watchlist_to_api(item))
+        items = [watchlist_to_api(item) for item in with_photos(scan_watchlist_records())]
         return WatchlistResponse(watchlist=[WatchlistItemOut(**w) for w in items])
     except Exception as e:
         logger.exception("list watchlist failed")
@@ -220,7 +344,6 @@ def create_watchlist_item(req: WatchlistCreateRequest):
         parsed = preview_maps_link(req.text or "")
         item = watchlist_item_from_preview(parsed)
         saved = put_watchlist_item(item)
-        saved["thumbUrl"] = parsed.get("photo_url") or ""
         return WatchlistItemOut(**saved)
     except ValueError as e:
         return JSONResponse(status_code=422, content={"error": str(e)})
@@ -237,52 +360,161 @@ def remove_watchlist_item(item_id: str):
     return WatchlistItemOut(**deleted)
 
 
+@app.options("/v1/nearby")
+def nearby_preflight():
+    return Response(status_code=204)
+
+
+@app.get("/v1/nearby", response_model=NearbyResponse)
+def get_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(default=5, ge=1, le=50, description="Stations per kind"),
+    radius: float | None = Query(default=None, gt=0, description="Max distance in meters"),
+):
+    """Closest k subway stations (with lines) and Citi Bike docks to a point."""
+    try:
+        return NearbyResponse(**nearby(lat, lon, k, radius))
+    except Exception as e:
+        logger.exception("nearby failed lat=%s lon=%s", lat, lon)
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/v1/nearby", response_model=NearbyBatchResponse)
+def post_nearby(req: NearbyBatchRequest):
+    """Batch form of GET /v1/nearby: one result per point, in request order."""
+    try:
+        results = nearby_many([(p.lat, p.lon) for p in req.points], req.k, req.radius)
+        return NearbyBatchResponse(results=[NearbyResponse(**r) for r in results])
+    except Exception as e:
+        logger.exception("nearby batch failed points=%d", len(req.points))
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/cafes/batch-get", response_model=BatchGetCafesResponse)
+def batch_get(req: BatchGetCafesRequest):
+    """Return a known set of cafes (comparison results, watchlist matches, share links) in one call."""
+    try:
+        rows = batch_get_cafes(req.keys)
+        returned = {row["s3_key"] for row in rows}
+        missing = [k for k in dict.fromkeys(req.keys) if k and k not in returned]
+        return BatchGetCafesResponse(cafes=[Cafe(**row) for row in rows], missing=missing)
+    except Exception as e:
+        logger.exception("batch-get failed keys=%d", len(req.keys))
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+def _version_etag(item: dict) -> str:
+    return f'"{item_version(item)}"'
+
+
+def _parse_if_match(if_match: str | None) -> int | None:
+    """If-Match carries the ETag from GET /cafes/{id} (the item version); '*' or absent = unconditional."""
+    if if_match is None or if_match.strip() in ("", "*"):
+        return None
+    raw = if_match.strip().removeprefix("W/").strip('"')
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError("If-Match must be an ETag returned by GET /cafes/{cafe_id}") from None
+
+
+def _conditional_update(
+    cafe_id: str,
+    updates: dict,
+    if_match: str | None,
+    response: Response,
+    background_tasks: BackgroundTasks,
+):
+    """One UpdateItem: attribute_exists(key) [+ version match], then ALL_NEW back to the client."""
+    try:
+        updated = update_item(cafe_id, updates, must_exist=True, expected_version=_parse_if_match(if_match))
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except CafeNotFound:
+        return JSONResponse(status_code=404, content={"error": "Cafe not found"})
+    except VersionConflict as e:
+        return JSONResponse(
+            status_code=412,
+            content={"error": str(e)},
+            headers={"ETag": f'"{e.current_version}"'},
+        )
+    if not updated:
+        return JSONResponse(status_code=500, content={"error": "Update failed"})
+    background_tasks.add_task(request_snapshot_rebuild)
+    response.headers["ETag"] = _version_etag(updated)
+    return Cafe(**item_to_cafe_dict(updated))
+
+
 @app.get("/cafes/{cafe_id}", response_model=Cafe)
-def get_cafe(cafe_id: str):
-    """Return one cafe by key."""
+def get_cafe(cafe_id: str, response: Response):
+    """Return one cafe by key. ETag is the item version (send it back as If-Match on PUT/PATCH)."""
     item = get_item(cafe_id)
-    if not item:
+    if not is_cafe_item(item):
         return JSONResponse(status_code=404, content={"error": "Cafe not found"})
+    response.headers["ETag"] = _version_etag(item)
     return Cafe(**item_to_cafe_dict(item))
 
 
 @app.post("/cafes", response_model=Cafe)
-def create_cafe(cafe: Cafe):
+def create_cafe(cafe: Cafe, background_tasks: BackgroundTasks):
     """Create a new cafe in DynamoDB (e.g. after image upload)."""
     try:
         put_item(cafe_to_item(cafe.model_dump()))
+        background_tasks.add_task(request_snapshot_rebuild)
         return cafe
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.put("/cafes/{cafe_id}", response_model=Cafe)
-def update_cafe(cafe_id: str, cafe: Cafe):
-    """Update cafe metadata in DynamoDB."""
-    item = get_item(cafe_id)
-    if not item:
-        return JSONResponse(status_code=404, content={"error": "Cafe not found"})
+def update_cafe(
+    cafe_id: str,
+    cafe: Cafe,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    if_match: str | None = Header(default=None),
+):
+    """Replace cafe metadata in DynamoDB (single conditional UpdateItem; 404 if missing, 412 on stale If-Match)."""
     updates = cafe_to_item(cafe.model_dump())
     updates.pop("key", None)
-    updated = update_item(cafe_id, updates)
-    if not updated:
-        return JSONResponse(status_code=500, content={"error": "Update failed"})
-    return Cafe(**item_to_cafe_dict(updated))
+    return _conditional_update(cafe_id, updates, if_match, response, background_tasks)
+
+
+@app.patch("/cafes/{cafe_id}", response_model=Cafe)
+def patch_cafe(
+    cafe_id: str,
+    patch: CafePatch,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    if_match: str | None = Header(default=None),
+):
+    """Write only the fields sent in the body (single conditional UpdateItem)."""
+    updates = cafe_patch_to_updates(patch.model_dump(exclude_unset=True, exclude_none=True))
+    return _conditional_update(cafe_id, updates, if_match, response, background_tasks)
 
 
 @app.delete("/cafes/{cafe_id}", response_model=Cafe)
-def delete_cafe(cafe_id: str):
+def delete_cafe(cafe_id: str, background_tasks: BackgroundTasks):
     """Delete a cafe from DynamoDB."""
     deleted = delete_item(cafe_id)
     if not deleted:
         return JSONResponse(status_code=404, content={"error": "Cafe not found"})
+    background_tasks.add_task(request_snapshot_rebuild)
     return Cafe(**item_to_cafe_dict(deleted))
 
 
 # --- Health (for load balancer / readiness) ---
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "store": STORE,
+        "catalog_cache": catalog_cache.stats(),
+        "geocode_cache": geocode_cache.stats(),
+        "citibike": citibike_stations.stats(),
+        "places_cache": places_cache.stats(),
+    }
 
 
 # --- Ranking (logic in ranking.py) ---
@@ -305,6 +537,8 @@ def ranking_initial_elo(req: InitialEloRequest):
 
 
 def lambda_handler(event, context):
+    if jobs.is_job_event(event):
+        return jobs.run(event)
     from mangum import Mangum
     handler = Mangum(app, lifespan="off")
     return handler(event, context)
@@ -3,13 +3,20 @@ from __future__ import annotations
 import logging
 import os
 import re
+import time
 from urllib.parse import parse_qs, unquote, urljoin, urlparse
 
-import googlemaps
 import requests
 
+import places_cache
+
 logger = logging.getLogger(__name__)
 
+# Resolved watchlist photos / coordinates are stored on the entry until photoExpiresAt (epoch
+# seconds). Places photo CDN URLs are long-lived; a miss (no photo, lookup failed) retries sooner.
+WATCHLIST_PHOTO_TTL_SECONDS = int(os.environ.get("WATCHLIST_PHOTO_TTL_SECONDS", str(7 * 24 * 3600)))
+WATCHLIST_PHOTO_MISS_TTL_SECONDS = int(os.environ.get("WATCHLIST_PHOTO_MISS_TTL_SECONDS", str(6 * 3600)))
+
 _BROWSER_UA = (
     "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) "
     "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
@@ -108,7 +115,11 @@ def parse_maps_url(url: str) -> dict:
 
 
 def _places_api_key() -> str:
-    return (os.environ.get("GOOGLE_PLACES_API_KEY") or "").strip()
+    return places_cache.api_key()
+
+
+# Pooled connections for the Places Photo redirect lookups.
+_photo_session = requests.Session()
 
 
 def _photo_cdn_url(photo_reference: str) -> str:
@@ -117,17 +128,19 @@ def _photo_cdn_url(photo_reference: str) -> str:
     ref = (photo_reference or "").strip()
     if not key or not ref:
         return ""
-    api_url = (
-        "https://maps.googleapis.com/maps/api/place/photo"
-        f"?maxwidth=400&photo_reference={ref}&key={key}"
-    )
-    r = requests.get(api_url, allow_redirects=False, timeout=12)
-    loc = r.headers.get("Location") or ""
-    if loc.startswith("http") and "key=" not in loc.lower():
-        return loc
-    if r.status_code == 200 and (r.headers.get("Content-Type") or "").lower().startswith("image/"):
+
+    def fetch() -> str:
+        api_url = (
+            "https://maps.googleapis.com/maps/api/place/photo"
+            f"?maxwidth=400&photo_reference={ref}&key={key}"
+        )
+        r = _photo_session.get(api_url, allow_redirects=False, timeout=12)
+        loc = r.headers.get("Location") or ""
+        if loc.startswith("http") and "key=" not in loc.lower():
+            return loc
         return ""
-    return ""
+
+    return places_cache.photo_url(ref, fetch)
 
 
 def _geom_lat_lng(obj: dict | None) -> tuple[float | None, float | None]:
@@ -153,7 +166,6 @@ def resolve_place_and_photo(
         logger.warning("GOOGLE_PLACES_API_KEY is not set; skip watchlist place photo")
         return pid, "", out_lat, out_lng, out_name
     try:
-        client = googlemaps.Client(key=key)
         photos: list = []
 
         def apply_result(result: dict) -> None:
@@ -170,33 +182,24 @@ def resolve_place_and_photo(
             if place_name:
                 out_name = _short_place_name(place_name)
 
+        details_fields = ["photo", "place_id", "geometry", "name"]
         if pid.startswith("ChIJ"):
-            det = client.place(pid, fields=["photo", "place_id", "geometry", "name"])
+            det = places_cache.place(pid, details_fields)
             apply_result(det.get("result") or {})
 
         if not pid and name:
-            kwargs: dict = {
-                "input": name,
-                "input_type": "textquery",
-                "fields": ["place_id", "photos", "name", "geometry"],
-            }
-            if lat is not None and lng is not None:
-                kwargs["location_bias"] = f"point:{lat},{lng}"
-            found = client.find_place(**kwargs)
+            found = places_cache.find_place(name, ["place_id", "photos", "name", "geometry"], lat, lng)
             for cand in found.get("candidates") or []:
                 apply_result(cand)
                 if pid:
                     break
 
         if pid and (not photos or out_lat is None or not out_name):
-            det = client.place(pid, fields=["photo", "place_id", "geometry", "name"])
+            det = places_cache.place(pid, details_fields)
             apply_result(det.get("result") or {})
 
         if not photos and lat is not None and lng is not None:
-            nearby_kwargs: dict = {"location": (lat, lng), "radius": 150, "type": "cafe"}
-            if name:
-                nearby_kwargs["keyword"] = name
-            nearby = client.places_nearby(**nearby_kwargs)
+            nearby = places_cache.places_nearby(lat, lng, 150, keyword=name or None, type="cafe")
             for result in nearby.get("results") or []:
                 apply_result(result)
                 if photos:
@@ -211,24 +214,29 @@ def resolve_place_and_photo(
         return pid, "", out_lat, out_lng, out_name
 
 
-def attach_watchlist_photo(item: dict) -> dict:
-    """Add a live Places thumb, coordinates, and venue name for the API response."""
+def watchlist_photo_expires_at(photo_url: str) -> int:
+    ttl = WATCHLIST_PHOTO_TTL_SECONDS if photo_url else WATCHLIST_PHOTO_MISS_TTL_SECONDS
+    return int(time.time()) + ttl
+
+
+def watchlist_photo_attrs(item: dict) -> dict:
+    """Resolve a watchlist entry's Places thumb, coordinates, and venue name; returns the attrs to store."""
     pid, photo_url, lat, lng, place_name = resolve_place_and_photo(
         item.get("name") or "",
         item.get("latitude"),
         item.get("longitude"),
         item.get("placeId") or "",
     )
+    attrs: dict = {"photoUrl": photo_url, "photoExpiresAt": watchlist_photo_expires_at(photo_url)}
     if pid and pid != (item.get("placeId") or ""):
-        item["placeId"] = pid
+        attrs["placeId"] = pid
     if lat is not None:
-        item["latitude"] = lat
+        attrs["latitude"] = lat
     if lng is not None:
-        item["longitude"] = lng
+        attrs["longitude"] = lng
     if place_name:
-        item["name"] = place_name
-    item["photoUrl"] = photo_url
-    return item
+        attrs["name"] = place_name
+    return attrs
 
 
 def resolve_google_maps_url(url: str) -> tuple[str, str]:
@@ -317,4 +325,7 @@ def watchlist_item_from_preview(parsed: dict) -> dict:
         "mapsUrl": parsed.get("maps_url") or "",
         "placeId": parsed.get("place_id") or "",
         "source": "gmaps",
+        # preview_maps_link already resolved the place; store it so listing does not repeat the lookups.
+        "photoUrl": parsed.get("photo_url") or "",
+        "photoExpiresAt": watchlist_photo_expires_at(parsed.get("photo_url") or ""),
     }
@@ -0,0 +1,59 @@
+"""
+One-shot move of watchlist rows from the cafes table into the watchlist table.
+
+Before the split, watchlist entries (kind=watchlist/wish, watchlist:*/wish: keys) shared the
+cafes table and every cafe scan paid for them (and vice versa). Run once per environment after
+the watchlist table exists (terraform apply / scripts/localstack_setup_resources.sh):
+
+    TABLE_NAME=... WATCHLIST_TABLE_NAME=... python migrate_watchlist.py [--dry-run]
+
+Idempotent: each row is written to the watchlist table before it is deleted from the cafes table,
+so a rerun after an interruption just finishes the remaining rows.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+
+from db import TABLE_NAME, WATCHLIST_TABLE_NAME, _table, is_watchlist_item
+
+logger = logging.getLogger(__name__)
+
+
+def _legacy_watchlist_rows() -> list[dict]:
+    """Raw (undeserialized) watchlist rows still stored in the cafes table."""
+    table = _table(TABLE_NAME)
+    rows = []
+    resp = table.scan()
+    rows.extend(resp.get("Items", []))
+    while resp.get("LastEvaluatedKey"):
+        resp = table.scan(ExclusiveStartKey=resp["LastEvaluatedKey"])
+        rows.extend(resp.get("Items", []))
+    return [it for it in rows if is_watchlist_item(it)]
+
+
+def migrate(dry_run: bool = False) -> int:
+    """Copy watchlist rows to the watchlist table and delete them from the cafes table."""
+    rows = _legacy_watchlist_rows()
+    logger.info("found %d watchlist rows in %s", len(rows), TABLE_NAME)
+    if dry_run:
+        for it in rows:
+            logger.info("would move key=%r", it.get("key"))
+        return len(rows)
+    with _table(WATCHLIST_TABLE_NAME).batch_writer() as batch:
+        for it in rows:
+            if not it.get("kind"):
+                it["kind"] = "watchlist"
+            batch.put_item(Item=it)
+    with _table(TABLE_NAME).batch_writer() as batch:
+        for it in rows:
+            batch.delete_item(Key={"key": it["key"]})
+    logger.info("moved %d watchlist rows %s -> %s", len(rows), TABLE_NAME, WATCHLIST_TABLE_NAME)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="List rows that would move; write nothing")
+    migrate(dry_run=parser.parse_args().dry_run)
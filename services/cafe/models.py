@@ -1,7 +1,7 @@
 """Pydantic request/response models for the cafe HTTP API."""
 from __future__ import annotations
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Cafe(BaseModel):
@@ -26,8 +26,56 @@ class Cafe(BaseModel):
     created_at: str = ""
 
 
+class CafePatch(BaseModel):
+    """Payload for PATCH /cafes/{cafe_id}: only the fields that are sent get written."""
+
+    name: str | None = None
+    image_url: str | None = None
+    latitude: float | None = None
+    longitude: float | None = None
+    neighborhood: str | None = None
+    subway_station: str | None = None
+    subway_distance_m: float | None = None
+    subway_routes: list[str] | None = None
+    elo_rating: float | None = None
+    elo_star_rating: float | None = None
+    notes: str | None = None
+    google_maps_link: str | None = None
+    google_maps_place_type: str | None = None
+    closest_citibike_station_name: str | None = None
+    closest_citibike_station_distance_m: float | None = None
+    closest_citibike_station_walk_minutes: int | None = None
+    share_card_png_url: str | None = None
+    created_at: str | None = None
+
+
+class CafeFields(CafePatch):
+    """Subset of Cafe returned by GET /cafes?fields=...; only the requested fields are present."""
+
+    s3_key: str | None = None
+
+
 class CafeListResponse(BaseModel):
     cafes: list[Cafe]
+    # Opaque token for the next page (pass back as ?cursor=); null on the last page.
+    next_cursor: str | None = None
+
+
+class CafeFieldsListResponse(BaseModel):
+    cafes: list[CafeFields]
+    next_cursor: str | None = None
+
+
+class BatchGetCafesRequest(BaseModel):
+    """Payload for POST /cafes/batch-get."""
+
+    keys: list[str] = Field(..., max_length=500)
+
+
+class BatchGetCafesResponse(BaseModel):
+    # Same order as the request; keys with no cafe are listed in `missing`.
+    cafes: list[Cafe]
+    missing: list[str] = []
 
 
 class RandomCafeOut(BaseModel):
@@ -63,6 +111,8 @@ class FromUploadRequest(BaseModel):
 class FromUploadResponse(BaseModel):
     key: str
     message: str = "Cafe registered in DynamoDB"
+    # Enrichment sources that missed their deadline (their fields were saved empty).
+    enrichment_timed_out: list[str] = []
 
 
 class WatchlistCreateRequest(BaseModel):
@@ -84,3 +134,47 @@ class WatchlistItemOut(BaseModel):
 
 class WatchlistResponse(BaseModel):
     watchlist: list[WatchlistItemOut]
+
+
+class NearbySubwayStation(BaseModel):
+    station: str
+    lines: list[str]
+    lat: float
+    lon: float
+    distance_m: float
+
+
+class NearbyCitibikeStation(BaseModel):
+    station_id: str
+    name: str
+    lat: float
+    lon: float
+    distance_m: float
+    mins_walk: int
+
+
+class NearbyResponse(BaseModel):
+    """GET /v1/nearby (and each entry of the batch form): closest first, within radius if given."""
+
+    lat: float
+    lon: float
+    subway: list[NearbySubwayStation]
+    citibike: list[NearbyCitibikeStation]
+
+
+class NearbyPoint(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+
+class NearbyBatchRequest(BaseModel):
+    """Payload for POST /v1/nearby: many points in one call."""
+
+    points: list[NearbyPoint] = Field(..., max_length=500)
+    k: int = Field(default=5, ge=1, le=50)
+    radius: float | None = Field(default=None, gt=0, description="Meters")
+
+
+class NearbyBatchResponse(BaseModel):
+    # Same order as the request's points.
+    results: list[NearbyResponse]
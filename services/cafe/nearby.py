@@ -0,0 +1,147 @@
+"""
+Nearest transit for GET/POST /v1/nearby: the k closest subway stations (with their aggregated lines)
+and Citi Bike docks for one or many points.
+
+Each station set is converted once into contiguous radian arrays (PointSet). A query computes
+haversine distances for a chunk of query points against every station in one vectorized pass,
+keeps the k smallest per row with np.argpartition (linear, no full sort) and orders only those k.
+k_nearest() is the shared primitive, so batch jobs get the same all-points x all-stations
+results without per-point Python loops.
+
+The subway set comes from geocoding (GTFS parent stations); the Citi Bike set is rebuilt whenever
+citibike_stations hands back a different station list.
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+
+import numpy as np
+
+from citibike_stations import WALKING_SPEED_M_PER_MIN, get_stations
+from geocoding import EARTH_RADIUS_M, get_subway_stations
+
+# Query points per distance-matrix chunk (chunk x stations float64 temporaries).
+CHUNK_ROWS = int(os.environ.get("NEARBY_CHUNK_ROWS", "256"))
+MAX_K = 50
+
+
+class PointSet:
+    """Station rows plus their coordinates as contiguous radian arrays."""
+
+    def __init__(self, rows: list[dict], lat_key: str = "lat", lon_key: str = "lon"):
+        self.rows = rows
+        lat = np.fromiter((float(r[lat_key]) for r in rows), dtype=np.float64, count=len(rows))
+        lon = np.fromiter((float(r[lon_key]) for r in rows), dtype=np.float64, count=len(rows))
+        self.lat_rad = np.radians(lat)
+        self.lon_rad = np.radians(lon)
+        self.cos_lat = np.cos(self.lat_rad)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def distances(self, lats, lons) -> np.ndarray:
+        """(len(lats), len(self)) haversine distances in meters from each query point to every station."""
+        q_lat = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+        q_lon = np.radians(np.asarray(lons, dtype=np.float64))[:, None]
+        a = np.sin((self.lat_rad - q_lat) / 2) ** 2 + np.cos(q_lat) * self.cos_lat * np.sin((self.lon_rad - q_lon) / 2) ** 2
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def k_nearest(points: PointSet, lats, lons, k: int, radius_m: float | None = None, chunk_rows: int = CHUNK_ROWS):
+    """
+    For each query point, [(station index, distance_m), ...] of its k closest stations, nearest
+    first, dropping stations farther than radius_m. Works chunk_rows points at a time.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    n = len(points)
+    if n == 0 or k <= 0:
+        return [[] for _ in range(len(lats))]
+    k = min(k, n)
+    out = []
+    for start in range(0, len(lats), chunk_rows):
+        dist = points.distances(lats[start:start + chunk_rows], lons[start:start + chunk_rows])
+        if k < n:
+            top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), dist.shape)
+        top_d = np.take_along_axis(dist, top, axis=1)
+        order = np.argsort(top_d, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_d = np.take_along_axis(top_d, order, axis=1)
+        for idx_row, d_row in zip(top.tolist(), top_d.tolist()):
+            out.append([(i, d) for i, d in zip(idx_row, d_row) if radius_m is None or d <= radius_m])
+    return out
+
+
+_lock = threading.Lock()
+_subway: PointSet | None = None
+_citibike: tuple[object, PointSet] | None = None
+
+
+def subway_points() -> PointSet:
+    global _subway
+    if _subway is None:
+        with _lock:
+            if _subway is None:
+                _subway = PointSet(get_subway_stations())
+    return _subway
+
+
+def citibike_points() -> PointSet:
+    global _citibike
+    stations = get_stations() or []
+    current = _citibike
+    if current is None or current[0] is not stations:
+        with _lock:
+            current = _citibike
+            if current is None or current[0] is not stations:
+                current = _citibike = (stations, PointSet(stations))
+    return current[1]
+
+
+def _subway_out(row: dict, distance_m: float) -> dict:
+    return {
+        "station": row["station"],
+        "lines": row["lines"],
+        "lat": row["lat"],
+        "lon": row["lon"],
+        "distance_m": round(distance_m, 1),
+    }
+
+
+def _citibike_out(row: dict, distance_m: float) -> dict:
+    return {
+        "station_id": row["station_id"],
+        "name": row["name"],
+        "lat": row["lat"],
+        "lon": row["lon"],
+        "distance_m": round(distance_m, 1),
+        "mins_walk": int(math.ceil(distance_m / WALKING_SPEED_M_PER_MIN)),
+    }
+
+
+def nearby_many(points: list[tuple[float, float]], k: int = 5, radius_m: float | None = None) -> list[dict]:
+    """Per (lat, lon): {'lat', 'lon', 'subway': [...], 'citibike': [...]}, each list nearest first."""
+    k = max(1, min(int(k), MAX_K))
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    subway = subway_points()
+    citibike = citibike_points()
+    sub_hits = k_nearest(subway, lats, lons, k, radius_m)
+    bike_hits = k_nearest(citibike, lats, lons, k, radius_m)
+    return [
+        {
+            "lat": lat,
+            "lon": lon,
+            "subway": [_subway_out(subway.rows[i], d) for i, d in subs],
+            "citibike": [_citibike_out(citibike.rows[i], d) for i, d in bikes],
+        }
+        for lat, lon, subs, bikes in zip(lats, lons, sub_hits, bike_hits)
+    ]
+
+
+def nearby(lat: float, lon: float, k: int = 5, radius_m: float | None = None) -> dict:
+    return nearby_many([(lat, lon)], k, radius_m)[0]
@@ -0,0 +1,360 @@
+"""
+Offline neighborhood lookup: point-in-polygon over bundled NYC neighborhood polygons.
+
+geocoding.get_neighborhood asks this first and only falls back to the geocode cache / Nominatim
+when the point is outside every polygon, its polygon has no catalog name (below), or no polygon
+file is installed. The polygons are committed: data/neighborhoods/nyc_neighborhoods.geojson holds
+NYC Open Data's 2020 Neighborhood Tabulation Areas simplified by `python neighborhoods.py --fetch`
+(Douglas-Peucker at SIMPLIFY_DEG, coordinates rounded to COORD_DECIMALS), which is also how the file
+is refreshed (scripts/fetch_nyc_neighborhoods.sh). NEIGHBORHOODS_GEOJSON overrides the path.
+
+NTAs do not line up with the names the catalog already stores from Nominatim: "Downtown
+Brooklyn-DUMBO-Boerum Hill" covers cafes stored as DUMBO and as Downtown Brooklyn, and an NTA may be
+stored under its borough. data/neighborhoods/nta_aliases.json lists every NTA with the stored name
+to answer with, or null; a null (or unlisted) NTA answers None, so the caller keeps using Nominatim
+there and ?neighborhood= filters / the neighborhood GSI never see a new spelling. The table is
+generated by `python neighborhoods.py --derive-aliases`: an NTA gets a name only when every stored
+cafe inside it (at least --min-rows of them) carries that same name.
+
+The file is parsed once per process into rings plus a uniform lat/lon grid (GRID_DEG cells): each
+cell lists the polygons whose bounding box overlaps it, so a lookup tests a handful of candidates
+instead of every polygon (tens of microseconds per point).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import urllib.request
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+GRID_DEG = float(os.environ.get("NEIGHBORHOODS_GRID_DEG", "0.01"))
+# Feature property holding the NTA name, first match wins (NTA 2020, NTA 2010, generic).
+_NAME_PROPERTIES = ("ntaname", "NTAName", "neighborhood", "name")
+_CODE_PROPERTIES = ("nta2020", "NTA2020", "ntacode", "NTACode")
+_BOROUGH_PROPERTIES = ("boroname", "BoroName", "borough")
+
+NTA_GEOJSON_URL = "https://data.cityofnewyork.us/api/geospatial/9nt8-h7nd?method=export&format=GeoJSON"
+# --fetch simplification: ~1 m tolerance, ~0.1 m coordinate precision (boundaries follow streets,
+# where cafes are; coarser tolerances move measurably more points into the neighboring NTA).
+SIMPLIFY_DEG = 0.00001
+COORD_DECIMALS = 6
+
+_MISSING = object()
+_lock = threading.Lock()
+_index: "_PolygonIndex | None | object" = None
+
+
+def _data_path(filename: str) -> str:
+    here = os.path.dirname(os.path.abspath(__file__))
+    candidates = [
+        os.path.join(here, "neighborhoods", filename),
+        # Repo checkout: services/cafe -> data/neighborhoods
+        os.path.join(here, "..", "..", "data", "neighborhoods", filename),
+    ]
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    for path in candidates:
+        if os.path.isdir(os.path.dirname(path)):
+            return os.path.normpath(path)
+    return candidates[0]
+
+
+def _default_path() -> str:
+    return _data_path("nyc_neighborhoods.geojson")
+
+
+def _load_aliases() -> dict[str, str]:
+    """NTA name -> stored neighborhood name; null entries are left out (those NTAs answer None)."""
+    path = _data_path("nta_aliases.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {k: v.strip() for k, v in json.load(f).items() if isinstance(v, str) and v.strip()}
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        logger.exception("Error loading neighborhood aliases %s", path)
+        return {}
+
+
+def _ring_contains(ring: list[tuple[float, float]], lon: float, lat: float) -> bool:
+    """Even-odd ray cast; ring is a closed list of (lon, lat)."""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+class _Polygon:
+    __slots__ = ("nta", "name", "parts", "bbox")
+
+    def __init__(self, nta: str, name: str | None, parts: list[list[list[tuple[float, float]]]]):
+        self.nta = nta
+        self.name = name  # stored-catalog name, None when the NTA has no alias
+        # parts: [outer ring, hole, hole, ...] per polygon of a MultiPolygon
+        self.parts = parts
+        lons = [p[0] for part in parts for p in part[0]]
+        lats = [p[1] for part in parts for p in part[0]]
+        self.bbox = (min(lons), min(lats), max(lons), max(lats))
+
+    def contains(self, lon: float, lat: float) -> bool:
+        min_lon, min_lat, max_lon, max_lat = self.bbox
+        if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+            return False
+        for outer, *holes in self.parts:
+            if _ring_contains(outer, lon, lat) and not any(_ring_contains(h, lon, lat) for h in holes):
+                return True
+        return False
+
+
+class _PolygonIndex:
+    def __init__(self, polygons: list[_Polygon], grid_deg: float = GRID_DEG):
+        self.polygons = polygons
+        self.grid_deg = grid_deg
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        for idx, poly in enumerate(polygons):
+            min_lon, min_lat, max_lon, max_lat = poly.bbox
+            for cx in range(self._cell(min_lon), self._cell(max_lon) + 1):
+                for cy in range(self._cell(min_lat), self._cell(max_lat) + 1):
+                    self.cells.setdefault((cx, cy), []).append(idx)
+
+    def _cell(self, deg: float) -> int:
+        return math.floor(deg / self.grid_deg)
+
+    def polygon_at(self, lat: float, lon: float) -> _Polygon | None:
+        for idx in self.cells.get((self._cell(lon), self._cell(lat)), ()):
+            poly = self.polygons[idx]
+            if poly.contains(lon, lat):
+                return poly
+        return None
+
+    def lookup(self, lat: float, lon: float) -> str | None:
+        poly = self.polygon_at(lat, lon)
+        return poly.name if poly is not None else None
+
+
+def _first_property(props: dict, keys: tuple[str, ...]) -> str:
+    for key in keys:
+        value = props.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return ""
+
+
+def _feature_name(props: dict) -> str:
+    return _first_property(props, _NAME_PROPERTIES)
+
+
+def _feature_parts(geom: dict) -> list:
+    """Polygon / MultiPolygon coordinates as a list of polygons (rings); [] for other geometries."""
+    if geom.get("type") == "Polygon":
+        return [geom["coordinates"]]
+    if geom.get("type") == "MultiPolygon":
+        return geom["coordinates"]
+    return []
+
+
+def _parse(doc: dict, aliases: dict[str, str] | None = None) -> list[_Polygon]:
+    aliases = aliases or {}
+    polygons = []
+    for feature in doc.get("features", []):
+        geom = feature.get("geometry") or {}
+        nta = _feature_name(feature.get("properties") or {})
+        if not nta:
+            continue
+        raw_parts = _feature_parts(geom)
+        parts = [[[(float(x), float(y)) for x, y, *_ in ring] for ring in rings] for rings in raw_parts if rings]
+        if parts:
+            polygons.append(_Polygon(nta, aliases.get(nta), parts))
+    return polygons
+
+
+def _load() -> "_PolygonIndex | None":
+    global _index
+    if _index is _MISSING:
+        return None
+    if _index is not None:
+        return _index
+    with _lock:
+        if _index is None:
+            path = os.environ.get("NEIGHBORHOODS_GEOJSON") or _default_path()
+            try:
+                with open(path, encoding="utf-8") as f:
+                    polygons = _parse(json.load(f), _load_aliases())
+            except FileNotFoundError:
+                logger.warning("Neighborhood polygons not found at %s — using Nominatim only.", path)
+                polygons = []
+            except Exception:
+                logger.exception("Error loading neighborhood polygons %s", path)
+                polygons = []
+            if polygons:
+                _index = _PolygonIndex(polygons)
+                logger.info("Loaded %d neighborhood polygons from %s", len(polygons), path)
+            else:
+                _index = _MISSING
+    return _index if _index is not _MISSING else None
+
+
+def lookup(lat, lon) -> str | None:
+    """Neighborhood containing (lat, lon), or None (outside all polygons / no polygon file)."""
+    index = _load()
+    if index is None:
+        return None
+    return index.lookup(float(lat), float(lon))
+
+
+def available() -> bool:
+    return _load() is not None
+
+
+def _simplify_ring(ring: list, tolerance: float) -> list | None:
+    """Douglas-Peucker on a closed ring; None when fewer than 4 points (3 corners) survive."""
+    pts = [(round(float(x), COORD_DECIMALS), round(float(y), COORD_DECIMALS)) for x, y, *_ in ring]
+    pts = [p for i, p in enumerate(pts) if i == 0 or p != pts[i - 1]]
+    if len(pts) < 4:
+        return None
+    keep = [False] * len(pts)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(pts) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = pts[first], pts[last]
+        dx, dy = x2 - x1, y2 - y1
+        norm = math.hypot(dx, dy)
+        best, best_d = None, tolerance
+        for i in range(first + 1, last):
+            px, py = pts[i]
+            if norm:
+                d = abs(dy * px - dx * py + x2 * y1 - y2 * x1) / norm
+            else:  # closed ring: first == last point
+                d = math.hypot(px - x1, py - y1)
+            if d > best_d:
+                best, best_d = i, d
+        if best is not None:
+            keep[best] = True
+            stack += [(first, best), (best, last)]
+    out = [p for p, k in zip(pts, keep) if k]
+    return [list(p) for p in out] if len(out) >= 4 else None
+
+
+def simplify(doc: dict, tolerance: float = SIMPLIFY_DEG) -> dict:
+    """
+    The committed file's shape: one MultiPolygon feature per named NTA, with only ntaname / nta2020 /
+    boroname properties, simplified rings and rounded coordinates. Rings that collapse are dropped
+    (a polygon whose outer ring collapses goes with it).
+    """
+    features = []
+    for feature in doc.get("features", []):
+        props = feature.get("properties") or {}
+        nta = _feature_name(props)
+        polygons = []
+        for rings in _feature_parts(feature.get("geometry") or {}):
+            simplified = [_simplify_ring(ring, tolerance) for ring in rings]
+            if simplified and simplified[0] is not None:
+                polygons.append([r for r in simplified if r is not None])
+        if nta and polygons:
+            features.append(
+                {
+                    "type": "Feature",
+                    "properties": {
+                        "ntaname": nta,
+                        "nta2020": _first_property(props, _CODE_PROPERTIES),
+                        "boroname": _first_property(props, _BOROUGH_PROPERTIES).title(),
+                    },
+                    "geometry": {"type": "MultiPolygon", "coordinates": polygons},
+                }
+            )
+    features.sort(key=lambda f: (f["properties"]["nta2020"], f["properties"]["ntaname"]))
+    return {"type": "FeatureCollection", "features": features}
+
+
+def fetch(out: str, url: str = NTA_GEOJSON_URL) -> int:
+    """
+    Download the NTA GeoJSON (any urllib URL, file:// included), simplify it and write it to out once
+    it parses into named polygons; returns the polygon count.
+    """
+    with urllib.request.urlopen(url, timeout=60) as resp:
+        doc = json.loads(resp.read())
+    if doc.get("type") != "FeatureCollection":
+        raise ValueError(f"unexpected GeoJSON from {url}: type={doc.get('type')}")
+    slim = simplify(doc)
+    polygons = _parse(slim)
+    if not polygons:
+        raise ValueError(f"no named polygons in GeoJSON from {url} ({len(doc.get('features') or [])} features)")
+    body = json.dumps(slim, separators=(",", ":"), ensure_ascii=False) + "\n"
+    tmp = out + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(body)
+    os.replace(tmp, out)
+    return len(polygons)
+
+
+def _catalog_rows(path: str | None) -> list[dict]:
+    """Stored cafes (neighborhood, latitude, longitude): a cafes.json snapshot file, or DynamoDB."""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            doc = json.load(f)
+        return doc["cafes"] if isinstance(doc, dict) else doc
+    from db import scan_all
+
+    names = {"#n": "neighborhood", "#a": "latitude", "#o": "longitude"}
+    return scan_all(projection_expression="#n, #a, #o", expression_attribute_names=names)
+
+
+def derive_aliases(rows: list[dict], min_rows: int = 2) -> dict[str, str | None]:
+    """
+    The full alias table for the installed polygons: NTA name -> the neighborhood every stored cafe
+    inside it carries, when there are at least min_rows of them; otherwise None (mixed or too few
+    stored names: keep asking Nominatim there). Logs the stored names per NTA for review.
+    """
+    index = _load()
+    if index is None:
+        raise SystemExit("no neighborhood polygons installed")
+    votes: dict[str, Counter] = {}
+    for row in rows:
+        stored = row.get("neighborhood")
+        try:
+            poly = index.polygon_at(float(row["latitude"]), float(row["longitude"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if poly is not None and isinstance(stored, str) and stored.strip():
+            votes.setdefault(poly.nta, Counter())[stored.strip()] += 1
+    out: dict[str, str | None] = {}
+    for poly in sorted(index.polygons, key=lambda p: p.nta):
+        counter = votes.get(poly.nta)
+        name = None
+        if counter and len(counter) == 1 and sum(counter.values()) >= min_rows:
+            name = next(iter(counter))
+        if counter:
+            logger.info("%s: %s -> %s", poly.nta, dict(counter.most_common()), name)
+        out[poly.nta] = name
+    return out
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s", stream=sys.stderr)
+    parser = argparse.ArgumentParser(description="NYC neighborhood polygons for the offline resolver")
+    parser.add_argument("--fetch", action="store_true", help="Download and simplify the NTA GeoJSON (NTA_GEOJSON_URL overrides the source)")
+    parser.add_argument("--out", default=_default_path(), help="Where --fetch writes the GeoJSON")
+    parser.add_argument("--derive-aliases", action="store_true", help="Print the NTA -> stored-name alias table (JSON)")
+    parser.add_argument("--catalog", help="--derive-aliases: read cafes from this cafes.json snapshot instead of DynamoDB")
+    parser.add_argument("--min-rows", type=int, default=2, help="--derive-aliases: stored cafes an NTA needs for an alias")
+    args = parser.parse_args()
+    if args.fetch:
+        count = fetch(args.out, os.environ.get("NTA_GEOJSON_URL") or NTA_GEOJSON_URL)
+        print(f"Wrote {count} neighborhood polygons to {args.out}", file=sys.stderr)
+    if args.derive_aliases:
+        table = derive_aliases(_catalog_rows(args.catalog), min_rows=args.min_rows)
+        print(json.dumps(table, indent=2, ensure_ascii=False, sort_keys=True))
@@ -0,0 +1,212 @@
+"""
+Shared Google Places client and response cache for geocoding.build_google_maps_link_nearby and
+maps_link (watchlist previews and photos).
+
+Every upload and watchlist listing used to build a new googlemaps.Client (new session, new TLS
+handshake) and repeat the same place / find_place / places_nearby calls. Here one client per API
+key is reused, and responses are cached:
+- place details by (place_id, fields)
+- find_place / places_nearby by (normalized name or keyword, lat/lng rounded to COORD_DECIMALS)
+- photo CDN URLs by photo_reference
+
+The in-process tier is an LRU of PLACES_CACHE_MAX_ENTRIES entries with a TTL
+(PLACES_CACHE_TTL_SECONDS, 1 day; empty answers PLACES_CACHE_NEGATIVE_TTL_SECONDS, 1 hour).
+PLACES_CACHE_PATH adds a SQLite tier that survives restarts (and warm Lambda containers when it
+points into /tmp). Exceptions are never cached. PLACES_CACHE=off disables caching; stats() counts
+hits per tier (memory_hits, persistent_hits; api_calls_saved is their sum), misses and the API
+calls actually made.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import googlemaps
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("PLACES_CACHE", "on").strip().lower() not in ("0", "off", "false", "no")
+TTL_SECONDS = int(os.environ.get("PLACES_CACHE_TTL_SECONDS", str(24 * 3600)))
+NEGATIVE_TTL_SECONDS = int(os.environ.get("PLACES_CACHE_NEGATIVE_TTL_SECONDS", "3600"))
+MAX_ENTRIES = int(os.environ.get("PLACES_CACHE_MAX_ENTRIES", "2048"))
+SQLITE_PATH = os.environ.get("PLACES_CACHE_PATH", "").strip()
+# 4 decimals is ~11 m: the same shared link or upload spot maps to the same key.
+COORD_DECIMALS = 4
+
+_lock = threading.Lock()
+_memory: OrderedDict = OrderedDict()
+_clients: dict[str, googlemaps.Client] = {}
+_sqlite = None
+_stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "api_calls": 0, "evictions": 0, "errors": 0}
+
+
+def _count(name: str) -> None:
+    # Lookups run on the enrichment and watchlist pools; += on a shared dict is not atomic.
+    with _lock:
+        _stats[name] += 1
+
+
+def api_key() -> str:
+    return (os.environ.get("GOOGLE_PLACES_API_KEY") or "").strip()
+
+
+def client() -> googlemaps.Client | None:
+    """Process-wide googlemaps.Client for the current API key (None when no key is set)."""
+    key = api_key()
+    if not key:
+        return None
+    c = _clients.get(key)
+    if c is None:
+        with _lock:
+            c = _clients.get(key)
+            if c is None:
+                c = _clients[key] = googlemaps.Client(key=key)
+    return c
+
+
+class _SqliteTier:
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS places_cache"
+            " (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at INTEGER NOT NULL)"
+        )
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM places_cache WHERE key = ?", (key,)).fetchone()
+        return (json.loads(row[0]), int(row[1])) if row else None
+
+    def put(self, key: str, value, expires_at: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+
+
+def _persistent():
+    global _sqlite
+    if not SQLITE_PATH:
+        return None
+    if _sqlite is None:
+        with _lock:
+            if _sqlite is None:
+                _sqlite = _SqliteTier(SQLITE_PATH)
+    return _sqlite
+
+
+def _remember(key: str, value, expires_at: int) -> None:
+    with _lock:
+        _memory[key] = (value, expires_at)
+        _memory.move_to_end(key)
+        while len(_memory) > MAX_ENTRIES:
+            _memory.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def _lookup(key: str, now: int):
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None and entry[1] > now:
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return entry
+    tier = _persistent()
+    if tier is None:
+        return None
+    try:
+        entry = tier.get(key)
+    except Exception as e:
+        _count("errors")
+        logger.warning("places cache read failed for %s: %s", key, e)
+        return None
+    if entry is None or entry[1] <= now:
+        return None
+    _remember(key, *entry)
+    _count("persistent_hits")
+    return entry
+
+
+def cached(key: str, fetch, is_empty=lambda value: not value):
+    """fetch() through the cache; fetch counts as one API call. Exceptions propagate uncached."""
+    now = int(time.time())
+    if ENABLED:
+        entry = _lookup(key, now)
+        if entry is not None:
+            return entry[0]
+        _count("misses")
+    _count("api_calls")
+    value = fetch()
+    if ENABLED:
+        expires_at = now + (NEGATIVE_TTL_SECONDS if is_empty(value) else TTL_SECONDS)
+        _remember(key, value, expires_at)
+        tier = _persistent()
+        if tier is not None:
+            try:
+                tier.put(key, value, expires_at)
+            except Exception as e:
+                _count("errors")
+                logger.warning("places cache write failed for %s: %s", key, e)
+    return value
+
+
+def _norm(text: str | None) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def _coord(value) -> str:
+    return "" if value is None else f"{float(value):.{COORD_DECIMALS}f}"
+
+
+def place(place_id: str, fields: list[str]) -> dict:
+    """Place Details response for place_id (googlemaps.Client.place)."""
+    key = f"place|{place_id}|{','.join(sorted(fields))}"
+    return cached(key, lambda: client().place(place_id, fields=fields), lambda r: not (r or {}).get("result"))
+
+
+def find_place(name: str, fields: list[str], lat: float | None = None, lng: float | None = None) -> dict:
+    """Find Place (textquery) response, biased to (lat, lng) when given."""
+    kwargs: dict = {"input": name, "input_type": "textquery", "fields": fields}
+    if lat is not None and lng is not None:
+        kwargs["location_bias"] = f"point:{lat},{lng}"
+    key = f"find|{_norm(name)}|{_coord(lat)},{_coord(lng)}|{','.join(sorted(fields))}"
+    return cached(key, lambda: client().find_place(**kwargs), lambda r: not (r or {}).get("candidates"))
+
+
+def places_nearby(lat: float, lng: float, radius: int, keyword: str | None = None, type: str | None = None) -> dict:
+    """Nearby Search response around (lat, lng)."""
+    kwargs: dict = {"location": (lat, lng), "radius": radius}
+    if keyword:
+        kwargs["keyword"] = keyword
+    if type:
+        kwargs["type"] = type
+    key = f"nearby|{_norm(keyword)}|{_coord(lat)},{_coord(lng)}|{radius}|{type or ''}"
+    return cached(key, lambda: client().places_nearby(**kwargs), lambda r: not (r or {}).get("results"))
+
+
+def photo_url(photo_reference: str, fetch) -> str:
+    """CDN URL for a Places photo reference; fetch() does the redirect lookup on a miss."""
+    return cached(f"photo|{photo_reference}", fetch)
+
+
+def stats() -> dict:
+    with _lock:
+        counters = dict(_stats)
+        entries = len(_memory)
+    return {
+        **counters,
+        "hits": counters["memory_hits"] + counters["persistent_hits"],
+        # Every hit, from either tier, is a Places request that was not made.
+        "api_calls_saved": counters["memory_hits"] + counters["persistent_hits"],
+        "memory_entries": entries,
+        "persistent": bool(SQLITE_PATH),
+        "enabled": ENABLED,
+    }
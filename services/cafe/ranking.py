@@ -1,5 +1,5 @@
 """
-Comparison sampling and initial Elo from DynamoDB-backed cafes.
+Comparison sampling and initial Elo from DynamoDB-backed cafes (via catalog_cache).
 Used by GET /ranking/cafes, POST /ranking/initial-elo, and POST /v1/cafes/from-upload.
 """
 from __future__ import annotations
@@ -8,7 +8,7 @@ import logging
 import random
 import re
 
-from db import scan_all
+import catalog_cache
 from elo import log_new_cafe_elo
 
 logger = logging.getLogger(__name__)
@@ -26,10 +26,7 @@ def _name_from_key(key: str) -> str:
 
 def _random_cafes_with_elo(num_cafes: int = 5) -> list[tuple[str, float]]:
     try:
-        items = scan_all(
-            projection_expression="#k, #e",
-            expression_attribute_names={"#k": "key", "#e": "eloRating"},
-        )
+        items = catalog_cache.get_rows()
         candidates = []
         for it in items:
             key = it.get("key")
@@ -76,10 +73,7 @@ def compute_initial_elo(comparisons: list[tuple[str, float]] | None) -> float:
 
 def get_random_cafes_for_comparison(limit: int) -> list[dict]:
     try:
-        items = scan_all(
-            projection_expression="#k, #n, neighborhood",
-            expression_attribute_names={"#k": "key", "#n": "name"},
-        )
+        items = catalog_cache.get_rows()
         valid = [
             it
             for it in items
@@ -8,22 +8,19 @@ import re
 from datetime import date
 from pathlib import Path
 
-import boto3
 import cairosvg
 from jinja2 import Environment, FileSystemLoader
 from PIL import Image
 
+import aws_clients
+
 logger = logging.getLogger(__name__)
 
-_REGION = os.environ.get("AWS_REGION", "us-east-1")
-_ENDPOINT = os.environ.get("AWS_ENDPOINT_URL")
-_s3_kwargs: dict = {"region_name": _REGION}
-if _ENDPOINT:
-    _s3_kwargs["endpoint_url"] = _ENDPOINT
+_REGION = aws_clients.REGION
 
 
 def _s3_client():
-    return boto3.client("s3", **_s3_kwargs)
+    return aws_clients.client("s3")
 
 
 def _templates_dir() -> Path:
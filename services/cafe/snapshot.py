@@ -0,0 +1,140 @@
+"""
+Materialized catalog snapshot: s3://BUCKET_NAME/cafes.json in the GET /cafes response shape.
+
+index.html / map.html read it straight from S3 (or a CDN in front of the bucket) and only fall back
+to the cafe API when it is missing, so gallery page views never touch Lambda or DynamoDB.
+Rebuilt after cafe writes (from_upload, create/update/patch/delete in main.py):
+
+- Debounced, outside the request: under uvicorn, writes within SNAPSHOT_DEBOUNCE_SECONDS coalesce
+  into one rebuild on a timer thread. On Lambda (where Mangum awaits background tasks, and the
+  container freezes after the response) each write dispatches a "snapshot" job (jobs.py, an async
+  self-invoke) tagged with the catalog version it produced. The job waits SNAPSHOT_DEBOUNCE_SECONDS
+  and builds only if no later write has bumped the version since, so a burst of writes ends in
+  one rebuild by the last write's job. The request pays for one GetItem and one async Invoke.
+- Atomic: the whole document is serialized in memory and written with a single PutObject, which S3
+  applies all-or-nothing, so readers see either the previous snapshot or the new one.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+import aws_clients
+import jobs
+from db import get_catalog_version, item_to_cafe_dict, scan_all
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = os.environ.get("SNAPSHOT_KEY", "cafes.json")
+DEBOUNCE_SECONDS = float(os.environ.get("SNAPSHOT_DEBOUNCE_SECONDS", "5"))
+# Store gzip bytes with Content-Encoding: gzip (browsers/CDNs decode transparently).
+GZIP = os.environ.get("SNAPSHOT_GZIP", "1").strip().lower() not in ("0", "false", "no", "")
+
+_lock = threading.Lock()
+_timer: threading.Timer | None = None
+
+
+def _s3_client():
+    return aws_clients.client("s3")
+
+
+def _bucket() -> str:
+    return os.environ.get("BUCKET_NAME", "").strip()
+
+
+def build_snapshot(version: int | None) -> bytes:
+    """Compact JSON body: {"version", "generated_at", "cafes": [Cafe fields...]}."""
+    cafes = [item_to_cafe_dict(it) for it in scan_all()]
+    cafes.sort(key=lambda c: c["s3_key"])
+    doc = {
+        "version": version,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "cafes": cafes,
+    }
+    return json.dumps(doc, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _stored_version(s3, bucket: str) -> int | None:
+    try:
+        head = s3.head_object(Bucket=bucket, Key=SNAPSHOT_KEY)
+        return int(head.get("Metadata", {}).get("catalog-version", ""))
+    except Exception:
+        return None
+
+
+def write_snapshot(force: bool = False) -> bool:
+    """Rebuild and upload the snapshot. Returns False when skipped (no bucket, or already current)."""
+    bucket = _bucket()
+    if not bucket:
+        logger.warning("snapshot skipped: BUCKET_NAME not set")
+        return False
+    s3 = _s3_client()
+    version = get_catalog_version()
+    if not force and version is not None and _stored_version(s3, bucket) == version:
+        logger.info("snapshot already at catalog version %s", version)
+        return False
+    body = build_snapshot(version)
+    extra: dict = {}
+    if GZIP:
+        body = gzip.compress(body, mtime=0)
+        extra["ContentEncoding"] = "gzip"
+    s3.put_object(
+        Bucket=bucket,
+        Key=SNAPSHOT_KEY,
+        Body=body,
+        ContentType="application/json",
+        CacheControl="no-cache",
+        Metadata={"catalog-version": "" if version is None else str(version)},
+        **extra,
+    )
+    logger.info("snapshot written s3://%s/%s version=%s bytes=%d", bucket, SNAPSHOT_KEY, version, len(body))
+    return True
+
+
+def _flush() -> None:
+    global _timer
+    with _lock:
+        _timer = None
+    try:
+        write_snapshot()
+    except Exception:
+        logger.exception("snapshot rebuild failed")
+
+
+def _rebuild_job(payload: dict) -> None:
+    """jobs.py handler: rebuild unless a later write (which dispatched its own job) bumped the version."""
+    version = payload.get("version")
+    if version is not None:
+        current = get_catalog_version()
+        if current is not None and current != version:
+            logger.info("snapshot job for version %s superseded by %s", version, current)
+            return
+    write_snapshot()
+
+
+jobs.register("snapshot", _rebuild_job)
+
+
+def request_rebuild() -> None:
+    """Schedule a snapshot rebuild after a cafe write (see module docstring for debounce rules)."""
+    global _timer
+    if not _bucket():
+        return
+    if jobs.DETACHED:
+        jobs.dispatch("snapshot", {"version": get_catalog_version()}, delay_s=max(0.0, DEBOUNCE_SECONDS))
+        return
+    with _lock:
+        if _timer is not None:
+            return
+        _timer = threading.Timer(max(0.0, DEBOUNCE_SECONDS), _flush)
+        _timer.daemon = True
+        _timer.start()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    write_snapshot(force=True)
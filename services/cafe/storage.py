@@ -0,0 +1,491 @@
+"""
+Local storage backends for db.py: in-memory and SQLite, selected with CAFE_STORE.
+
+    CAFE_STORE=dynamodb   (default) db.py talks to DynamoDB as before
+    CAFE_STORE=memory     process-local dicts; CAFE_STORE_SEED=N preloads N synthetic cafes
+    CAFE_STORE=sqlite     single file at CAFE_STORE_PATH (default cafehop.sqlite3)
+
+The public functions in db.py (get_item, put_item, scan_all, scan_page, update_item, delete_item,
+batch_get_cafes, the watchlist helpers, ...) route here when a local store is selected, so the API
+can be load-tested at tens of thousands of cafes with no AWS account or LocalStack, and DynamoDB
+latency can be told apart from app CPU cost. Semantics follow the DynamoDB paths: numbers come back
+as float, neighborhood pages are ordered by (name, key) like the GSI, conditional updates raise
+CafeNotFound / VersionConflict, and cursors use the same opaque encoding.
+
+Seed a SQLite file for load tests:
+
+    CAFE_STORE=sqlite CAFE_STORE_PATH=/tmp/cafes.sqlite3 python storage.py --count 20000
+"""
+from __future__ import annotations
+
+import abc
+import argparse
+import bisect
+import contextlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+
+import codec
+from db import (
+    VERSION_ATTR,
+    CafeNotFound,
+    VersionConflict,
+    decode_cursor,
+    encode_cursor,
+    is_cafe_item,
+    is_watchlist_item,
+    item_to_cafe_dict,
+    item_version,
+)
+
+logger = logging.getLogger(__name__)
+
+CAFES = "cafes"
+WATCHLIST = "watchlist"
+
+
+def _normalize(item: dict) -> dict:
+    """Round-trip through the attribute-value codec so stored values match what DynamoDB returns."""
+    return codec.decode_item(codec.encode_item(item))
+
+
+def _project(item: dict, projection_expression: str | None, names: dict | None) -> dict:
+    """Apply a flat ProjectionExpression ("#k, #n, neighborhood") to a decoded item."""
+    if not projection_expression:
+        return item
+    names = names or {}
+    attrs = (names.get(p.strip(), p.strip()) for p in projection_expression.split(","))
+    return {a: item[a] for a in attrs if a in item}
+
+
+def _in_index(item: dict) -> bool:
+    """Rows without both GSI key attributes are not in the neighborhood index (same as DynamoDB)."""
+    return all(isinstance(item.get(a), str) and item.get(a) for a in codec.INDEX_KEY_ATTRS)
+
+
+class Store(abc.ABC):
+    """
+    Shared logic for the local backends. Subclasses implement the abstract storage primitives (_get,
+    _put, _delete, _all, _page, _neighborhood_page, catalog_version, bump_catalog_version) and hold
+    self._lock around them; everything here is written in terms of those.
+    """
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+
+    # --- primitives ---
+    @abc.abstractmethod
+    def _get(self, table: str, key: str) -> dict | None:
+        ...
+
+    @abc.abstractmethod
+    def _put(self, table: str, item: dict) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _delete(self, table: str, key: str) -> dict | None:
+        ...
+
+    @abc.abstractmethod
+    def _all(self, table: str) -> list[dict]:
+        """Every row of table in key order."""
+
+    @abc.abstractmethod
+    def _page(self, table: str, after: str | None, limit: int) -> list[dict]:
+        """Up to limit rows with key > after, in key order."""
+
+    @abc.abstractmethod
+    def _neighborhood_page(self, neighborhood: str, after: tuple[str, str] | None, limit: int) -> list[dict]:
+        """Up to limit indexed cafes in neighborhood with (name, key) > after, in (name, key) order."""
+
+    @abc.abstractmethod
+    def catalog_version(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    def bump_catalog_version(self) -> None:
+        ...
+
+    def count(self, table: str = CAFES) -> int:
+        return len(self._all(table))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Group many writes (seeding); backends without transactions just hold the lock."""
+        with self._lock:
+            yield
+
+    # --- db.py surface ---
+    def get_item(self, cafe_id: str) -> dict | None:
+        return self._get(CAFES, cafe_id)
+
+    def put_item(self, item: dict) -> None:
+        self._put(CAFES, _normalize(codec.drop_empty_index_keys(item)))
+
+    def scan_all(self, projection_expression: str | None = None, expression_attribute_names: dict | None = None) -> list[dict]:
+        return [
+            _project(it, projection_expression, expression_attribute_names)
+            for it in self._all(CAFES)
+            if is_cafe_item(it)
+        ]
+
+    def query_neighborhood(self, neighborhood: str, limit: int = 100, offset: int = 0) -> list[dict]:
+        items = [it for it in self._all(CAFES) if is_cafe_item(it) and _in_index(it) and it["neighborhood"] == neighborhood]
+        items.sort(key=lambda it: (it["name"], it["key"]))
+        return items[offset : offset + limit]
+
+    def scan(self, neighborhood: str | None = None, limit: int = 100, offset: int = 0) -> list[dict]:
+        items = [it for it in self._all(CAFES) if is_cafe_item(it)]
+        if neighborhood is not None and neighborhood.strip():
+            items = [it for it in items if it.get("neighborhood") == neighborhood]
+        return items[offset : offset + limit]
+
+    def scan_page(
+        self,
+        neighborhood: str | None = None,
+        limit: int = 100,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> tuple[list[dict], str | None]:
+        start = codec.decode_item(decode_cursor(cursor)) if cursor else None
+        by_neighborhood = neighborhood is not None and bool(neighborhood.strip())
+        if by_neighborhood:
+            after = (str(start.get("name") or ""), start["key"]) if start else None
+
+            def fetch(after, n):
+                return self._neighborhood_page(neighborhood, after, n)
+
+            def position(it):
+                return (it["name"], it["key"])
+
+        else:
+            after = start["key"] if start else None
+
+            def fetch(after, n):
+                return self._page(CAFES, after, n)
+
+            def position(it):
+                return it["key"]
+
+        rows: list[dict] = []
+        last = None
+        while len(rows) < limit:
+            batch = fetch(after, limit - len(rows))
+            if not batch:
+                last = None
+                break
+            rows.extend(item_to_cafe_dict(it) for it in batch if is_cafe_item(it))
+            last = batch[-1]
+            after = position(last)
+        next_cursor = None
+        if last is not None and fetch(after, 1):
+            key = {"key": last["key"]}
+            if by_neighborhood:
+                key.update(name=last["name"], neighborhood=last["neighborhood"])
+            next_cursor = encode_cursor(codec.encode_item(key))
+        return codec.only_fields(rows, fields), next_cursor
+
+    def batch_get_cafes(self, keys: list[str]) -> list[dict]:
+        out = []
+        for k in dict.fromkeys(k for k in keys if k):
+            it = self._get(CAFES, k)
+            if it is not None and is_cafe_item(it):
+                out.append(item_to_cafe_dict(it))
+        return out
+
+    def update_item(
+        self,
+        cafe_id: str,
+        updates: dict,
+        *,
+        must_exist: bool = False,
+        expected_version: int | None = None,
+    ) -> dict:
+        """Read-modify-write under the store lock; same conditions and version bump as db.update_item."""
+        conditional = must_exist or expected_version is not None
+        with self._lock:
+            current = self._get(CAFES, cafe_id)
+            if conditional:
+                if current is None:
+                    raise CafeNotFound(cafe_id)
+                stored = item_version(current)
+                if expected_version is not None and stored != int(expected_version):
+                    raise VersionConflict(stored)
+            item = dict(current or {"key": cafe_id})
+            for k, v in updates.items():
+                if k in codec.INDEX_KEY_ATTRS and v == "":
+                    item.pop(k, None)
+                else:
+                    item[k] = v
+            if conditional:
+                item[VERSION_ATTR] = item_version(current) + 1
+            item = _normalize(item)
+            self._put(CAFES, item)
+            return item
+
+    def delete_item(self, cafe_id: str) -> dict | None:
+        return self._delete(CAFES, cafe_id)
+
+    def scan_watchlist_records(self) -> list[dict]:
+        return [it for it in self._all(WATCHLIST) if is_watchlist_item(it)]
+
+    def put_watchlist_item(self, item: dict) -> dict:
+        item = _normalize(item)
+        self._put(WATCHLIST, item)
+        return item
+
+    def update_watchlist_item(self, item_id: str, attrs: dict) -> dict | None:
+        """Merge attrs into an existing watchlist entry; None (and no write) if it is gone."""
+        with self._lock:
+            current = self._get(WATCHLIST, item_id)
+            if current is None:
+                return None
+            item = _normalize({**current, **attrs})
+            self._put(WATCHLIST, item)
+            return item
+
+    def delete_watchlist_item(self, item_id: str) -> dict | None:
+        return self._delete(WATCHLIST, item_id)
+
+
+class MemoryStore(Store):
+    """Dicts plus sorted key lists (bisect) so cursor pages cost O(log n + page), not a sort per call."""
+
+    name = "memory"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._rows: dict[str, dict[str, dict]] = {CAFES: {}, WATCHLIST: {}}
+        self._keys: dict[str, list[str]] = {CAFES: [], WATCHLIST: []}
+        self._index: dict[str, list[tuple[str, str]]] = {}
+        self._version = 0
+
+    def _unindex(self, item: dict) -> None:
+        if not _in_index(item):
+            return
+        entries = self._index.get(item["neighborhood"], [])
+        pos = bisect.bisect_left(entries, (item["name"], item["key"]))
+        if pos < len(entries) and entries[pos] == (item["name"], item["key"]):
+            del entries[pos]
+
+    def _get(self, table: str, key: str) -> dict | None:
+        with self._lock:
+            it = self._rows[table].get(key)
+            return dict(it) if it is not None else None
+
+    def _put(self, table: str, item: dict) -> None:
+        key = item["key"]
+        with self._lock:
+            old = self._rows[table].get(key)
+            if old is None:
+                bisect.insort(self._keys[table], key)
+            elif table == CAFES:
+                self._unindex(old)
+            self._rows[table][key] = dict(item)
+            if table == CAFES and _in_index(item):
+                bisect.insort(self._index.setdefault(item["neighborhood"], []), (item["name"], key))
+
+    def _delete(self, table: str, key: str) -> dict | None:
+        with self._lock:
+            old = self._rows[table].pop(key, None)
+            if old is None:
+                return None
+            keys = self._keys[table]
+            del keys[bisect.bisect_left(keys, key)]
+            if table == CAFES:
+                self._unindex(old)
+            return old
+
+    def _all(self, table: str) -> list[dict]:
+        with self._lock:
+            rows = self._rows[table]
+            return [dict(rows[k]) for k in self._keys[table]]
+
+    def _page(self, table: str, after: str | None, limit: int) -> list[dict]:
+        with self._lock:
+            keys = self._keys[table]
+            start = bisect.bisect_right(keys, after) if after is not None else 0
+            rows = self._rows[table]
+            return [dict(rows[k]) for k in keys[start : start + limit]]
+
+    def _neighborhood_page(self, neighborhood: str, after: tuple[str, str] | None, limit: int) -> list[dict]:
+        with self._lock:
+            entries = self._index.get(neighborhood, [])
+            start = bisect.bisect_right(entries, after) if after is not None else 0
+            rows = self._rows[CAFES]
+            return [dict(rows[k]) for _, k in entries[start : start + limit]]
+
+    def catalog_version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def bump_catalog_version(self) -> None:
+        with self._lock:
+            self._version += 1
+
+    def count(self, table: str = CAFES) -> int:
+        with self._lock:
+            return len(self._keys[table])
+
+
+class SqliteStore(Store):
+    """
+    One SQLite file; each row keeps the item as JSON plus the columns pages are ordered by.
+    A single connection shared across threads, serialized by self._lock.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS items (
+                tbl TEXT NOT NULL,
+                key TEXT NOT NULL,
+                neighborhood TEXT,
+                name TEXT,
+                body TEXT NOT NULL,
+                PRIMARY KEY (tbl, key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS items_neighborhood ON items (tbl, neighborhood, name, key);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """
+        )
+
+    def _rows(self, sql: str, params: tuple) -> list[dict]:
+        with self._lock:
+            return [json.loads(body) for (body,) in self._conn.execute(sql, params)]
+
+    def _get(self, table: str, key: str) -> dict | None:
+        rows = self._rows("SELECT body FROM items WHERE tbl = ? AND key = ?", (table, key))
+        return rows[0] if rows else None
+
+    def _put(self, table: str, item: dict) -> None:
+        indexed = table == CAFES and _in_index(item)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO items (tbl, key, neighborhood, name, body) VALUES (?, ?, ?, ?, ?)",
+                (
+                    table,
+                    item["key"],
+                    item["neighborhood"] if indexed else None,
+                    item["name"] if indexed else None,
+                    json.dumps(item, separators=(",", ":")),
+                ),
+            )
+
+    def _delete(self, table: str, key: str) -> dict | None:
+        with self._lock:
+            old = self._get(table, key)
+            if old is not None:
+                self._conn.execute("DELETE FROM items WHERE tbl = ? AND key = ?", (table, key))
+            return old
+
+    def _all(self, table: str) -> list[dict]:
+        return self._rows("SELECT body FROM items WHERE tbl = ? ORDER BY key", (table,))
+
+    def _page(self, table: str, after: str | None, limit: int) -> list[dict]:
+        return self._rows(
+            "SELECT body FROM items WHERE tbl = ? AND key > ? ORDER BY key LIMIT ?",
+            (table, after if after is not None else "", limit),
+        )
+
+    def _neighborhood_page(self, neighborhood: str, after: tuple[str, str] | None, limit: int) -> list[dict]:
+        name, key = after if after is not None else ("", "")
+        return self._rows(
+            "SELECT body FROM items WHERE tbl = ? AND neighborhood = ? AND (name > ? OR (name = ? AND key > ?))"
+            " ORDER BY name, key LIMIT ?",
+            (CAFES, neighborhood, name, name, key, limit),
+        )
+
+    def catalog_version(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'catalogVersion'").fetchone()
+            return int(row[0]) if row else 0
+
+    def bump_catalog_version(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (name, value) VALUES ('catalogVersion', 1)"
+                " ON CONFLICT(name) DO UPDATE SET value = value + 1"
+            )
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def count(self, table: str = CAFES) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items WHERE tbl = ?", (table,)).fetchone()[0]
+
+
+_NEIGHBORHOODS = ["SoHo", "Chelsea", "Williamsburg", "Astoria", "Greenpoint", "East Village", "Park Slope"]
+
+
+def synthetic_cafe(i: int) -> dict:
+    """A cafe row shaped like POST /v1/cafes/from-upload writes it (for seeding load tests)."""
+    return {
+        "key": f"Cafe {i:06d}.jpg",
+        "name": f"Cafe {i:06d}",
+        "imageUrl": f"https://example.invalid/Cafe {i:06d}.jpg",
+        "latitude": 40.65 + random.random() / 5,
+        "longitude": -74.0 + random.random() / 5,
+        "neighborhood": random.choice(_NEIGHBORHOODS),
+        "subwayStation": "14 St-Union Sq",
+        "subwayDistanceM": round(random.random() * 800, 1),
+        "subwayRoutes": ["4", "5", "6"],
+        "eloRating": round(1400 + random.random() * 200, 2),
+        "eloStarRating": round(random.random() * 5, 1),
+        "notes": "",
+        "createdAt": "2025-01-01T00:00:00+00:00",
+    }
+
+
+def seed(store: Store, count: int) -> None:
+    random.seed(0)
+    with store.transaction():
+        for i in range(count):
+            store.put_item(synthetic_cafe(i))
+        store.bump_catalog_version()
+    logger.info("seeded %d synthetic cafes into %s store", count, store.name)
+
+
+def open_store(kind: str) -> Store:
+    """Build the backend named by CAFE_STORE (memory / sqlite)."""
+    if kind == "memory":
+        store: Store = MemoryStore()
+        seed_count = int(os.environ.get("CAFE_STORE_SEED", "0") or 0)
+        if seed_count > 0:
+            seed(store, seed_count)
+        return store
+    if kind == "sqlite":
+        return SqliteStore(os.environ.get("CAFE_STORE_PATH", "cafehop.sqlite3"))
+    raise ValueError(f"Unknown CAFE_STORE {kind!r} (expected dynamodb, memory or sqlite)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Seed the SQLite store with synthetic cafes")
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+    target = SqliteStore(os.environ.get("CAFE_STORE_PATH", "cafehop.sqlite3"))
+    seed(target, args.count)
+    print(f"{target.path}: {target.count()} cafes")
@@ -0,0 +1,138 @@
+"""
+Stored Places photos / coordinates for GET /v1/watchlist.
+
+Listing used to resolve every entry through Places on every request (several Places calls plus a
+photo redirect each) and threw the answer away. The resolved placeId,
+latitude, longitude, name and photoUrl are now written back onto the watchlist entry together with
+photoExpiresAt (see maps_link.WATCHLIST_PHOTO_TTL_SECONDS), so a listing is one table scan:
+
+- fresh entries are served as stored;
+- stale entries are served as stored and re-resolved by a "watchlist_photos" job (jobs.py: an
+  async self-invoke on Lambda, a thread under uvicorn), then written back, so the listing response
+  never waits on Places for them;
+- entries never resolved (created before photos were stored) are resolved inline once.
+
+Resolutions run concurrently on a shared pool of WATCHLIST_PHOTO_MAX_WORKERS threads, so a listing
+waits for the slowest lookup rather than the sum. Inline resolution is capped by
+WATCHLIST_PHOTO_DEADLINE_S: an entry still resolving then is returned without a photo. Under
+uvicorn its lookup keeps running on the pool and is stored for the next listing. On Lambda the
+container freezes once the response is sent, so those entries are also handed to the
+watchlist_photos job; a frozen in-process lookup that resumes on a later invocation only repeats
+the same write. Write-backs use db.update_watchlist_item, which never recreates an entry deleted
+meanwhile.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import jobs
+from db import update_watchlist_item
+from maps_link import watchlist_photo_attrs
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_S = float(os.environ.get("WATCHLIST_PHOTO_DEADLINE_S", "2.5"))
+
+# Shared across requests (and warm Lambda invocations); bounds concurrent Places lookups.
+_pool = ThreadPoolExecutor(
+    max_workers=max(1, int(os.environ.get("WATCHLIST_PHOTO_MAX_WORKERS", "8"))),
+    thread_name_prefix="watchlist-photo",
+)
+# A claimed key is not resolved again by other listings until the claim is released or expires
+# (a dispatched job runs in another Lambda container and cannot release it here).
+CLAIM_SECONDS = float(os.environ.get("WATCHLIST_PHOTO_CLAIM_SECONDS", "300"))
+_lock = threading.Lock()
+_refreshing: dict = {}  # key -> time.monotonic() when claimed
+
+
+def _expires_at(item: dict) -> int | None:
+    try:
+        return int(item["photoExpiresAt"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def resolve(item: dict) -> dict:
+    """Resolve the entry now, store the result, and return the entry with it applied."""
+    attrs = watchlist_photo_attrs(item)
+    item.update(attrs)
+    if item.get("key") and update_watchlist_item(item["key"], attrs) is None:
+        logger.info("watchlist item %r gone or not updated; resolved photo not stored", item.get("key"))
+    return item
+
+
+def _claim(key) -> bool:
+    """Mark key in flight; False when it is already being resolved (claim younger than CLAIM_SECONDS)."""
+    now = time.monotonic()
+    with _lock:
+        claimed_at = _refreshing.get(key)
+        if claimed_at is not None and now - claimed_at < CLAIM_SECONDS:
+            return False
+        _refreshing[key] = now
+        return True
+
+
+def _release(keys) -> None:
+    with _lock:
+        for key in keys:
+            _refreshing.pop(key, None)
+
+
+def _resolve_claimed(item: dict) -> dict:
+    try:
+        return resolve(item)
+    except Exception:
+        logger.exception("watchlist photo resolve failed key=%r", item.get("key"))
+        return item
+    finally:
+        _release([item.get("key")])
+
+
+def _job_item(item: dict) -> dict:
+    """The fields watchlist_photo_attrs reads (keeps the async invoke payload small)."""
+    out = {k: item.get(k) for k in ("key", "name", "placeId")}
+    for k in ("latitude", "longitude"):
+        out[k] = float(item[k]) if item.get(k) is not None else None
+    return out
+
+
+def _refresh_job(payload: dict) -> None:
+    """jobs.py handler: resolve and store every entry in payload["items"], concurrently."""
+    wait([_pool.submit(_resolve_claimed, item) for item in payload.get("items") or []])
+
+
+jobs.register("watchlist_photos", _refresh_job)
+
+
+def with_photos(items: list[dict], deadline_s: float | None = None) -> list[dict]:
+    """
+    Entries ready for watchlist_to_api. Unresolved ones are resolved concurrently until the deadline
+    (later ones come back without a photo); stale ones are handed to a watchlist_photos job.
+    """
+    now = int(time.time())
+    inline: dict = {}
+    stale: list[dict] = []
+    for i, item in enumerate(items):
+        expires_at = _expires_at(item)
+        if expires_at is None:
+            if _claim(item.get("key")):
+                inline[_pool.submit(_resolve_claimed, dict(item))] = i
+        elif expires_at <= now and _claim(item.get("key")):
+            stale.append(_job_item(item))
+    if stale and not jobs.dispatch("watchlist_photos", {"items": stale}):
+        _release(item["key"] for item in stale)
+    if inline:
+        done, pending = wait(inline, timeout=DEADLINE_S if deadline_s is None else deadline_s)
+        for fut in done:
+            items[inline[fut]] = fut.result()
+        if pending:
+            logger.warning("watchlist photos: %d of %d lookups missed the deadline", len(pending), len(inline))
+            if jobs.DETACHED:
+                late = [_job_item(items[inline[fut]]) for fut in pending]
+                if not jobs.dispatch("watchlist_photos", {"items": late}):
+                    logger.warning("watchlist photos: could not hand off %d late lookups", len(late))
+    return items
@@ -0,0 +1,117 @@
+"""
+Process-wide boto3 clients shared by the cafe and image services.
+
+Building a client loads the service model and resolves credentials (tens of ms), and each client
+owns its own urllib3 pool, so a client per request (or per module) pays for model loading, TLS
+handshakes and cold pools again and again. client()/resource() build one instance per
+(service, region, endpoint) on first use and hand back the same one afterwards; botocore clients
+are thread-safe, so the parallel scan workers and request threads share its keep-alive pool.
+
+All clients use adaptive retries (client-side rate limiting on throttles) and bounded timeouts:
+
+    AWS_MAX_ATTEMPTS (4), AWS_CONNECT_TIMEOUT (2 s), AWS_READ_TIMEOUT (10 s),
+    AWS_MAX_POOL_CONNECTIONS (25)
+
+warm_up() is meant for Lambda init (boosted CPU, not billed per request) or uvicorn startup.
+
+Shipped next to each service's main.py by its Dockerfiles (COPY services/common/*.py).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any
+
+import boto3
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+REGION = os.environ.get("AWS_REGION", "us-east-1")
+ENDPOINT_URL = os.environ.get("AWS_ENDPOINT_URL") or None
+
+CONFIG = Config(
+    retries={"mode": "adaptive", "total_max_attempts": int(os.environ.get("AWS_MAX_ATTEMPTS", "4"))},
+    connect_timeout=float(os.environ.get("AWS_CONNECT_TIMEOUT", "2")),
+    read_timeout=float(os.environ.get("AWS_READ_TIMEOUT", "10")),
+    max_pool_connections=int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "25")),
+    tcp_keepalive=True,
+)
+
+_USE_DEFAULT = object()
+_lock = threading.Lock()
+_session: boto3.session.Session | None = None
+_clients: dict[tuple, Any] = {}
+_resources: dict[tuple, Any] = {}
+
+
+def _get_session() -> boto3.session.Session:
+    """One Session for the process (Session objects themselves are not thread-safe; callers hold _lock)."""
+    global _session
+    if _session is None:
+        _session = boto3.session.Session(region_name=REGION)
+    return _session
+
+
+def _endpoint(endpoint_url: Any) -> str | None:
+    return ENDPOINT_URL if endpoint_url is _USE_DEFAULT else (endpoint_url or None)
+
+
+def client(service: str, *, endpoint_url: Any = _USE_DEFAULT, region_name: str | None = None):
+    """
+    Shared low-level client. endpoint_url defaults to AWS_ENDPOINT_URL (LocalStack); pass another
+    value (or None for the real AWS endpoint) to get a separate client, e.g. a public presign host.
+    """
+    key = (service, region_name or REGION, _endpoint(endpoint_url))
+    found = _clients.get(key)
+    if found is not None:
+        return found
+    with _lock:
+        if key not in _clients:
+            kwargs: dict = {"region_name": key[1], "config": CONFIG}
+            if key[2]:
+                kwargs["endpoint_url"] = key[2]
+            _clients[key] = _get_session().client(service, **kwargs)
+        return _clients[key]
+
+
+def resource(service: str, *, endpoint_url: Any = _USE_DEFAULT, region_name: str | None = None):
+    """Shared boto3 resource (same config as client()). Table objects from it are not thread-safe."""
+    key = (service, region_name or REGION, _endpoint(endpoint_url))
+    found = _resources.get(key)
+    if found is not None:
+        return found
+    with _lock:
+        if key not in _resources:
+            kwargs: dict = {"region_name": key[1], "config": CONFIG}
+            if key[2]:
+                kwargs["endpoint_url"] = key[2]
+            _resources[key] = _get_session().resource(service, **kwargs)
+        return _resources[key]
+
+
+# Cheap calls that open a pooled connection to each service's regional endpoint. Errors (e.g. no IAM
+# permission for the call) are fine: the TLS connection is established and kept either way.
+_PINGS = {
+    "dynamodb": lambda c: c.describe_endpoints(),
+    "s3": lambda c: c.list_buckets(),
+}
+
+
+def warm_up(*services: str, connect: bool | None = None) -> None:
+    """
+    Build the shared clients for services now instead of on the first request. With connect
+    (default: AWS_WARM_CONNECT=1), also make one cheap call each so a keep-alive connection is
+    already open when the first request arrives.
+    """
+    if connect is None:
+        connect = os.environ.get("AWS_WARM_CONNECT", "").strip().lower() in ("1", "true", "yes")
+    for service in services:
+        c = client(service)
+        ping = _PINGS.get(service)
+        if connect and ping is not None:
+            try:
+                ping(c)
+            except Exception as e:
+                logger.info("aws warm-up %s: %s", service, e)
@@ -9,12 +9,12 @@ import logging
 import os
 import sys
 
-import boto3
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 
+import aws_clients
 from processing import generate_map_thumbnail
 
 logger = logging.getLogger(__name__)
@@ -35,20 +35,15 @@ def _configure_logging_for_lambda() -> None:
 _configure_logging_for_lambda()
 
 BUCKET = os.environ.get("BUCKET_NAME", "")
-_REGION = os.environ.get("AWS_REGION", "us-east-1")
-_ENDPOINT = os.environ.get("AWS_ENDPOINT_URL")
-_s3_kwargs: dict = {"region_name": _REGION}
-if _ENDPOINT:
-    _s3_kwargs["endpoint_url"] = _ENDPOINT
-s3 = boto3.client("s3", **_s3_kwargs) if BUCKET else None
+_ENDPOINT = aws_clients.ENDPOINT_URL
+s3 = aws_clients.client("s3") if BUCKET else None
 # Presigned URLs must use a host the *browser* can reach. Inside Docker, AWS_ENDPOINT_URL
 # is often http://localstack:4566; set S3_PUBLIC_ENDPOINT_URL to http://127.0.0.1:4566
 # so SigV4 matches the PUT from the user's machine (signing is local; no TCP to this host).
 _presign_endpoint = os.environ.get("S3_PUBLIC_ENDPOINT_URL", "").strip() or _ENDPOINT
-_presign_kwargs: dict = {"region_name": _REGION}
-if _presign_endpoint:
-    _presign_kwargs["endpoint_url"] = _presign_endpoint
-s3_presign = boto3.client("s3", **_presign_kwargs) if BUCKET else None
+s3_presign = aws_clients.client("s3", endpoint_url=_presign_endpoint) if BUCKET else None
+if BUCKET:
+    aws_clients.warm_up("s3")
 
 app = FastAPI(title="Image service")
 if not os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
@@ -78,6 +78,7 @@ resource "aws_iam_role_policy" "cafe_dynamodb" {
         Effect = "Allow"
         Action = [
           "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
           "dynamodb:PutItem",
           "dynamodb:UpdateItem",
           "dynamodb:DeleteItem",
@@ -89,6 +90,28 @@ resource "aws_iam_role_policy" "cafe_dynamodb" {
           "${var.dynamodb_table_arn}/index/*",
         ]
       },
+      {
+        Sid    = "DynamoWatchlistTable"
+        Effect = "Allow"
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:Query",
+          "dynamodb:Scan",
+        ]
+        Resource = [var.watchlist_table_arn]
+      },
+      {
+        Sid    = "DynamoGeocodeCacheTable"
+        Effect = "Allow"
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+        ]
+        Resource = [var.geocode_cache_table_arn]
+      },
     ]
   })
 }
@@ -113,6 +136,25 @@ resource "aws_iam_role_policy" "cafe_s3" {
   })
 }
 
+# Out-of-band jobs (services/cafe/jobs.py: snapshot rebuilds, watchlist photo refreshes) are async
+# invocations of the function itself.
+resource "aws_iam_role_policy" "cafe_self_invoke" {
+  name = "${var.project_name}-cafe-lambda-self-invoke"
+  role = aws_iam_role.cafe.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Sid      = "AsyncJobs"
+        Effect   = "Allow"
+        Action   = ["lambda:InvokeFunction"]
+        Resource = "arn:aws:lambda:*:${data.aws_caller_identity.current.account_id}:function:${var.lambda_function_name}"
+      },
+    ]
+  })
+}
+
 resource "aws_lambda_function" "cafe" {
   function_name = var.lambda_function_name
   role          = aws_iam_role.cafe.arn
@@ -128,8 +170,10 @@ resource "aws_lambda_function" "cafe" {
   environment {
     variables = merge(
       {
-        TABLE_NAME  = var.dynamodb_table_name
-        BUCKET_NAME = var.s3_bucket_name
+        TABLE_NAME               = var.dynamodb_table_name
+        WATCHLIST_TABLE_NAME     = var.watchlist_table_name
+        GEOCODE_CACHE_TABLE_NAME = var.geocode_cache_table_name
+        BUCKET_NAME              = var.s3_bucket_name
       },
       var.google_places_api_key != "" ? { GOOGLE_PLACES_API_KEY = var.google_places_api_key } : {}
     )
@@ -143,8 +187,9 @@ resource "aws_apigatewayv2_api" "cafe" {
 
   cors_configuration {
     allow_origins = var.cors_allow_origins
-    allow_methods = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-    allow_headers = ["content-type", "authorization"]
+    allow_methods  = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+    allow_headers  = ["content-type", "authorization", "if-match", "if-none-match"]
+    expose_headers = ["etag"]
   }
 }
 
@@ -36,6 +36,26 @@ variable "dynamodb_table_arn" {
   type        = string
 }
 
+variable "watchlist_table_name" {
+  description = "DynamoDB watchlist table name (WATCHLIST_TABLE_NAME env)"
+  type        = string
+}
+
+variable "watchlist_table_arn" {
+  description = "DynamoDB watchlist table ARN for IAM"
+  type        = string
+}
+
+variable "geocode_cache_table_name" {
+  description = "DynamoDB reverse-geocode cache table name (GEOCODE_CACHE_TABLE_NAME env)"
+  type        = string
+}
+
+variable "geocode_cache_table_arn" {
+  description = "DynamoDB reverse-geocode cache table ARN for IAM"
+  type        = string
+}
+
 variable "s3_bucket_name" {
   description = "S3 bucket for photos (BUCKET_NAME on cafe Lambda; used in POST /v1/cafes/from-upload)"
   type        = string
@@ -29,6 +29,45 @@ resource "aws_dynamodb_table" "cafes" {
   }
 }
 
+# Watchlist entries (watchlist:gmaps:* keys) live in their own table so GET /v1/watchlist
+# and the cafe scans each read only their own rows. One-shot move: services/cafe/migrate_watchlist.py
+resource "aws_dynamodb_table" "watchlist" {
+  name         = "${var.project_name}-watchlist"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "key"
+
+  attribute {
+    name = "key"
+    type = "S"
+  }
+
+  tags = {
+    Name = "${var.project_name}-watchlist"
+  }
+}
+
+# Reverse-geocode cache (geohash cell -> neighborhood) for services/cafe/geocode_cache.py.
+# Rows expire through DynamoDB TTL on expiresAt (epoch seconds).
+resource "aws_dynamodb_table" "geocode_cache" {
+  name         = "${var.project_name}-geocode-cache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "geohash"
+
+  attribute {
+    name = "geohash"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Name = "${var.project_name}-geocode-cache"
+  }
+}
+
 # Outputs for use by Lambdas or load script
 output "cafes_table_name" {
   description = "DynamoDB table name for cafes"
@@ -39,3 +78,18 @@ output "cafes_table_arn" {
   description = "DynamoDB table ARN for cafes"
   value       = aws_dynamodb_table.cafes.arn
 }
+
+output "watchlist_table_name" {
+  description = "DynamoDB table name for watchlist entries"
+  value       = aws_dynamodb_table.watchlist.name
+}
+
+output "watchlist_table_arn" {
+  description = "DynamoDB table ARN for watchlist entries"
+  value       = aws_dynamodb_table.watchlist.arn
+}
+
+output "geocode_cache_table_name" {
+  description = "DynamoDB table name for the reverse-geocode cache"
+  value       = aws_dynamodb_table.geocode_cache.name
+}
@@ -20,6 +20,10 @@ module "cafe" {
   cafe_lambda_image_tag    = var.cafe_lambda_image_tag
   dynamodb_table_name      = aws_dynamodb_table.cafes.name
   dynamodb_table_arn       = aws_dynamodb_table.cafes.arn
+  watchlist_table_name     = aws_dynamodb_table.watchlist.name
+  watchlist_table_arn      = aws_dynamodb_table.watchlist.arn
+  geocode_cache_table_name = aws_dynamodb_table.geocode_cache.name
+  geocode_cache_table_arn  = aws_dynamodb_table.geocode_cache.arn
   s3_bucket_name           = var.photo_s3_bucket_name
   google_places_api_key    = var.cafe_google_places_api_key
   cors_allow_origins       = var.cafe_cors_allow_origins
@@ -0,0 +1,140 @@
+"""
+Shared fixtures for the cafe API tests (uv run --group tests pytest).
+
+services/cafe and services/common are flat module directories (the Dockerfiles copy them next to
+main.py), so they go on sys.path here the same way. Backends:
+
+- memory_store: CAFE_STORE=memory (storage.MemoryStore), no AWS at all;
+- dynamodb: moto's mock_aws with the cafes table (and its neighborhood GSI) created like
+  scripts/localstack_setup_resources.sh does. Shared boto3 clients are dropped on entry and exit
+  so every test talks to its own mock.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "services" / "common"))
+sys.path.insert(0, str(ROOT / "services" / "cafe"))
+
+for _name, _value in {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_REGION": "us-east-1",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}.items():
+    os.environ.setdefault(_name, _value)
+os.environ.pop("AWS_ENDPOINT_URL", None)
+os.environ.pop("BUCKET_NAME", None)  # no snapshot rebuilds
+
+import aws_clients  # noqa: E402
+import catalog_cache  # noqa: E402
+import db  # noqa: E402
+
+
+def _reset_clients() -> None:
+    aws_clients._clients.clear()
+    aws_clients._resources.clear()
+    db._tables.clear()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_catalog_cache():
+    catalog_cache.invalidate()
+    yield
+    catalog_cache.invalidate()
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    import storage
+
+    store = storage.MemoryStore()
+    monkeypatch.setattr(db, "STORE", "memory")
+    monkeypatch.setattr(db, "_local_store", store)
+    return store
+
+
+def create_cafes_table(with_index: bool = True) -> None:
+    attrs = [{"AttributeName": "key", "AttributeType": "S"}]
+    kwargs: dict = {}
+    if with_index:
+        attrs += [
+            {"AttributeName": "neighborhood", "AttributeType": "S"},
+            {"AttributeName": "name", "AttributeType": "S"},
+        ]
+        kwargs["GlobalSecondaryIndexes"] = [
+            {
+                "IndexName": db.NEIGHBORHOOD_INDEX,
+                "KeySchema": [
+                    {"AttributeName": "neighborhood", "KeyType": "HASH"},
+                    {"AttributeName": "name", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ]
+    aws_clients.client("dynamodb").create_table(
+        TableName=db.TABLE_NAME,
+        BillingMode="PAY_PER_REQUEST",
+        AttributeDefinitions=attrs,
+        KeySchema=[{"AttributeName": "key", "KeyType": "HASH"}],
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def dynamodb_backend(monkeypatch):
+    """mock_aws with no tables yet (tests that need a particular table layout create it)."""
+    from moto import mock_aws
+
+    monkeypatch.setattr(db, "STORE", "dynamodb")
+    monkeypatch.setattr(db, "_local_store", None)
+    with mock_aws():
+        _reset_clients()
+        yield
+    _reset_clients()
+
+
+@pytest.fixture
+def dynamodb(dynamodb_backend):
+    create_cafes_table()
+
+
+@pytest.fixture(params=["memory", "dynamodb"])
+def backend(request):
+    """Run a test once on the memory store and once on moto."""
+    return request.getfixturevalue("memory_store" if request.param == "memory" else "dynamodb")
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app)
+
+
+def seed_cafes(count: int, neighborhoods=("SoHo", "Chelsea")) -> list[str]:
+    """Put count cafes through db.put_item; returns their keys in key order."""
+    keys = []
+    for i in range(count):
+        key = f"cafe{i:03d}.jpg"
+        db.put_item(
+            db.cafe_to_item(
+                {
+                    "s3_key": key,
+                    "name": f"Cafe {count - i:03d}",
+                    "neighborhood": neighborhoods[i % len(neighborhoods)],
+                    "latitude": 40.7 + i * 0.001,
+                    "longitude": -73.99,
+                    "elo_rating": 1500,
+                }
+            )
+        )
+        keys.append(key)
+    return sorted(keys)
@@ -0,0 +1,53 @@
+"""CompressionMiddleware headers on re-encoded bodies (user-012)."""
+from __future__ import annotations
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from api_responses import CompressionMiddleware, FastJSONResponse
+
+BODY = {"cafes": [{"name": f"Cafe {i}", "notes": "x" * 40} for i in range(50)]}
+
+
+def _client(headers: dict) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/doc")
+    def doc():
+        return FastJSONResponse(content=BODY, headers=headers)
+
+    @app.get("/small")
+    def small():
+        return Response(content=b"{}", media_type="application/json", headers=headers)
+
+    return TestClient(app)
+
+
+def test_vary_is_merged_not_duplicated():
+    resp = _client({"Vary": "Origin"}).get("/doc", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers.get_list("vary") == ["Origin, Accept-Encoding"]
+
+    resp = _client({"Vary": "accept-encoding"}).get("/doc", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers.get_list("vary") == ["accept-encoding"]
+
+
+def test_strong_etag_is_weakened_when_re_encoded():
+    client = _client({"ETag": '"7"'})
+    packed = client.get("/doc", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["etag"] == 'W/"7"'
+    assert packed.json() == BODY  # httpx decodes gzip
+
+    identity = client.get("/doc", headers={"Accept-Encoding": "identity"})
+    assert identity.headers["etag"] == '"7"'
+    assert "content-encoding" not in identity.headers
+
+
+def test_weak_etag_and_small_bodies_are_untouched():
+    client = _client({"ETag": 'W/"c3-abc"', "Vary": "Origin"})
+    assert client.get("/doc", headers={"Accept-Encoding": "gzip"}).headers["etag"] == 'W/"c3-abc"'
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["etag"] == 'W/"c3-abc"'
+    assert small.headers.get_list("vary") == ["Origin"]
@@ -0,0 +1,42 @@
+"""backfill_enrichment: batch results match upload's per-point lookups; no stations means no run (user-021)."""
+from __future__ import annotations
+
+import os
+import random
+
+import pytest
+
+import backfill_enrichment
+import citibike_stations
+from citibike_stations import get_closest_citibike_station
+from geocoding import get_closest_subway_station
+
+STATIONS = os.path.join(os.path.dirname(__file__), "..", "station_information_rel.json")
+
+
+def test_compute_matches_the_upload_lookups(monkeypatch):
+    monkeypatch.setenv("CITIBIKE_STATIONS_JSON_PATH", STATIONS)
+    monkeypatch.delenv("CITIBIKE_STATIONS_URL", raising=False)
+    rng = random.Random(5)
+    rows = [{"latitude": 40.55 + rng.random() * 0.35, "longitude": -74.05 + rng.random() * 0.3} for _ in range(300)]
+    fresh = backfill_enrichment.compute(rows, *backfill_enrichment.station_sets())
+    for row, fields in zip(rows, fresh):
+        sub = get_closest_subway_station(row["latitude"], row["longitude"])
+        bike = get_closest_citibike_station(row["latitude"], row["longitude"])
+        stored = {
+            "subwayStation": sub["station"],
+            "subwayDistanceM": sub["distance_m"],
+            "subwayRoutes": sub["lines"],
+            "closest_citibike_station_name": bike["name"],
+            "closest_citibike_station_distance_m": bike["distance_m"],
+            "closest_citibike_station_walk_minutes": bike["mins_walk"],
+        }
+        assert backfill_enrichment._changed(stored, fields) == {}
+
+
+def test_feed_is_loaded_before_computing(monkeypatch):
+    calls = []
+    monkeypatch.setattr(citibike_stations, "reload", lambda json_path=None: calls.append(json_path))
+    with pytest.raises(RuntimeError, match="Citi Bike"):
+        backfill_enrichment.backfill(dry_run=True)
+    assert calls == [None]
@@ -0,0 +1,90 @@
+"""GET /cafes: cursor pagination, parameter validation and the catalog ETag (user-002)."""
+from __future__ import annotations
+
+import base64
+
+import pytest
+
+import db
+from conftest import create_cafes_table, seed_cafes
+
+
+def _pages(client, **params) -> list[list[dict]]:
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        resp = client.get("/cafes", params=query)
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        pages.append(body["cafes"])
+        cursor = body.get("next_cursor")
+        if not cursor:
+            return pages
+
+
+def test_cursor_pages_cover_every_cafe_once(backend, client):
+    keys = seed_cafes(7)
+    pages = _pages(client, limit=3)
+    seen = [c["s3_key"] for page in pages for c in page]
+    assert sorted(seen) == keys
+    assert len(seen) == len(set(seen))
+    assert all(len(page) <= 3 for page in pages)
+
+
+def test_neighborhood_pages_follow_name_order(backend, client):
+    seed_cafes(9)
+    pages = _pages(client, neighborhood="SoHo", limit=2)
+    rows = [c for page in pages for c in page]
+    assert len(rows) == 5
+    assert {c["neighborhood"] for c in rows} == {"SoHo"}
+    names = [c["name"] for c in rows]
+    assert names == sorted(names)
+
+
+def test_fields_projection_pages(backend, client):
+    keys = seed_cafes(5)
+    pages = _pages(client, limit=2, fields="s3_key,name")
+    rows = [c for page in pages for c in page]
+    assert sorted(c["s3_key"] for c in rows) == keys
+    assert all(set(c) == {"s3_key", "name"} for c in rows)
+
+
+def test_scan_fallback_without_neighborhood_index(dynamodb_backend, client):
+    create_cafes_table(with_index=False)
+    seed_cafes(9)
+    pages = _pages(client, neighborhood="Chelsea", limit=2)
+    rows = [c for page in pages for c in page]
+    assert sorted(c["s3_key"] for c in rows) == sorted(f"cafe{i:03d}.jpg" for i in range(1, 9, 2))
+    assert {c["neighborhood"] for c in rows} == {"Chelsea"}
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"cursor": "not-a-cursor!"},
+        {"cursor": base64.urlsafe_b64encode(b'{"nokey":1}').decode().rstrip("=")},
+        {"offset": 2, "cursor": db.encode_cursor({"key": {"S": "cafe000.jpg"}})},
+        {"offset": 2, "fields": "s3_key"},
+        {"fields": "s3_key,not_a_field"},
+    ],
+)
+def test_bad_parameters_are_400(backend, client, params):
+    resp = client.get("/cafes", params=params)
+    assert resp.status_code == 400
+    assert "error" in resp.json()
+
+
+def test_if_none_match_gets_304_until_a_write(backend, client):
+    seed_cafes(3)
+    first = client.get("/cafes", params={"limit": 2})
+    etag = first.headers["etag"]
+    assert client.get("/cafes", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 304
+    seed_cafes(4)
+    assert client.get("/cafes", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_bad_parameters_are_400_even_with_matching_etag(backend, client):
+    seed_cafes(2)
+    resp = client.get("/cafes", params={"cursor": "%%%"}, headers={"If-None-Match": "*"})
+    assert resp.status_code == 400
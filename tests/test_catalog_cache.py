@@ -0,0 +1,50 @@
+"""catalog_cache: loads run outside the lock and never install rows an invalidation superseded (user-003)."""
+from __future__ import annotations
+
+import threading
+
+import catalog_cache
+import db
+
+
+def test_invalidate_during_load_discards_the_loaded_rows(memory_store, monkeypatch):
+    real_scan_all = db.scan_all
+
+    def scan_all_then_write(**kwargs):
+        rows = real_scan_all(**kwargs)
+        catalog_cache.invalidate()  # a write lands while the scan is in flight
+        return rows
+
+    before = catalog_cache.stats()
+    monkeypatch.setattr(db, "scan_all", scan_all_then_write)
+    catalog_cache.get_rows()
+    after = catalog_cache.stats()
+    assert after["rows"] == 0 and after["age_s"] is None
+    assert after["stale_loads"] == before["stale_loads"] + 1
+    assert after["refreshes"] == before["refreshes"]
+
+    monkeypatch.setattr(db, "scan_all", real_scan_all)
+    catalog_cache.get_rows()
+    assert catalog_cache.stats()["refreshes"] == before["refreshes"] + 1
+
+
+def test_invalidate_does_not_wait_for_a_cold_load(memory_store, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_scan_all(**kwargs):
+        started.set()
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(db, "scan_all", slow_scan_all)
+    loader = threading.Thread(target=catalog_cache.get_rows)
+    loader.start()
+    assert started.wait(5)
+    invalidated = threading.Thread(target=catalog_cache.invalidate)
+    invalidated.start()
+    invalidated.join(1)
+    try:
+        assert not invalidated.is_alive()
+    finally:
+        release.set()
+        loader.join(5)
@@ -0,0 +1,93 @@
+"""Conditional cafe writes: If-Match -> 412 / 404, VersionConflict decoding, legacy rows (user-008)."""
+from __future__ import annotations
+
+import pytest
+
+import db
+from conftest import seed_cafes
+
+KEY = "cafe000.jpg"
+
+
+def test_legacy_row_matches_expected_version_zero(backend):
+    seed_cafes(1)  # put_item writes no version attribute, like rows from before versioning
+    assert db.item_version(db.get_item(KEY)) == 0
+    updated = db.update_item(KEY, {"notes": "first"}, must_exist=True, expected_version=0)
+    assert updated["notes"] == "first"
+    assert db.item_version(updated) == 1
+
+
+def test_stale_expected_version_raises_with_current_version(backend):
+    seed_cafes(1)
+    db.update_item(KEY, {"notes": "first"}, must_exist=True, expected_version=0)
+    db.update_item(KEY, {"notes": "second"}, must_exist=True, expected_version=1)
+    with pytest.raises(db.VersionConflict) as exc:
+        db.update_item(KEY, {"notes": "late"}, must_exist=True, expected_version=0)
+    assert exc.value.current_version == 2
+    assert db.get_item(KEY)["notes"] == "second"
+
+
+def test_missing_row_raises_not_found(backend):
+    with pytest.raises(db.CafeNotFound):
+        db.update_item("nope.jpg", {"notes": "x"}, must_exist=True)
+    with pytest.raises(db.CafeNotFound):
+        db.update_item("nope.jpg", {"notes": "x"}, must_exist=True, expected_version=0)
+    assert db.get_item("nope.jpg") is None
+
+
+def test_update_items_reports_each_outcome(backend):
+    seed_cafes(2)
+    results = db.update_items(
+        [
+            ("cafe000.jpg", {"notes": "a"}, 0),
+            ("cafe001.jpg", {"notes": "b"}, 3),
+            ("nope.jpg", {"notes": "c"}, None),
+        ]
+    )
+    assert results == {"cafe000.jpg": "updated", "cafe001.jpg": "conflict", "nope.jpg": "missing"}
+
+
+def test_patch_if_match_round_trip(backend, client):
+    seed_cafes(1)
+    etag = client.get(f"/cafes/{KEY}").headers["etag"]
+    assert etag == '"0"'
+
+    ok = client.patch(f"/cafes/{KEY}", json={"notes": "hi"}, headers={"If-Match": etag})
+    assert ok.status_code == 200, ok.text
+    assert ok.headers["etag"] == '"1"'
+    assert ok.json()["notes"] == "hi"
+
+    stale = client.patch(f"/cafes/{KEY}", json={"notes": "lost"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert stale.headers["etag"] == '"1"'
+    assert client.get(f"/cafes/{KEY}").json()["notes"] == "hi"
+
+    weak = client.patch(f"/cafes/{KEY}", json={"notes": "weak"}, headers={"If-Match": 'W/"1"'})
+    assert weak.status_code == 200
+    assert weak.headers["etag"] == '"2"'
+
+
+def test_put_without_if_match_is_unconditional(backend, client):
+    seed_cafes(1)
+    body = client.get(f"/cafes/{KEY}").json()
+    body["notes"] = "replaced"
+    resp = client.put(f"/cafes/{KEY}", json=body)
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["etag"] == '"1"'
+
+
+@pytest.mark.parametrize("method", ["put", "patch"])
+def test_missing_cafe_is_404(backend, client, method):
+    seed_cafes(1)
+    body = {"notes": "x"}
+    if method == "put":
+        body = dict(client.get(f"/cafes/{KEY}").json(), s3_key="nope.jpg")
+    resp = getattr(client, method)("/cafes/nope.jpg", json=body, headers={"If-Match": '"0"'})
+    assert resp.status_code == 404
+    assert db.get_item("nope.jpg") is None
+
+
+def test_malformed_if_match_is_400(backend, client):
+    seed_cafes(1)
+    resp = client.patch(f"/cafes/{KEY}", json={"notes": "x"}, headers={"If-Match": '"abc"'})
+    assert resp.status_code == 400
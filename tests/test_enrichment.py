@@ -0,0 +1,45 @@
+"""location_enrichment deadlines: abandoned sources never hold up later uploads (user-017)."""
+from __future__ import annotations
+
+import threading
+import time
+
+import enrichment
+
+
+def test_hung_source_does_not_starve_later_uploads(monkeypatch):
+    release = threading.Event()
+
+    def hung(lat, lon, name):
+        release.wait(10)
+        return {}
+
+    monkeypatch.setitem(enrichment._FETCHERS, "neighborhood", hung)
+    monkeypatch.setitem(enrichment._FETCHERS, "subway", lambda lat, lon, name: {"subway_station": "Bedford Av"})
+    monkeypatch.setitem(enrichment._FETCHERS, "google_maps", lambda lat, lon, name: {})
+    monkeypatch.setitem(enrichment._FETCHERS, "citibike", lambda lat, lon, name: {"citibike_name": "N 7 St"})
+    try:
+        # More uploads than a shared 8-worker pool could absorb with one hung call each.
+        for _ in range(12):
+            started = time.monotonic()
+            result = enrichment.location_enrichment(40.717, -73.957, "Cafe", deadline_s=0.2)
+            assert time.monotonic() - started < 1.0
+            assert result.timed_out == ("neighborhood",)
+            assert result.subway_station == "Bedford Av"
+            assert result.citibike_name == "N 7 St"
+    finally:
+        release.set()
+
+
+def test_failures_are_reported_separately(monkeypatch):
+    def boom(lat, lon, name):
+        raise RuntimeError("places down")
+
+    monkeypatch.setitem(enrichment._FETCHERS, "neighborhood", lambda lat, lon, name: {"neighborhood": "Greenpoint"})
+    monkeypatch.setitem(enrichment._FETCHERS, "subway", lambda lat, lon, name: {})
+    monkeypatch.setitem(enrichment._FETCHERS, "google_maps", boom)
+    monkeypatch.setitem(enrichment._FETCHERS, "citibike", lambda lat, lon, name: {})
+    result = enrichment.location_enrichment(40.72, -73.95, "Cafe", deadline_s=1.0)
+    assert result.neighborhood == "Greenpoint"
+    assert result.failed == ("google_maps",)
+    assert result.timed_out == ()
@@ -0,0 +1,40 @@
+"""grid_index: the capped ring walk returns what a full scan returns, near and far from the points (user-018)."""
+from __future__ import annotations
+
+import math
+import random
+
+from grid_index import GridIndex
+
+
+def _index(max_rings: int = 4) -> GridIndex:
+    rng = random.Random(7)
+    # A dense cluster (Manhattan-ish) and a sparse scatter around it.
+    pts = [(40.70 + rng.random() * 0.1, -74.02 + rng.random() * 0.06) for _ in range(400)]
+    pts += [(40.50 + rng.random() * 0.4, -74.20 + rng.random() * 0.5) for _ in range(40)]
+    return GridIndex([math.radians(p[0]) for p in pts], [math.radians(p[1]) for p in pts], 500, max_rings)
+
+
+def test_nearest_matches_full_scan():
+    index = _index()
+    rng = random.Random(11)
+    queries = [(40.3 + rng.random() * 0.8, -74.4 + rng.random() * 0.8) for _ in range(500)]
+    queries += [(41.0, -74.0), (40.3, -74.0), (0.0, 0.0)]
+    for lat, lon in queries:
+        lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+        idx, d = index.nearest(lat, lon)
+        _, scan_d = index._scan(lat_rad, lon_rad, math.cos(lat_rad))
+        assert math.isclose(d, scan_d, rel_tol=1e-9, abs_tol=1e-6), (lat, lon)
+
+
+def test_far_query_does_not_walk_every_ring(monkeypatch):
+    index = _index(max_rings=2)
+    walked = []
+    real = GridIndex._ring_cells
+    monkeypatch.setattr(GridIndex, "_ring_cells", staticmethod(lambda cx, cy, ring: walked.append(ring) or real(cx, cy, ring)))
+    assert index.nearest(45.0, -74.0) is not None
+    assert max(walked) == 2
+
+
+def test_empty_index():
+    assert GridIndex([], [], 500, 4).nearest(40.7, -74.0) is None
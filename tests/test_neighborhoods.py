@@ -0,0 +1,82 @@
+"""Committed NTA polygons and the NTA -> stored-name alias table (user-016)."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import neighborhoods
+
+
+@pytest.fixture(scope="module")
+def index():
+    found = neighborhoods._load()
+    assert found is not None, "data/neighborhoods/nyc_neighborhoods.geojson did not load"
+    return found
+
+
+def test_committed_polygons_cover_every_nta(index):
+    assert len(index.polygons) == 262
+    assert len({p.nta for p in index.polygons}) == 262
+
+
+def test_alias_table_lists_every_nta(index):
+    with open(neighborhoods._data_path("nta_aliases.json"), encoding="utf-8") as f:
+        table = json.load(f)
+    assert set(table) == {p.nta for p in index.polygons}
+    assert all(v is None or (isinstance(v, str) and v.strip()) for v in table.values())
+
+
+@pytest.mark.parametrize(
+    "lat, lon, nta",
+    [
+        (40.7033, -73.9881, "Downtown Brooklyn-DUMBO-Boerum Hill"),
+        (40.6756, -74.0120, "Carroll Gardens-Cobble Hill-Gowanus-Red Hook"),
+        (40.7290, -73.9540, "Greenpoint"),
+    ],
+)
+def test_points_land_in_their_nta(index, lat, lon, nta):
+    assert index.polygon_at(lat, lon).nta == nta
+
+
+def test_only_aliased_ntas_answer(index):
+    assert neighborhoods.lookup(40.7290, -73.9540) == "Greenpoint"
+    # Mixed-name NTA (DUMBO / Downtown Brooklyn): no answer, the caller keeps asking Nominatim.
+    assert neighborhoods.lookup(40.7033, -73.9881) is None
+    assert neighborhoods.lookup(40.60, -73.70) is None  # Atlantic Ocean
+
+
+def test_derive_aliases_needs_unanimous_stored_names(index):
+    rows = [
+        {"latitude": 40.7290, "longitude": -73.9540, "neighborhood": "Greenpoint"},
+        {"latitude": 40.7300, "longitude": -73.9530, "neighborhood": "Greenpoint"},
+        {"latitude": 40.7033, "longitude": -73.9881, "neighborhood": "DUMBO"},
+        {"latitude": 40.6930, "longitude": -73.9870, "neighborhood": "Downtown Brooklyn"},
+        {"latitude": 40.6756, "longitude": -74.0120, "neighborhood": "Red Hook"},
+    ]
+    table = neighborhoods.derive_aliases(rows, min_rows=2)
+    assert len(table) == 262
+    assert table["Greenpoint"] == "Greenpoint"
+    assert table["Downtown Brooklyn-DUMBO-Boerum Hill"] is None
+    assert table["Carroll Gardens-Cobble Hill-Gowanus-Red Hook"] is None  # one row < min_rows
+    loose = neighborhoods.derive_aliases(rows, min_rows=1)
+    assert loose["Carroll Gardens-Cobble Hill-Gowanus-Red Hook"] == "Red Hook"
+    assert loose["Downtown Brooklyn-DUMBO-Boerum Hill"] is None  # two stored names
+
+
+def test_simplify_keeps_named_multipolygons():
+    square = [[-74.0, 40.7], [-73.99, 40.7], [-73.99, 40.71], [-73.995, 40.7100000001], [-74.0, 40.71], [-74.0, 40.7]]
+    doc = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {"ntaname": "Test", "nta2020": "XX0101", "boroname": "Brooklyn"},
+             "geometry": {"type": "Polygon", "coordinates": [square]}},
+            {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [square]}},
+        ],
+    }
+    slim = neighborhoods.simplify(doc)
+    assert len(slim["features"]) == 1
+    feature = slim["features"][0]
+    assert feature["geometry"]["type"] == "MultiPolygon"
+    assert len(feature["geometry"]["coordinates"][0][0]) == 5  # near-collinear point dropped
+    assert neighborhoods._PolygonIndex(neighborhoods._parse(slim)).polygon_at(40.705, -73.995).nta == "Test"
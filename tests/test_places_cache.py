@@ -0,0 +1,27 @@
+"""places_cache: hits from both tiers count as saved API calls (user-023)."""
+from __future__ import annotations
+
+import places_cache
+
+
+def test_api_calls_saved_counts_both_tiers(tmp_path, monkeypatch):
+    monkeypatch.setattr(places_cache, "ENABLED", True)
+    monkeypatch.setattr(places_cache, "SQLITE_PATH", str(tmp_path / "places.sqlite"))
+    monkeypatch.setattr(places_cache, "_sqlite", None)
+    monkeypatch.setattr(places_cache, "_memory", places_cache.OrderedDict())
+    monkeypatch.setattr(places_cache, "_stats", dict.fromkeys(places_cache._stats, 0))
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"result": {"name": "Cafe"}}
+
+    for _ in range(2):
+        assert places_cache.cached("place|abc|name", fetch) == {"result": {"name": "Cafe"}}
+    places_cache._memory.clear()  # a restarted process: only the SQLite tier has it
+    assert places_cache.cached("place|abc|name", fetch) == {"result": {"name": "Cafe"}}
+
+    stats = places_cache.stats()
+    assert len(calls) == stats["api_calls"] == stats["misses"] == 1
+    assert (stats["memory_hits"], stats["persistent_hits"]) == (1, 1)
+    assert stats["hits"] == stats["api_calls_saved"] == 2